@@ -1,4 +1,5 @@
 import csv
+import json
 import os
 import sys
 from collections import defaultdict
@@ -7,36 +8,12 @@ from collections import defaultdict
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from src.data_loader import load_data, load_config
+from src.constraints import load_or_compile, constraint_cache_path
 
 # Configuración de conexión
 SPREADSHEET_NAME = "INFORMACION_HORARIOS"
 CREDENTIALS_FILE = "credentials.json"
 
-def build_ancestry(grupos):
-    """
-    Construye un mapa de parentesco entre grupos usando Objetos.
-    """
-    # Map group_id -> object
-    g_map = {g.id: g for g in grupos}
-    
-    # Map group_id -> set of related ids (self + ancestors + descendants)
-    related = defaultdict(set)
-    
-    for g in grupos:
-        current = g
-        # Recorrer hacia arriba (ancestros)
-        while current:
-            related[g.id].add(current.id)
-            related[current.id].add(g.id) # Agregar self a la lista del ancestro
-            
-            parent_id = current.parent_grupo_id
-            if parent_id and parent_id in g_map:
-                current = g_map[parent_id]
-            else:
-                current = None
-            
-    return related
-
 def parse_time(time_str):
     try:
         h, m = map(int, time_str.split(':'))
@@ -47,7 +24,50 @@ def parse_time(time_str):
 def check_overlap(start1, end1, start2, end2):
     return max(start1, start2) < min(end1, end2)
 
-def analyze():
+# Claves del JSON de la API (SessionData) -> columnas del CSV
+JSON_TO_CSV_KEYS = {
+    'dia': 'Dia',
+    'hora_inicio': 'Hora Inicio',
+    'hora_fin': 'Hora Fin',
+    'curso': 'Curso',
+    'grupo': 'Grupo',
+    'aula': 'Aula',
+    'profesor': 'Profesor',
+    'tipo_aula': 'Tipo Aula',
+}
+
+def iter_schedule_rows(path):
+    """
+    Recorre las sesiones del horario una sola vez.
+    Acepta el CSV exportado o el JSON de la API (resultado de /progress, su campo
+    'result', o directamente la lista 'schedule').
+    """
+    if path.lower().endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = (data.get('result') or data).get('schedule', [])
+        for item in data:
+            yield {csv_key: str(item.get(json_key, '')) for json_key, csv_key in JSON_TO_CSV_KEYS.items()}
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                yield row
+
+def sweep_overlaps(intervals):
+    """
+    Sort-and-sweep sobre intervalos (inicio, fin, idx) de un mismo bucket.
+    Devuelve los pares (idx_a, idx_b) que se solapan, en O(n log n + pares).
+    """
+    intervals.sort()
+    active = []
+    for start, end, idx in intervals:
+        active = [a for a in active if a[1] > start]
+        for _, _, a_idx in active:
+            yield a_idx, idx
+        active.append((start, end, idx))
+
+def analyze(schedule_path=None):
     base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     print(f"🔍 Analizando horario. Cargando datos maestros de '{SPREADSHEET_NAME}'...")
     
@@ -61,54 +81,53 @@ def analyze():
 
     # 2. Construir Índices de Búsqueda (Lookups)
     # Necesitamos buscar objetos por su NOMBRE, ya que el CSV tiene nombres, no IDs.
-    
-    g_map_name = {g.id: g for g in grupos} # ID -> Obj (para ancestry)
-    
-    # Nombre -> Objeto
     c_name_map = {c.nombre: c for c in cursos}
     p_name_map = {p.nombre: p for p in profesores}
     a_name_map = {a.nombre: a for a in aulas}
     g_id_map = {g.id: g for g in grupos} # El CSV usa ID de grupo, no nombre, en la columna 'Grupo'
     
-    related_map = build_ancestry(grupos)
+    # Índices compartidos con FitnessEvaluator (parentesco, elegibilidad, tipos de aula, breaks)
+    model = load_or_compile(cursos, profesores, aulas, grupos, clases, config, constraint_cache_path(config))
     
-    # 3. Cargar Horario Generado (CSV)
-    schedule = []
-    csv_path = os.path.join(base_path, 'horario_generado.csv')
+    # 3. Ubicar Horario Generado (CSV o JSON de la API)
+    schedule_path = schedule_path or os.path.join(base_path, 'horario_generado.csv')
     
-    if not os.path.exists(csv_path):
-        print(f"❌ No se encontró el archivo: {csv_path}")
+    if not os.path.exists(schedule_path):
+        print(f"❌ No se encontró el archivo: {schedule_path}")
         return
 
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            schedule.append(row)
-            
-    conflicts = []
-    print(f"📊 Verificando {len(schedule)} sesiones programadas...")
+    # Horario de break (en minutos) a partir de los slots de break del modelo
+    break_intervals = [model.slot_minutes[s] for s in model.break_slots if s < model.num_slots]
 
-    # Group by Day for time conflict checks
-    by_day = defaultdict(list)
+    # Minutos -> índice de slot, para consultar las máscaras de disponibilidad
+    day_idx_map = {d: i for i, d in enumerate(config.get('days', []))}
+    slot_by_start = {start: i for i, (start, _) in enumerate(model.slot_minutes)}
+    slot_by_end = {end: i for i, (_, end) in enumerate(model.slot_minutes)}
+
+    conflicts = []
     
-    # Definir horario de break basado en strings (o calcularlo de config si fuera necesario)
-    # Asumimos que el break slot 6 corresponde aprox a 12:30-13:15
-    # Para ser exactos, deberíamos leer config['time_slots'] y config['break_slots']
-    break_intervals = []
-    if 'break_slots' in config and 'time_slots' in config:
-        for slot_idx in config['break_slots']:
-             if slot_idx < len(config['time_slots']):
-                 t_str = config['time_slots'][slot_idx] # "12:30-13:15"
-                 s, e = t_str.split('-')
-                 break_intervals.append((parse_time(s), parse_time(e)))
-
-    for row in schedule:
-        by_day[row['Dia']].append(row)
-        
-        # --- Validaciones Individuales ---
-        
+    # Sesiones compactas: (dia, inicio_min, fin_min, curso, grupo, profesor, aula)
+    sessions = []
+    # Buckets por día y recurso para el barrido de solapes
+    by_prof = defaultdict(list)
+    by_room = defaultdict(list)
+    by_family = defaultdict(list)
+    prof_hours = defaultdict(float)
+
+    # 4. Una sola pasada: validaciones individuales + indexación
+    for row in iter_schedule_rows(schedule_path):
+        idx = len(sessions)
+        day = row['Dia']
         start_min = parse_time(row['Hora Inicio'])
         end_min = parse_time(row['Hora Fin'])
+        sessions.append((day, start_min, end_min, row['Curso'], row['Grupo'], row['Profesor'], row['Aula']))
+        
+        # Intervalos vacíos (horas inválidas) nunca se solapan
+        if end_min > start_min:
+            interval = (start_min, end_min, idx)
+            by_prof[(day, row['Profesor'])].append(interval)
+            by_room[(day, row['Aula'])].append(interval)
+            by_family[(day, model.group_root.get(row['Grupo'], row['Grupo']))].append(interval)
         
         # 1. Break Time Check (Dinámico basado en config)
         for b_start, b_end in break_intervals:
@@ -120,7 +139,6 @@ def analyze():
         grupo = g_id_map.get(row['Grupo']) # CSV guarda ID del grupo (ej: C1-M)
         
         if aula and grupo:
-            # Nota: Usamos acceso por punto .capacidad
             if aula.capacidad < grupo.num_estudiantes:
                 conflicts.append(f"CAPACITY VIOLATION: {row['Aula']} (Cap: {aula.capacidad}) muy pequeña para {row['Grupo']} ({grupo.num_estudiantes} est).")
         
@@ -129,63 +147,49 @@ def analyze():
         prof = p_name_map.get(row['Profesor'])
         
         if curso and prof:
-            # curso.profesores_ids es lista de IDs
-            # prof.id es el ID del profesor actual
-            if prof.id not in curso.profesores_ids:
+            if prof.id not in model.eligible_sets.get(curso.id, ()):
                  conflicts.append(f"ELIGIBILITY VIOLATION: {row['Profesor']} no está autorizado para enseñar {row['Curso']}.")
 
+        # 3b. Professor Availability Check (máscara de disponibilidad por día)
+        if prof and prof.id in model.availability:
+            d_idx = day_idx_map.get(day)
+            s_idx = slot_by_start.get(start_min)
+            e_idx = slot_by_end.get(end_min)
+            if d_idx is not None and s_idx is not None and e_idx is not None and e_idx >= s_idx:
+                if not model.prof_available(prof.id, d_idx, s_idx, e_idx - s_idx + 1):
+                    conflicts.append(f"AVAILABILITY VIOLATION: {row['Profesor']} no está disponible el {day} de {row['Hora Inicio']} a {row['Hora Fin']}.")
+
         # 4. Room Type Check
         if aula:
             required_type = row['Tipo Aula']
-            if aula.tipo != required_type:
-                 conflicts.append(f"ROOM TYPE VIOLATION: {row['Aula']} es {aula.tipo}, la clase requiere {required_type}.")
-
-    # --- Validaciones de Pares (Conflictos de Tiempo) ---
-    for day, sessions in by_day.items():
-        for i in range(len(sessions)):
-            for j in range(i + 1, len(sessions)):
-                s1 = sessions[i]
-                s2 = sessions[j]
-                
-                start1 = parse_time(s1['Hora Inicio'])
-                end1 = parse_time(s1['Hora Fin'])
-                start2 = parse_time(s2['Hora Inicio'])
-                end2 = parse_time(s2['Hora Fin'])
-                
-                if check_overlap(start1, end1, start2, end2):
-                    # 5. Group Conflict (Ancestry)
-                    g1 = s1['Grupo']
-                    g2 = s2['Grupo']
-                    
-                    # Verificamos si g2 está relacionado con g1
-                    if g2 in related_map.get(g1, set()):
-                        conflicts.append(f"GROUP CONFLICT: {day} - {g1} vs {g2} se solapan.")
-                    
-                    # 6. Professor Conflict
-                    p1 = s1['Profesor']
-                    p2 = s2['Profesor']
-                    if p1 == p2:
-                        conflicts.append(f"PROFESSOR CONFLICT: {day} - {p1} tiene choque: {s1['Curso']} y {s2['Curso']}")
-                        
-                    # 7. Room Conflict
-                    r1 = s1['Aula']
-                    r2 = s2['Aula']
-                    if r1 == r2:
-                        conflicts.append(f"ROOM CONFLICT: {day} - {r1} tiene choque: {s1['Curso']} y {s2['Curso']}")
+            room_type = model.room_type[aula.id]
+            if room_type != required_type:
+                 conflicts.append(f"ROOM TYPE VIOLATION: {row['Aula']} es {room_type}, la clase requiere {required_type}.")
 
-    # 8. Max Hours Per Week Check
-    prof_hours = defaultdict(float) 
-    
-    for row in schedule:
-        prof_name = row['Profesor']
-        start_min = parse_time(row['Hora Inicio'])
-        end_min = parse_time(row['Hora Fin'])
-        duration_minutes = end_min - start_min
-        
         # Asumimos bloques de 45 min para contar "horas académicas"
-        slots = round(duration_minutes / 45)
-        prof_hours[prof_name] += slots
+        prof_hours[row['Profesor']] += round((end_min - start_min) / 45)
+
+    print(f"📊 Verificando {len(sessions)} sesiones programadas...")
+
+    # --- Validaciones de Pares (Conflictos de Tiempo) con sort-and-sweep por bucket ---
+    # 5. Group Conflict (Ancestry): solo dentro de la misma familia de grupos
+    for (day, _), intervals in by_family.items():
+        for i, j in sweep_overlaps(intervals):
+            g1, g2 = sessions[i][4], sessions[j][4]
+            if model.related(g1, g2):
+                conflicts.append(f"GROUP CONFLICT: {day} - {g1} vs {g2} se solapan.")
+
+    # 6. Professor Conflict
+    for (day, p_name), intervals in by_prof.items():
+        for i, j in sweep_overlaps(intervals):
+            conflicts.append(f"PROFESSOR CONFLICT: {day} - {p_name} tiene choque: {sessions[i][3]} y {sessions[j][3]}")
 
+    # 7. Room Conflict
+    for (day, r_name), intervals in by_room.items():
+        for i, j in sweep_overlaps(intervals):
+            conflicts.append(f"ROOM CONFLICT: {day} - {r_name} tiene choque: {sessions[i][3]} y {sessions[j][3]}")
+
+    # 8. Max Hours Per Week Check
     for prof_name, total_slots in prof_hours.items():
         prof_obj = p_name_map.get(prof_name)
         if prof_obj:
@@ -203,5 +207,8 @@ def analyze():
         if len(conflicts) > 50:
             print(f"  ... y {len(conflicts) - 50} más.")
 
+    return conflicts
+
 if __name__ == "__main__":
-    analyze()
\ No newline at end of file
+    # Uso: python scripts/analyze_schedule.py [horario.csv | resultado.json]
+    analyze(sys.argv[1] if len(sys.argv) > 1 else None)
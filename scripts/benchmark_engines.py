@@ -0,0 +1,142 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+# Agregar src al path para importar los módulos
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.model import Curso, Profesor, Aula, Grupo, Clase
+from src.solvers import ENGINES, create_solver
+from src.presolve import InfeasibleInstanceError
+
+# Compara los motores (ga, cpsat, hybrid, race, decomposed) sobre la misma instancia:
+# tiempo hasta el primer horario sin conflictos duros, fitness final y tiempo total.
+#
+# Uso:
+#   python scripts/benchmark_engines.py [--grupos 12] [--engines ga,cpsat,hybrid,race,decomposed] [--sheets]
+
+SPREADSHEET_NAME = "INFORMACION_HORARIOS"
+CREDENTIALS_FILE = "credentials.json"
+
+TIME_SLOTS = [
+    "07:00-07:45", "07:45-08:30", "08:30-09:15", "09:15-10:00", "10:00-10:45", "10:45-11:30",
+    "12:30-13:15", "13:15-14:00", "14:00-14:45", "14:45-15:30", "15:30-16:15", "16:15-17:00",
+    "17:00-17:45", "17:45-18:30", "18:30-19:15", "19:15-20:00", "20:00-20:45", "20:45-21:30", "21:30-22:15"
+]
+DAYS = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes"]
+TURNOS = ["MAÑANA", "TARDE", "NOCHE"]
+
+def synthetic_instance(num_grupos: int, seed: int = 1):
+    """
+    Instancia sintética con la forma de los datos reales: grupos con subgrupos A/B,
+    tres cursos de teoría por grupo y un laboratorio por subgrupo, profesores con
+    disponibilidad parcial y algunos cursos con un solo profesor elegible.
+    """
+    rng = random.Random(seed)
+    num_profesores = max(4, num_grupos)
+    profesores = []
+    for i in range(num_profesores):
+        disponibilidad = {}
+        if i % 4 == 0:
+            disponibilidad = {"Lunes": ["07:00-12:30"], "Martes": ["07:00-22:15"], "Miércoles": ["13:15-22:15"], "Jueves": ["07:00-22:15"]}
+        profesores.append(Profesor(f"P{i}", f"Profesor {i}", 24, disponibilidad))
+
+    num_aulas = max(2, num_grupos // 2)
+    aulas = [Aula(f"A{i}", f"Aula {i}", 40, "Teoria") for i in range(num_aulas)]
+    aulas += [Aula(f"L{i}", f"Laboratorio {i}", 25, "Laboratorio") for i in range(max(1, num_aulas // 2))]
+
+    grupos, cursos, clases = [], [], []
+    prof_ids = [p.id for p in profesores]
+    for g in range(num_grupos):
+        gid = f"G{g}"
+        turno = TURNOS[g % len(TURNOS)]
+        ciclo = g % 5 + 1
+        grupos.append(Grupo(gid, gid, ciclo, turno, "A", 35))
+        grupos.append(Grupo(f"{gid}-A", f"{gid}-A", ciclo, turno, "A", 18, gid))
+        grupos.append(Grupo(f"{gid}-B", f"{gid}-B", ciclo, turno, "B", 17, gid))
+        for k in range(3):
+            curso_id = f"C{g}_{k}"
+            elegibles = rng.sample(prof_ids, 1 if k == 0 else 2)
+            cursos.append(Curso(curso_id, f"Curso {g}.{k}", str(ciclo), 4, "Teoria", elegibles))
+            clases.append(Clase(f"K{len(clases)}", curso_id, gid, 3, "Teoria"))
+        curso_id = f"C{g}_lab"
+        cursos.append(Curso(curso_id, f"Laboratorio {g}", str(ciclo), 4, "Laboratorio", rng.sample(prof_ids, 2)))
+        for sub in ("-A", "-B"):
+            clases.append(Clase(f"K{len(clases)}", curso_id, gid + sub, 2, "Laboratorio"))
+
+    config = {
+        "population_size": 50, "max_generations": 200, "elitism_count": 2,
+        "mutation_rate": 0.05, "crossover_rate": 0.9,
+        "break_slots": [6], "time_slots": TIME_SLOTS, "days": DAYS,
+        "cpsat_time_limit": 60,
+        "decomposition_max_clases": max(20, len(clases) // 4),
+    }
+    return cursos, profesores, aulas, grupos, clases, config
+
+def run_engine(engine: str, data, config: dict) -> dict:
+    cursos, profesores, aulas, grupos, clases = data
+    solver = create_solver(engine, cursos, profesores, aulas, grupos, clases, config)
+    start = time.perf_counter()
+    first_feasible = [None]
+
+    def on_progress(step, fitness):
+        if first_feasible[0] is not None:
+            return
+        # race solo recibe el fitness de sus corridas: usa el anuncio de la ganadora
+        best = solver.best_individual
+        if solver.stats.get("winner") is not None or (best is not None and not solver.find_conflicts(best)):
+            first_feasible[0] = time.perf_counter() - start
+
+    try:
+        best = solver.solve(on_progress=on_progress)
+    except (InfeasibleInstanceError, RuntimeError) as e:
+        return {"engine": engine, "error": str(e), "total": time.perf_counter() - start}
+    total = time.perf_counter() - start
+
+    conflicts = len(solver.find_conflicts(best))
+    if first_feasible[0] is None and conflicts == 0:
+        first_feasible[0] = total
+    return {
+        "engine": engine,
+        "time_to_feasible": first_feasible[0],
+        "total": total,
+        "fitness": solver.evaluator.evaluate(best),
+        "conflicts": conflicts,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de motores de horarios")
+    parser.add_argument("--grupos", type=int, default=12, help="Grupos de la instancia sintética")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--engines", default=",".join(ENGINES), help="Motores separados por coma")
+    parser.add_argument("--sheets", action="store_true", help="Usar los datos reales de Google Sheets")
+    args = parser.parse_args()
+
+    if args.sheets:
+        from src.data_loader import load_data, load_config
+        print("⏳ Conectando a Google Sheets para descargar datos...")
+        data = load_data(SPREADSHEET_NAME, CREDENTIALS_FILE)
+        config = load_config(SPREADSHEET_NAME, CREDENTIALS_FILE)
+    else:
+        *data, config = synthetic_instance(args.grupos, args.seed)
+    print(f"📊 Instancia: {len(data[4])} clases, {len(data[1])} profesores, {len(data[2])} aulas\n")
+
+    results = []
+    for engine in [e.strip() for e in args.engines.split(",") if e.strip()]:
+        random.seed(args.seed)
+        print(f"--- {engine} ---")
+        results.append(run_engine(engine, data, config))
+
+    print("\n--- 🏁 RESULTADOS ---")
+    print(f"{'Motor':<8} {'Factible (s)':>13} {'Total (s)':>10} {'Fitness':>12} {'Conflictos':>11}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['engine']:<8} ❌ {r['error']}")
+            continue
+        feasible = f"{r['time_to_feasible']:.2f}" if r['time_to_feasible'] is not None else "nunca"
+        print(f"{r['engine']:<8} {feasible:>13} {r['total']:>10.2f} {r['fitness']:>12.1f} {r['conflicts']:>11}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import ast
+import os
+import subprocess
+import sys
+import statistics
+
+# Mide el costo de importar la API (proxy del arranque en frío en Cloud Run).
+# Cada medición corre en un intérprete nuevo para no reutilizar módulos cacheados.
+#
+# Uso:
+#   python scripts/benchmark_import.py [repeticiones] [--importtime]
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGET_MODULE = "src.api"
+
+# Módulos que NO deberían cargarse al importar la API (se difieren al primer uso)
+HEAVY_MODULES = ["gspread", "google.oauth2.service_account", "firebase_admin", "uvicorn"]
+
+_PROBE = f"""
+import sys, time
+t = time.perf_counter()
+import {TARGET_MODULE}
+elapsed = time.perf_counter() - t
+loaded = [m for m in {HEAVY_MODULES!r} if m in sys.modules]
+print(repr((elapsed, loaded)))
+"""
+
+def measure_once():
+    env = dict(os.environ, WARMUP_ON_STARTUP="0")
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE], cwd=BASE_PATH, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout.strip().splitlines()[-1]
+    return ast.literal_eval(out)
+
+def print_importtime(top: int = 15):
+    """Muestra los módulos con mayor tiempo acumulado de importación (-X importtime)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {TARGET_MODULE}"],
+        cwd=BASE_PATH, capture_output=True, text=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name))
+    rows.sort(reverse=True)
+    print(f"\n--- Top {top} módulos por tiempo acumulado ---")
+    for cumulative_us, self_us, name in rows[:top]:
+        print(f"   {cumulative_us / 1000:8.1f} ms (propio {self_us / 1000:6.1f} ms)  {name.strip()}")
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    repeats = int(args[0]) if args else 5
+
+    print(f"⏱️ Midiendo 'import {TARGET_MODULE}' ({repeats} repeticiones, intérprete nuevo cada vez)...")
+    timings = []
+    loaded = []
+    for _ in range(repeats):
+        elapsed, loaded = measure_once()
+        timings.append(elapsed * 1000)
+
+    print(f"   - Mediana: {statistics.median(timings):.1f} ms")
+    print(f"   - Mínimo:  {min(timings):.1f} ms")
+    print(f"   - Máximo:  {max(timings):.1f} ms")
+
+    if loaded:
+        print(f"   ⚠️ Módulos pesados cargados al importar: {', '.join(loaded)}")
+    else:
+        print("   ✅ Ningún cliente pesado (gspread/firebase/uvicorn) se carga al importar.")
+
+    if "--importtime" in sys.argv:
+        print_importtime()
+
+if __name__ == "__main__":
+    main()
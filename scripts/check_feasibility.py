@@ -6,6 +6,9 @@ from collections import defaultdict
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from src.data_loader import load_data, load_config
+from src.constraints import load_or_compile, constraint_cache_path
+from src.domains import build_domains
+from src.presolve import presolve
 
 # Configuración de conexión
 SPREADSHEET_NAME = "INFORMACION_HORARIOS"
@@ -22,6 +25,9 @@ def check_feasibility():
         print(f"❌ Error al cargar datos: {e}")
         return
 
+    # Índices compartidos con el evaluador (elegibilidad, aulas por tipo, breaks)
+    model = load_or_compile(cursos, profesores, aulas, grupos, clases, config, constraint_cache_path(config))
+
     print("\n--- 📊 ANÁLISIS DE VIABILIDAD (Static Check) ---\n")
     
     # ---------------------------------------------------------
@@ -88,8 +94,7 @@ def check_feasibility():
         eligible_capacity = 0
         eligible_names = []
         
-        # course.profesores_ids es una lista de strings ['DOC1', 'DOC2']
-        for p_id in course.profesores_ids:
+        for p_id in model.eligible_profs.get(c_id, []):
             if p_id in p_map:
                 prof = p_map[p_id]
                 eligible_capacity += prof.max_horas_semana
@@ -135,13 +140,11 @@ def check_feasibility():
     # ---------------------------------------------------------
     # 3. ANÁLISIS: Capacidad Global de Aulas
     # ---------------------------------------------------------
-    # Aquí usamos 'config' que sigue siendo un diccionario
-    num_days = len(config['days'])
-    num_time_slots = len(config['time_slots'])
+    num_days = model.num_days
+    num_time_slots = model.num_slots
     
-    # Cálculo de slots efectivos (Total slots - Slots de break)
-    # config['break_slots'] es una lista de enteros ahora
-    num_breaks = len(config.get('break_slots', []))
+    # Cálculo de slots efectivos (Total slots - Slots de break dentro del día)
+    num_breaks = (model.break_mask & model.span_mask(0, num_time_slots)).bit_count()
     
     # Asumimos que durante el break NO se pueden dictar clases
     effective_slots_per_day = num_time_slots - num_breaks
@@ -159,6 +162,26 @@ def check_feasibility():
     else:
         rooms_usage = (total_slots_needed / total_room_capacity) * 100
         print(f"   ✅ [OK] Suficiente espacio físico. Ocupación estimada global: {rooms_usage:.1f}%")
+    print()
+
+    # ---------------------------------------------------------
+    # 4. PRE-SOLVE: Asignaciones forzadas y dominios vacíos
+    # ---------------------------------------------------------
+    # Mismo análisis que corre el GA antes de evolucionar (src/presolve.py)
+    domains = build_domains(model, profesores, aulas, grupos, clases)
+    result = presolve(model, domains, [c.id for c in cursos], profesores, aulas, grupos, clases)
+
+    print(f"4. PRE-SOLVE (Propagación de Restricciones):")
+    print(f"   - Clases fijadas: {len(result.fixed)} | Libres: {len(result.free_ids)}")
+    print(f"   - Colocaciones podadas: {result.stats['pruned_placements']}")
+    for warning in result.warnings:
+        print(f"   ⚠️ [AVISO] {warning}")
+    if result.feasible:
+        print(f"   ✅ [OK] No se detectaron causas de infactibilidad.")
+    else:
+        print(f"   ❌ [CRÍTICO] El GA no podrá llegar a fitness 0:")
+        for reason in result.reasons:
+            print(f"      - {reason}")
         
     print("\n--- FIN DEL ANÁLISIS ---")
 
@@ -0,0 +1,52 @@
+import argparse
+import os
+import sys
+import time
+
+# Agregar src al path para importar los módulos
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.dataset_store import Dataset, dataset_path
+
+# Configuración de conexión
+SPREADSHEET_NAME = "INFORMACION_HORARIOS"
+CREDENTIALS_FILE = "credentials.json"
+
+def export_cmd(args):
+    from src.data_loader import export_dataset
+    print("⏳ Descargando las pestañas desde Google Sheets...")
+    start = time.perf_counter()
+    path = export_dataset(args.sheet, CREDENTIALS_FILE, args.file)
+    print(f"✅ Dataset guardado en {path} ({os.path.getsize(path) / 1024:.1f} KB, {time.perf_counter() - start:.1f}s)")
+
+def import_cmd(args):
+    from src.data_loader import import_dataset
+    path = args.file or dataset_path(args.sheet)
+    print(f"⏳ Subiendo {path} a la hoja '{args.sheet}'...")
+    import_dataset(path, args.sheet, CREDENTIALS_FILE)
+    print("✅ Pestañas actualizadas en Google Sheets")
+
+def info_cmd(args):
+    path = args.file or dataset_path(args.sheet)
+    start = time.perf_counter()
+    dataset = Dataset(path)
+    for title in dataset.tables():
+        dataset.records(title)
+    elapsed = time.perf_counter() - start
+    print(f"📦 {path} ({os.path.getsize(path) / 1024:.1f} KB), lectura completa en {elapsed * 1000:.1f} ms")
+    for title in dataset.tables():
+        print(f"   {title:<14} {dataset.num_rows(title):>6} filas  {', '.join(dataset.columns(title))}")
+    dataset.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa/exporta el dataset local (DATA_BACKEND=local) desde el layout de Google Sheets")
+    parser.add_argument("command", choices=["export", "import", "info"],
+                        help="export: Sheets -> archivo, import: archivo -> Sheets, info: resumen del archivo")
+    parser.add_argument("--sheet", default=SPREADSHEET_NAME, help="Nombre de la hoja de cálculo")
+    parser.add_argument("--file", default=None, help="Ruta del dataset (default DATASET_DIR/<hoja>.hds)")
+    args = parser.parse_args()
+
+    {"export": export_cmd, "import": import_cmd, "info": info_cmd}[args.command](args)
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,58 @@
 import os
 import sys
+import copy
+import time
 import uuid
+import threading
+from contextlib import asynccontextmanager
 from typing import List, Optional, Dict
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks # <--- BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Request, Response # <--- BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.cors import CORSMiddleware # <--- 1. IMPORTAR ESTO
 from pydantic import BaseModel
-import uvicorn
 
 # Agregar el directorio raíz al path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.data_loader import load_data, load_config
-from src.genetic_algorithm import GeneticAlgorithm
-from src.auth import get_current_user
+from src.data_loader import load_data, load_config, _get_gspread_client
+from src.solvers import ENGINES, create_solver
+from src.constraints import load_or_compile, constraint_cache_path
+from src.presolve import InfeasibleInstanceError
+from src.checkpoint import Checkpointer, get_checkpoint_store, decode_checkpoint, read_header
+from src.rendering import ScheduleRenderer
+from src.auth import get_current_user, init_firebase
+from src.sheets_io import run_sheets
+from src import metrics
+
+# Constantes
+SPREADSHEET_NAME = "INFORMACION_HORARIOS"
+CREDENTIALS_FILE = "credentials.json"
+
+def _warm_up_clients():
+    """
+    Inicializa Firebase y el cliente de Google Sheets en paralelo, en hilos daemon.
+    No bloquea el arranque: '/' responde mientras los clientes se construyen, y
+    si alguno no terminó a tiempo se construye en su primer uso.
+    """
+    def _warm_sheets():
+        try:
+            _get_gspread_client(CREDENTIALS_FILE)
+        except Exception as e:
+            print(f"⚠️ No se pudo pre-inicializar el cliente de Sheets: {e}")
+
+    for target in (init_firebase, _warm_sheets):
+        threading.Thread(target=target, daemon=True).start()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if os.environ.get('WARMUP_ON_STARTUP', '1').lower() in ('1', 'true', 'yes'):
+        _warm_up_clients()
+    yield
 
 app = FastAPI(
     title="API Generador de Horarios EPIS",
-    version="1.1.0"
+    version="1.1.0",
+    lifespan=lifespan
 )
 
 # Configuración de CORS
@@ -37,14 +72,39 @@ app.add_middleware(
 )
 # ------------------------------------------------
 
-# Constantes
-SPREADSHEET_NAME = "INFORMACION_HORARIOS"
-CREDENTIALS_FILE = "credentials.json"
-
 # --- Sistema de Jobs (En memoria para Demo/Cloud Run Instance Single) ---
 jobs: Dict[str, Dict] = {} 
 active_job_id: Optional[str] = None # Semáforo Singleton 
 
+# --- Métricas (Prometheus) ---
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # Usamos la plantilla de la ruta (/progress/{job_id}) para no explotar la cardinalidad
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "unmatched")
+        metrics.HTTP_REQUEST_LATENCY.observe(
+            time.perf_counter() - start,
+            method=request.method, route=route_path, status=str(status_code)
+        )
+
+def _count_jobs(started: bool) -> int:
+    return sum(
+        1 for job in list(jobs.values())
+        if job["status"] == "running" and (job.get("started_at") is not None) == started
+    )
+
+metrics.Gauge("horario_jobs_queued", "Jobs aceptados que aún no comienzan a ejecutarse.",
+              callback=lambda: _count_jobs(started=False))
+metrics.Gauge("horario_jobs_running", "Jobs del algoritmo genético en ejecución.",
+              callback=lambda: _count_jobs(started=True))
+
 # --- Modelos de Datos (JSON Response) ---
 
 class SessionData(BaseModel):
@@ -66,6 +126,8 @@ class ScheduleResponse(BaseModel):
     status: str
     fitness: float
     conflicts: List[str]
+    conflict_details: List[Dict] = [] # Registros estructurados (tipo, recursos, sesiones, día, slots)
+    breakdown: Optional[Dict] = None # Conteo y penalidad por restricción (total = fitness)
     # ESTO ES NUEVO: La lista real de clases para el frontend
     schedule: List[SessionData] 
 
@@ -82,10 +144,15 @@ class DataSummary(BaseModel):
 def read_root():
     return {"status": "online", "system": "HorarioEPIS AI"}
 
+@app.get("/metrics", tags=["General"], include_in_schema=False)
+def get_metrics():
+    """Métricas operativas en formato Prometheus."""
+    return Response(content=metrics.render_latest(), media_type=metrics.CONTENT_TYPE_LATEST)
+
 @app.get("/data/summary", response_model=DataSummary, tags=["Datos"])
-def get_data_summary():
+async def get_data_summary():
     try:
-        cursos, profesores, aulas, grupos, clases = load_data(SPREADSHEET_NAME, CREDENTIALS_FILE)
+        cursos, profesores, aulas, grupos, clases = await run_sheets(load_data, SPREADSHEET_NAME, CREDENTIALS_FILE)
         return {
             "total_cursos": len(cursos),
             "total_profesores": len(profesores),
@@ -100,100 +167,129 @@ def get_data_summary():
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Fallo en algoritmo: {str(e)}")
 
+def _schedule_result(horario, evaluator, renderer: ScheduleRenderer, status_msg: Optional[str] = None) -> Dict:
+    """Campos de ScheduleResponse para un horario (conflictos + desglose de penalidades + render)."""
+    conflict_report = evaluator.find_conflicts(horario)
+    conflicts = conflict_report.messages()
+    return {
+        "status": status_msg or ("Exito" if not conflicts else "Con Conflictos"),
+        "fitness": horario.fitness,
+        "conflicts": conflicts,
+        "conflict_details": conflict_report.to_dicts(),
+        "breakdown": evaluator.breakdown(horario).to_dict(),
+        "schedule": renderer.render(horario)
+    }
+
 # --- Async GA Task Wrapper ---
-def run_ga_bg_task(job_id: str):
+def run_ga_bg_task(job_id: str, engine: Optional[str] = None, resume: Optional[bytes] = None, time_budget: Optional[float] = None):
     """
-    Ejecuta el GA en segundo plano y actualiza el diccionario global 'jobs'.
+    Ejecuta el motor elegido (ga, cpsat, hybrid, race, decomposed o pareto) en segundo plano y actualiza el diccionario global 'jobs'.
+    Con el motor ga guarda checkpoints periódicos; resume (un checkpoint) reanuda la corrida desde él.
     """
     global active_job_id
     try:
         print(f"🔄 [Job {job_id}] Iniciando tarea en segundo plano...")
+        jobs[job_id]["started_at"] = time.time()
         
         # 1. Cargar datos
         config = load_config(SPREADSHEET_NAME, CREDENTIALS_FILE)
         cursos, profesores, aulas, grupos, clases = load_data(SPREADSHEET_NAME, CREDENTIALS_FILE)
+        if time_budget:
+            # Query param > parámetro 'time_budget' de Configuracion
+            config = dict(config, time_budget=time_budget)
         
         # Definir callback para reportar progreso
         max_gens = config['max_generations']
+        renderer = ScheduleRenderer(cursos, profesores, aulas, grupos, clases, config)
+
+        # Mejor horario hasta el momento: se publica cada 'best_publish_interval' segundos
+        # (solo una copia; conflictos y render se calculan al pedir GET /progress/{job_id}/best)
+        publish_every = float(config.get('best_publish_interval', 10))
+        last_publish = [0.0]
         
         def on_progress_update(generation, fitness):
-            percent = int((generation / max_gens) * 100)
+            # Con presupuesto de tiempo, el avance es lo que esté más cerca de terminar: generaciones o reloj
+            percent = int(max(generation / max_gens, solver.stats.get("budget_used", 0.0)) * 100)
             jobs[job_id]["progress"] = percent
             jobs[job_id]["fitness"] = fitness
+            jobs[job_id]["eta_seconds"] = solver.stats.get("eta_seconds")
+            metrics.GA_GENERATIONS_PER_SECOND.set(solver.stats["generations_per_sec"])
+            metrics.GA_POOL_UTILIZATION.set(solver.stats["pool_utilization"])
+            metrics.GA_FITNESS_CACHE_HIT_RATIO.set(solver.stats.get("cache_hit_rate", 0.0))
             # print(f"Job {job_id}: {percent}% (Fit: {fitness})")
 
+            best = solver.best_individual
+            if best is not None:
+                # Desglose por restricción del mejor actual (contadores guardados al evaluarlo, sin segunda pasada)
+                jobs[job_id]["breakdown"] = solver.evaluator.breakdown(best).to_dict()
+            now = time.time()
+            if best is not None and now - last_publish[0] >= publish_every:
+                last_publish[0] = now
+                jobs[job_id]["best"] = {
+                    "horario": copy.deepcopy(best),
+                    "generation": generation,
+                    "published_at": now,
+                    "result": None
+                }
+
         def check_cancellation():
             return jobs[job_id]["status"] == "cancelled"
 
-        # 2. Ejecutar GA
-        ga = GeneticAlgorithm(cursos, profesores, aulas, grupos, clases, config)
+        # 2. Ejecutar el motor (query param > parámetro 'engine' de Configuracion > "ga")
+        # Modelo compilado reutilizado del caché si los datos no cambiaron
+        model = load_or_compile(cursos, profesores, aulas, grupos, clases, config, constraint_cache_path(config))
+        solver = create_solver(engine, cursos, profesores, aulas, grupos, clases, config, model=model)
+        jobs[job_id]["_view"] = (solver.evaluator, renderer)
+
+        # Checkpoints (solo el GA): si la instancia se recicla, POST /resume/{job_id} continúa desde el último
+        store = get_checkpoint_store()
+        if store is not None and getattr(solver, "SUPPORTS_CHECKPOINTS", False):
+            solver.checkpointer = Checkpointer(store, job_id, every=config.get('checkpoint_every', 10), meta={
+                "job_id": job_id,
+                "user": jobs[job_id]["user"],
+                "max_generations": max_gens,
+                # Presupuesto efectivo del job: al reanudar se descuenta el tiempo ya gastado (budget_elapsed)
+                "time_budget": float(config.get('time_budget') or 0) or None
+            })
         
-        # Llamamos a evolve pasando el callback
-        best_schedule = ga.evolve(on_progress=on_progress_update, should_cancel=check_cancellation)
+        # Llamamos a solve pasando el callback
+        if resume is not None:
+            checkpoint = decode_checkpoint(resume, clases)
+            best_schedule = solver.solve(on_progress=on_progress_update, should_cancel=check_cancellation, resume_from=checkpoint)
+        else:
+            best_schedule = solver.solve(on_progress=on_progress_update, should_cancel=check_cancellation)
         
+        if getattr(solver, "checkpointer", None):
+            solver.checkpointer.clear()
+
         if best_schedule is None:
+             # Cancelado: se entrega el mejor horario hasta el momento en lugar de nada
+             best_so_far = solver.best_individual
              print(f"🛑 [Job {job_id}] Detenido por solicitud del usuario.")
+             if best_so_far is not None:
+                 jobs[job_id]["result"] = _schedule_result(best_so_far, solver.evaluator, renderer, status_msg="Cancelado")
              return # Salimos de la función background
-             
-        conflicts = ga.get_conflicts(best_schedule)
-        
-        # 3. Procesar resultado
-        json_output = []
-        days = config['days']
-        slots = config['time_slots']
-        
-        def get_sort_key(s):
-            c_obj = next((c for c in clases if c.id == s.clase_id), None)
-            return (s.dia_idx, s.start_slot_idx, c_obj.grupo_id if c_obj else "")
-
-        sorted_sessions = sorted(best_schedule.sesiones, key=get_sort_key)
-
-        for s in sorted_sessions:
-            clase = next(c for c in clases if c.id == s.clase_id)
-            curso = next(c for c in cursos if c.id == clase.curso_id)
-            prof = next(p for p in profesores if p.id == s.profesor_id)
-            aula = next(a for a in aulas if a.id == s.aula_id)
-            grupo = next(g for g in grupos if g.id == clase.grupo_id)
-            
-            start_time = "ERROR"
-            end_time = "ERROR"
-            
-            if s.start_slot_idx < len(slots):
-                start_time = slots[s.start_slot_idx].split('-')[0]
-                end_slot_idx = s.start_slot_idx + s.num_slots - 1
-                if end_slot_idx < len(slots):
-                    end_time = slots[end_slot_idx].split('-')[1]
-                else:
-                    end_time = "OUT_OF_BOUNDS"
-            
-            session_data = SessionData(
-                dia=days[s.dia_idx],
-                hora_inicio=start_time,
-                hora_fin=end_time,
-                curso=curso.nombre,
-                grupo=grupo.id,
-                aula=aula.nombre,
-                profesor=prof.nombre,
-                tipo_aula=aula.tipo,
-                meta_dia_idx=s.dia_idx,
-                meta_slot_idx=s.start_slot_idx,
-                meta_num_slots=s.num_slots
-            )
-            json_output.append(session_data)
-            
-        status_msg = "Exito" if not conflicts else "Con Conflictos"
         
+        # 3. Procesar resultado (índices precalculados, directo a dicts de respuesta)
         # 4. Guardar resultado final en el estado del job
-        jobs[job_id]["status"] = "completed"
+        jobs[job_id]["result"] = _schedule_result(best_schedule, solver.evaluator, renderer)
+        if getattr(solver, "pareto_front", None):
+            # Modo pareto: horarios de compromiso entre turno e inicio temprano, con sus componentes
+            jobs[job_id]["result"]["pareto_front"] = [
+                dict(_schedule_result(horario, solver.evaluator, renderer),
+                     objectives=dict(zip(solver.evaluator.OBJECTIVES, objs)))
+                for horario, objs in solver.pareto_front
+            ]
         jobs[job_id]["progress"] = 100
-        jobs[job_id]["result"] = {
-            "status": status_msg,
-            "fitness": best_schedule.fitness,
-            "conflicts": conflicts,
-            "schedule": [item.model_dump() for item in json_output]
-        }
+        jobs[job_id]["status"] = "completed"
         print(f"✅ [Job {job_id}] Completado exitosamente.")
         
+    except InfeasibleInstanceError as e:
+        # Detectado por el pre-solve: no se gasta el presupuesto del GA
+        jobs[job_id]["status"] = "failed"
+        jobs[job_id]["error"] = str(e)
+        jobs[job_id]["infeasible_reasons"] = e.reasons
+        print(f"⛔ [Job {job_id}] Instancia infactible ({len(e.reasons)} causas)")
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -201,24 +297,15 @@ def run_ga_bg_task(job_id: str):
         jobs[job_id]["error"] = str(e)
         print(f"❌ [Job {job_id}] Falló: {e}")
     finally:
+        metrics.GA_GENERATIONS_PER_SECOND.set(0)
         # Liberar el semáforo SIEMPRE, pase lo que pase
         if active_job_id == job_id:
             print(f"🔓 Liberando semáforo del job {job_id}")
             active_job_id = None
 
-class JobResponse(BaseModel):
-    job_id: str
-    status: str
-
-@app.post("/generate", response_model=JobResponse, tags=["Algoritmo"])
-def start_genetic_algorithm(background_tasks: BackgroundTasks, current_user: str = Depends(get_current_user)):
-    """
-    Inicia la generación en segundo plano y devuelve un Job ID.
-    Usa GET /progress/{job_id} para ver el estado.
-    """
+def _ensure_server_free():
+    """Semáforo: un solo job del algoritmo a la vez por instancia."""
     global active_job_id
-    
-    # 1. Check Semáforo
     if active_job_id is not None:
         # Verificar si el job activo realmente existe y está corriendo
         current_job = jobs.get(active_job_id)
@@ -232,6 +319,28 @@ def start_genetic_algorithm(background_tasks: BackgroundTasks, current_user: str
             print("⚠️ Semáforo inconsistente detectado. Reseteando.")
             active_job_id = None
 
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+
+@app.post("/generate", response_model=JobResponse, tags=["Algoritmo"])
+def start_genetic_algorithm(background_tasks: BackgroundTasks, engine: Optional[str] = None, time_budget: Optional[float] = None, current_user: str = Depends(get_current_user)):
+    """
+    Inicia la generación en segundo plano y devuelve un Job ID.
+    engine: "ga" (default), "cpsat", "hybrid", "race", "decomposed" o "pareto".
+    time_budget: segundos de reloj como máximo (el GA adapta la población a ese plazo).
+    Usa GET /progress/{job_id} para ver el estado.
+    """
+    global active_job_id
+
+    if engine is not None and engine.strip().lower() not in ENGINES:
+        raise HTTPException(status_code=400, detail=f"Motor desconocido: '{engine}'. Opciones: {', '.join(ENGINES)}")
+    if time_budget is not None and time_budget <= 0:
+        raise HTTPException(status_code=400, detail="time_budget debe ser mayor que 0 segundos")
+    
+    # 1. Check Semáforo
+    _ensure_server_free()
+
     job_id = str(uuid.uuid4())
     
     # Toma el semáforo
@@ -243,11 +352,14 @@ def start_genetic_algorithm(background_tasks: BackgroundTasks, current_user: str
         "progress": 0,
         "fitness": 0.0,
         "result": None,
-        "user": current_user
+        "user": current_user,
+        "engine": engine,
+        "time_budget": time_budget,
+        "started_at": None
     }
     
     # Encolar tarea en segundo plano
-    background_tasks.add_task(run_ga_bg_task, job_id)
+    background_tasks.add_task(run_ga_bg_task, job_id, engine, None, time_budget)
     
     return {"job_id": job_id, "status": "started"}
 
@@ -257,18 +369,99 @@ def get_job_progress(job_id: str, current_user: str = Depends(get_current_user))
     Devuelve el progreso del algoritmo.
     """
     if job_id not in jobs:
-        raise HTTPException(status_code=404, detail="Job no encontrado")
+        # La instancia pudo reciclarse: si hay checkpoint, el job es reanudable
+        store = get_checkpoint_store()
+        blob = store.load(job_id) if store is not None else None
+        if blob is None:
+            raise HTTPException(status_code=404, detail="Job no encontrado")
+        header = read_header(blob)
+        max_gens = header["meta"].get("max_generations") or 1
+        return {
+            "job_id": job_id,
+            "status": "interrupted",
+            "progress": int(header["generation"] / max_gens * 100),
+            # La población del checkpoint aún no está evaluada (fitness 0.0 por defecto): vale el del mejor guardado
+            "fitness": header["fitness"][-1] if header["has_best"] else None,
+            "result": None,
+            "error": "La ejecución se interrumpió; use POST /resume/{job_id} para continuar desde el último checkpoint",
+            "infeasible_reasons": None
+        }
         
     job = jobs[job_id]
     
+    best = job.get("best")
+    
     return {
         "job_id": job_id,
         "status": job["status"],
         "progress": job.get("progress", 0),
         "fitness": job.get("fitness", 0),
-        "result": job.get("result"), # Será null mientras corre, y tendrá el horario al final
-        "error": job.get("error")
+        "eta_seconds": job.get("eta_seconds"), # Estimado con la tasa de generaciones medida
+        "breakdown": job.get("breakdown"), # Conteo y penalidad por restricción del mejor actual
+        "result": job.get("result"), # Será null mientras corre, y tendrá el horario al final (o el mejor hasta la cancelación)
+        "best": {  # Mejor horario publicado mientras corre; el detalle en /progress/{job_id}/best
+            "fitness": best["horario"].fitness,
+            "generation": best["generation"],
+            "published_at": best["published_at"]
+        } if best else None,
+        "error": job.get("error"),
+        "infeasible_reasons": job.get("infeasible_reasons")
+    }
+
+@app.get("/progress/{job_id}/best", tags=["Algoritmo"])
+def get_job_best(job_id: str, current_user: str = Depends(get_current_user)):
+    """
+    Mejor horario hasta el momento de un job en ejecución (publicado cada
+    'best_publish_interval' segundos). Los conflictos se calculan al pedirlo.
+    """
+    if job_id not in jobs:
+        raise HTTPException(status_code=404, detail="Job no encontrado")
+    job = jobs[job_id]
+    best = job.get("best")
+    if best is None:
+        raise HTTPException(status_code=404, detail="Aún no hay un horario publicado para este job")
+
+    if best["result"] is None:
+        evaluator, renderer = job["_view"]
+        best["result"] = _schedule_result(best["horario"], evaluator, renderer)
+    return dict(best["result"], generation=best["generation"], published_at=best["published_at"])
+
+@app.post("/resume/{job_id}", response_model=JobResponse, tags=["Algoritmo"])
+def resume_job(job_id: str, background_tasks: BackgroundTasks, current_user: str = Depends(get_current_user)):
+    """
+    Reanuda un job del GA interrumpido (instancia reciclada, fallo) desde su último checkpoint,
+    con la misma población, generación y estado del generador aleatorio.
+    """
+    global active_job_id
+
+    job = jobs.get(job_id)
+    if job and job["status"] in ("running", "completed"):
+        raise HTTPException(status_code=409, detail=f"El job ya está en estado '{job['status']}'")
+
+    store = get_checkpoint_store()
+    blob = store.load(job_id) if store is not None else None
+    if blob is None:
+        raise HTTPException(status_code=404, detail="No hay checkpoint para este job")
+    header = read_header(blob)
+    # Mismo presupuesto que la corrida original; el GA descuenta lo ya gastado según el checkpoint
+    time_budget = header["meta"].get("time_budget")
+
+    _ensure_server_free()
+    active_job_id = job_id
+    jobs[job_id] = {
+        "status": "running",
+        "progress": 0,
+        "fitness": 0.0,
+        "result": None,
+        "user": current_user,
+        "engine": "ga",
+        "time_budget": time_budget,
+        "resumed_from": header["generation"],
+        "started_at": None
     }
+    background_tasks.add_task(run_ga_bg_task, job_id, "ga", blob, time_budget)
+
+    return {"job_id": job_id, "status": "resumed"}
 
 @app.post("/cancel/{job_id}", tags=["Algoritmo"])
 def cancel_job(job_id: str, current_user: str = Depends(get_current_user)):
@@ -282,13 +475,14 @@ def cancel_job(job_id: str, current_user: str = Depends(get_current_user)):
         return {"status": "job_already_finished"}
         
     jobs[job_id]["status"] = "cancelled"
+    # El motor se detiene en su próximo chequeo y deja el mejor horario hasta el momento en /progress
     return {"status": "cancelled"}
 
 class SaveRequest(BaseModel):
     schedule: List[SessionData]
 
 @app.post("/save", tags=["Persistencia"])
-def save_schedule(payload: SaveRequest, current_user: str = Depends(get_current_user)):
+async def save_schedule(payload: SaveRequest, current_user: str = Depends(get_current_user)):
     """
     Guarda el horario validado en Google Sheets (Hoja 'Resultados').
     """
@@ -299,22 +493,27 @@ def save_schedule(payload: SaveRequest, current_user: str = Depends(get_current_
     
     try:
         # Import lazy para evitar dependencia circular si estuviera arriba (aunque aquí no hay)
-        from src.data_loader import save_schedule_to_sheet, load_data
+        from src.data_loader import save_schedule_to_sheet, get_clases_count, ResultsConflictError
         
         # Validación de Integridad: Verificar que estamos guardando un horario COMPLETO
-        # Cargamos la definición actual de clases para comparar contadores
-        _, _, _, _, expected_clases = load_data(SPREADSHEET_NAME, CREDENTIALS_FILE)
+        # Usamos el conteo de clases cacheado (o solo la columna de IDs) en vez de recargar todo
+        expected_count = await run_sheets(get_clases_count, SPREADSHEET_NAME, CREDENTIALS_FILE)
         
-        if len(data_to_save) != len(expected_clases):
+        if len(data_to_save) != expected_count:
             raise HTTPException(
                 status_code=400, 
-                detail=f"Error de Integridad: Intentando guardar {len(data_to_save)} sesiones, pero se esperan {len(expected_clases)}. El horario está incompleto."
+                detail=f"Error de Integridad: Intentando guardar {len(data_to_save)} sesiones, pero se esperan {expected_count}. El horario está incompleto."
             )
 
-        save_schedule_to_sheet(data_to_save, SPREADSHEET_NAME, CREDENTIALS_FILE)
+        write = await run_sheets(save_schedule_to_sheet, data_to_save, SPREADSHEET_NAME, CREDENTIALS_FILE)
         
-        return {"status": "Guardado exitosamente", "records": len(data_to_save)}
+        return {"status": "Guardado exitosamente", "records": len(data_to_save), "changed_rows": write["changed_rows"]}
         
+    except HTTPException:
+        raise
+    except ResultsConflictError as e:
+        # Otra instancia o una edición manual escribió mientras guardábamos: el cliente reintenta
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -326,7 +525,7 @@ class ScheduleStateResponse(BaseModel):
     schedule: List[SessionData]
 
 @app.get("/schedule/latest", response_model=ScheduleStateResponse, tags=["Persistencia"])
-def get_latest_schedule(current_user: str = Depends(get_current_user)):
+async def get_latest_schedule(current_user: str = Depends(get_current_user)):
     """
     Consulta si existe un horario previamente guardado en Sheets.
     Útil para recuperar el estado al recargar la página.
@@ -334,7 +533,7 @@ def get_latest_schedule(current_user: str = Depends(get_current_user)):
     try:
         from src.data_loader import get_saved_schedule
         
-        saved_data = get_saved_schedule(SPREADSHEET_NAME, CREDENTIALS_FILE)
+        saved_data = await run_sheets(get_saved_schedule, SPREADSHEET_NAME, CREDENTIALS_FILE)
         
         return {
             "exists": len(saved_data) > 0,
@@ -350,5 +549,107 @@ def get_latest_schedule(current_user: str = Depends(get_current_user)):
             "schedule": []
         }
 
+class RescheduleRequest(BaseModel):
+    # Horario de partida; si se omite se usa el guardado en la hoja 'Resultados'
+    schedule: Optional[List[SessionData]] = None
+    # IDs de profesores, aulas o clases cuyo cambio no se deduce de los datos (p. ej. un aula en mantenimiento)
+    changed: List[str] = []
+
+class RescheduleResponse(ScheduleResponse):
+    changes: List[Dict] = []        # Sesiones movidas: clase, motivo, antes y después
+    pinned: int = 0
+    reoptimized: int = 0
+    unmatched: List[Dict] = []      # Filas guardadas sin clase en los datos actuales
+
+@app.post("/reschedule", response_model=RescheduleResponse, tags=["Algoritmo"])
+async def reschedule(payload: RescheduleRequest, current_user: str = Depends(get_current_user)):
+    """
+    Re-programación incremental tras un cambio pequeño en los datos maestros
+    (profesor que deja de estar disponible, aula que se retira, clase nueva...).
+    Fija las sesiones no afectadas y re-optimiza solo las afectadas y su vecindario,
+    devolviendo el horario completo y la lista de sesiones que cambiaron.
+    Corre el GA, así que ocupa el mismo semáforo que /generate (503 si hay otro job).
+    """
+    global active_job_id
+    from fastapi.concurrency import run_in_threadpool
+    from src.data_loader import get_saved_schedule
+    from src.model import Horario
+    from src.rescheduling import Rescheduler
+
+    # Sin await entre el chequeo y la toma: nadie más puede tomar el semáforo en el medio
+    _ensure_server_free()
+    job_id = f"reschedule-{uuid.uuid4()}"
+    active_job_id = job_id
+    jobs[job_id] = {
+        "status": "running",
+        "progress": 0,
+        "fitness": 0.0,
+        "result": None,
+        "user": current_user,
+        "engine": "reschedule",
+        "started_at": time.time()
+    }
+
+    try:
+        config = await run_sheets(load_config, SPREADSHEET_NAME, CREDENTIALS_FILE)
+        cursos, profesores, aulas, grupos, clases = await run_sheets(load_data, SPREADSHEET_NAME, CREDENTIALS_FILE)
+        if payload.schedule is not None:
+            saved = [item.model_dump() for item in payload.schedule]
+        else:
+            saved = await run_sheets(get_saved_schedule, SPREADSHEET_NAME, CREDENTIALS_FILE)
+        if not saved:
+            raise HTTPException(status_code=404, detail="No hay horario guardado para re-programar. Use /generate.")
+
+        print(f"♻️ Usuario {current_user} re-programando ({len(saved)} sesiones guardadas)...")
+        model = await run_in_threadpool(load_or_compile, cursos, profesores, aulas, grupos, clases, config, constraint_cache_path(config))
+        rescheduler = Rescheduler(cursos, profesores, aulas, grupos, clases, config, model=model)
+        # CPU: fuera del event loop
+        result = await run_in_threadpool(rescheduler.run, saved, payload.changed)
+
+        best = result.horario
+        conflict_report = rescheduler.evaluator.find_conflicts(best)
+        conflicts = conflict_report.messages()
+        renderer = ScheduleRenderer(cursos, profesores, aulas, grupos, clases, config)
+        json_output = renderer.render(best)
+
+        # Antes (fila guardada) / después en el mismo formato que 'schedule'
+        moved = set(result.moved_ids)
+        changes = [
+            {
+                "clase_id": sesion.clase_id,
+                "motivo": result.reasons.get(sesion.clase_id, "vecindario de una clase afectada"),
+                "antes": result.saved_rows.get(sesion.clase_id),
+                "despues": renderer.render(Horario(sesiones=[sesion]))[0],
+            }
+            for sesion in best.sesiones if sesion.clase_id in moved
+        ]
+
+        return {
+            "status": "Exito" if not conflicts else "Con Conflictos",
+            "fitness": best.fitness,
+            "conflicts": conflicts,
+            "conflict_details": conflict_report.to_dicts(),
+            "breakdown": rescheduler.evaluator.breakdown(best).to_dict(),
+            "schedule": json_output,
+            "changes": changes,
+            "pinned": len(best.sesiones) - len(result.free_ids),
+            "reoptimized": len(result.free_ids),
+            "unmatched": result.unmatched_rows,
+        }
+    except HTTPException:
+        raise
+    except InfeasibleInstanceError as e:
+        raise HTTPException(status_code=422, detail={"error": str(e), "infeasible_reasons": e.reasons})
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Fallo en re-programación: {str(e)}")
+    finally:
+        # La respuesta lleva el resultado: el registro del job solo sirve de semáforo
+        jobs.pop(job_id, None)
+        if active_job_id == job_id:
+            active_job_id = None
+
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run("src.api:app", host="127.0.0.1", port=8000, reload=True)
\ No newline at end of file
@@ -1,55 +1,159 @@
 import os
 import json
-import firebase_admin
-from firebase_admin import auth, credentials
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from .metrics import AUTH_VERIFY_LATENCY
 
 security = HTTPBearer()
 
+# firebase_admin (y sus dependencias de Firestore/Storage/grpc) se importa de
+# forma diferida: el arranque en frío de Cloud Run no debe pagar ese costo
+# antes de poder responder el health check en '/'.
+_firebase_lock = threading.Lock()
+_firebase_ready = False
+
 def init_firebase():
     """
     Inicializa Firebase usando la misma credencial maestra que usamos para Sheets.
     Esto evita errores de permisos en Cloud Run.
+    Es idempotente: se llama en el primer uso o desde el hook de arranque de la API.
     """
-    try:
-        # Evitar reinicializar si ya existe
-        if not firebase_admin._apps:
-            
-            # 1. Intentamos leer la variable que configuraste en Secret Manager
-            creds_json = os.environ.get('GCP_CREDENTIALS_JSON')
-            
-            if creds_json:
-                # Parseamos el JSON string a un diccionario
-                cred_dict = json.loads(creds_json)
-                cred = credentials.Certificate(cred_dict)
-                firebase_admin.initialize_app(cred)
-                print("✅ Firebase inicializado correctamente con GCP_CREDENTIALS_JSON")
-            else:
-                # Fallback solo para desarrollo local si no hay variable
-                print("⚠️ No se encontró GCP_CREDENTIALS_JSON. Intentando ApplicationDefault...")
-                cred = credentials.ApplicationDefault()
-                firebase_admin.initialize_app(cred)
+    global _firebase_ready
+    if _firebase_ready:
+        return
+    with _firebase_lock:
+        if _firebase_ready:
+            return
+        try:
+            import firebase_admin
+            from firebase_admin import credentials
+
+            # Evitar reinicializar si ya existe
+            if not firebase_admin._apps:
                 
-    except Exception as e:
-        # Imprimimos el error pero NO detenemos la app (evita el crash del contenedor)
-        # Si falla, la API arrancará pero los endpoints protegidos darán error 500.
-        print(f"❌ ERROR CRÍTICO al iniciar Firebase: {str(e)}")
+                # 1. Intentamos leer la variable que configuraste en Secret Manager
+                creds_json = os.environ.get('GCP_CREDENTIALS_JSON')
+                
+                if creds_json:
+                    # Parseamos el JSON string a un diccionario
+                    cred_dict = json.loads(creds_json)
+                    cred = credentials.Certificate(cred_dict)
+                    firebase_admin.initialize_app(cred)
+                    print("✅ Firebase inicializado correctamente con GCP_CREDENTIALS_JSON")
+                else:
+                    # Fallback solo para desarrollo local si no hay variable
+                    print("⚠️ No se encontró GCP_CREDENTIALS_JSON. Intentando ApplicationDefault...")
+                    cred = credentials.ApplicationDefault()
+                    firebase_admin.initialize_app(cred)
+            _firebase_ready = True
+                    
+        except Exception as e:
+            # Imprimimos el error pero NO detenemos la app (evita el crash del contenedor)
+            # Si falla, la API arrancará pero los endpoints protegidos darán error 401.
+            print(f"❌ ERROR CRÍTICO al iniciar Firebase: {str(e)}")
+
+# --- Caché de tokens verificados ---
+# El frontend consulta /progress cada 1-2 segundos con el mismo ID token.
+# Guardamos el resultado de la verificación (clave: hash del token) para no
+# repetir la validación criptográfica ni la descarga de llaves en cada poll.
+TOKEN_CACHE_MAX_SIZE = int(os.environ.get('AUTH_TOKEN_CACHE_SIZE', '1024'))
+TOKEN_CACHE_MAX_TTL = float(os.environ.get('AUTH_TOKEN_CACHE_TTL', '300'))
+
+# Revocación: si AUTH_CHECK_REVOKED=1 se consulta a Firebase si el token fue
+# revocado, y el caché se re-valida como máximo cada AUTH_REVOCATION_TTL segundos.
+CHECK_REVOKED = os.environ.get('AUTH_CHECK_REVOKED', '0').lower() in ('1', 'true', 'yes')
+REVOCATION_TTL = float(os.environ.get('AUTH_REVOCATION_TTL', '60'))
+
+class VerifiedTokenCache:
+    """Caché LRU de tokens verificados con TTL acotado por el 'exp' del token."""
+
+    def __init__(self, max_size: int = TOKEN_CACHE_MAX_SIZE, max_ttl: float = TOKEN_CACHE_MAX_TTL):
+        self.max_size = max_size
+        self.max_ttl = max_ttl
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(token: str) -> str:
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
 
-# Ejecutamos la inicialización al importar el archivo
-init_firebase()
+    def get(self, token: str) -> Optional[str]:
+        key = self.key_for(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            uid, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return uid
 
-def get_current_user(creds: HTTPAuthorizationCredentials = Depends(security)):
+    def put(self, token: str, decoded_token: dict):
+        now = time.time()
+        ttl = self.max_ttl
+        if CHECK_REVOKED:
+            ttl = min(ttl, REVOCATION_TTL)
+        expires_at = min(float(decoded_token.get('exp', now)), now + ttl)
+        if expires_at <= now or self.max_size <= 0:
+            return
+        key = self.key_for(token)
+        with self._lock:
+            self._entries[key] = (decoded_token['uid'], expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, uid: str):
+        """Elimina del caché todos los tokens de un usuario (ej. tras revocarlo)."""
+        with self._lock:
+            for key in [k for k, (u, _) in self._entries.items() if u == uid]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+token_cache = VerifiedTokenCache()
+
+def _verify_token(token: str) -> dict:
+    """Verificación completa (bloqueante) contra Firebase."""
+    init_firebase()
+    from firebase_admin import auth
+
+    start = time.perf_counter()
+    try:
+        decoded_token = auth.verify_id_token(token, check_revoked=CHECK_REVOKED)
+    except Exception:
+        AUTH_VERIFY_LATENCY.observe(time.perf_counter() - start, outcome="error")
+        raise
+    AUTH_VERIFY_LATENCY.observe(time.perf_counter() - start, outcome="ok")
+    return decoded_token
+
+async def get_current_user(creds: HTTPAuthorizationCredentials = Depends(security)):
     """Valida el token JWT enviado por el Frontend."""
     token = creds.credentials
-    try:
-        decoded_token = auth.verify_id_token(token)
-        uid = decoded_token['uid']
+    uid = token_cache.get(token)
+    if uid is not None:
+        AUTH_VERIFY_LATENCY.observe(0.0, outcome="cached")
         return uid
+    try:
+        # La verificación hace criptografía y puede descargar llaves públicas:
+        # la sacamos del event loop.
+        decoded_token = await run_in_threadpool(_verify_token, token)
+        token_cache.put(token, decoded_token)
+        return decoded_token['uid']
     except Exception as e:
         print(f"Error de auth: {e}") # Debug en logs
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token inválido o expirado",
             headers={"WWW-Authenticate": "Bearer"},
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,224 @@
+import json
+import os
+import struct
+import sys
+import zlib
+from array import array
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional
+from .model import Horario, Sesion, Clase
+
+# Formato binario compacto de un checkpoint del GA:
+#   MAGIC | zlib( uint32 largo_header | header JSON | estado RNG (uint32 x N) | genes (uint16 x 4 por sesión) )
+# Los genes van en el orden de las clases: (índice de profesor, índice de aula, día, slot de inicio).
+# Población de 100 x 300 clases ~ 240 KB sin comprimir, unos pocos KB comprimidos.
+MAGIC = b"HGACKPT1"
+
+@dataclass
+class GACheckpoint:
+    generation: int                     # Generación que se evaluará al reanudar
+    fingerprint: str                    # Huella de los datos: no se reanuda si cambiaron
+    population: List[Horario]
+    best: Optional[Horario] = None
+    rng_state: Optional[tuple] = None   # random.getstate()
+    meta: Dict = field(default_factory=dict)
+
+def _to_le(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def _from_le(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+def encode_checkpoint(ckpt: GACheckpoint, clases: List[Clase]) -> bytes:
+    individuals = list(ckpt.population) + ([ckpt.best] if ckpt.best is not None else [])
+    prof_ids = sorted({s.profesor_id for ind in individuals for s in ind.sesiones})
+    room_ids = sorted({s.aula_id for ind in individuals for s in ind.sesiones})
+    prof_idx = {p: i for i, p in enumerate(prof_ids)}
+    room_idx = {a: i for i, a in enumerate(room_ids)}
+    clase_idx = {c.id: i for i, c in enumerate(clases)}
+
+    genes = array("H", bytes(2 * 4 * len(clases) * len(individuals)))
+    for k, ind in enumerate(individuals):
+        base = k * len(clases)
+        for s in ind.sesiones:
+            j = 4 * (base + clase_idx[s.clase_id])
+            genes[j:j + 4] = array("H", (prof_idx[s.profesor_id], room_idx[s.aula_id], s.dia_idx, s.start_slot_idx))
+
+    rng = array("I", ckpt.rng_state[1]) if ckpt.rng_state else array("I")
+    header = json.dumps({
+        "generation": ckpt.generation,
+        "fingerprint": ckpt.fingerprint,
+        "num_clases": len(clases),
+        "population": len(ckpt.population),
+        "has_best": ckpt.best is not None,
+        "fitness": [ind.fitness for ind in individuals],
+        "profs": prof_ids,
+        "rooms": room_ids,
+        "rng_version": ckpt.rng_state[0] if ckpt.rng_state else None,
+        "rng_gauss": ckpt.rng_state[2] if ckpt.rng_state else None,
+        "rng_len": len(rng),
+        "meta": ckpt.meta,
+    }, ensure_ascii=False).encode("utf-8")
+
+    payload = struct.pack("<I", len(header)) + header + _to_le(rng) + _to_le(genes)
+    return MAGIC + zlib.compress(payload, 6)
+
+def read_header(blob: bytes) -> dict:
+    """Solo el header (generación, meta del job...), sin reconstruir la población."""
+    if not blob.startswith(MAGIC):
+        raise ValueError("Checkpoint inválido o de otra versión")
+    payload = zlib.decompress(blob[len(MAGIC):])
+    (header_len,) = struct.unpack_from("<I", payload)
+    return json.loads(payload[4:4 + header_len].decode("utf-8"))
+
+def decode_checkpoint(blob: bytes, clases: List[Clase]) -> GACheckpoint:
+    if not blob.startswith(MAGIC):
+        raise ValueError("Checkpoint inválido o de otra versión")
+    payload = zlib.decompress(blob[len(MAGIC):])
+    (header_len,) = struct.unpack_from("<I", payload)
+    offset = 4 + header_len
+    header = json.loads(payload[4:offset].decode("utf-8"))
+    if header["num_clases"] != len(clases):
+        raise ValueError(f"El checkpoint tiene {header['num_clases']} clases y los datos actuales {len(clases)}")
+
+    rng_end = offset + 4 * header["rng_len"]
+    rng = _from_le("I", payload[offset:rng_end])
+    genes = _from_le("H", payload[rng_end:])
+
+    profs, rooms = header["profs"], header["rooms"]
+    individuals = []
+    for k, fitness in enumerate(header["fitness"]):
+        base = 4 * k * len(clases)
+        sesiones = []
+        for i, clase in enumerate(clases):
+            p, a, d, s = genes[base + 4 * i:base + 4 * i + 4]
+            sesiones.append(Sesion(clase.id, profs[p], rooms[a], d, s, clase.duracion_bloques))
+        ind = Horario(sesiones=sesiones)
+        ind.fitness = fitness
+        individuals.append(ind)
+
+    rng_state = (header["rng_version"], tuple(rng), header["rng_gauss"]) if header["rng_version"] is not None else None
+    best = individuals.pop() if header["has_best"] else None
+    return GACheckpoint(
+        generation=header["generation"],
+        fingerprint=header["fingerprint"],
+        population=individuals,
+        best=best,
+        rng_state=rng_state,
+        meta=header["meta"],
+    )
+
+# --- Almacenamiento ---
+
+class LocalCheckpointStore:
+    """Un archivo por job en un directorio local (escritura atómica)."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.ckpt")
+
+    def save(self, key: str, data: bytes):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = self._path(key) + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._path(key))
+
+    def load(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+class GCSCheckpointStore:
+    """
+    Bucket de Cloud Storage (gs://bucket/prefijo): sobrevive al reciclaje de la
+    instancia de Cloud Run, a diferencia del disco local (que vive en memoria).
+    """
+
+    def __init__(self, url: str):
+        bucket, _, prefix = url[len("gs://"):].partition("/")
+        self.bucket_name = bucket
+        self.prefix = prefix.strip("/")
+        self._bucket = None
+
+    def _blob(self, key: str):
+        if self._bucket is None:
+            from google.cloud import storage
+            self._bucket = storage.Client().bucket(self.bucket_name)
+        name = f"{self.prefix}/{key}.ckpt" if self.prefix else f"{key}.ckpt"
+        return self._bucket.blob(name)
+
+    def save(self, key: str, data: bytes):
+        self._blob(key).upload_from_string(data, content_type="application/octet-stream")
+
+    def load(self, key: str) -> Optional[bytes]:
+        from google.api_core.exceptions import NotFound
+        try:
+            return self._blob(key).download_as_bytes()
+        except NotFound:
+            return None
+
+    def delete(self, key: str):
+        from google.api_core.exceptions import NotFound
+        try:
+            self._blob(key).delete()
+        except NotFound:
+            pass
+
+_store = None
+
+def get_checkpoint_store():
+    """
+    Store según CHECKPOINT_STORE: 'gs://bucket/prefijo', un directorio local
+    (default 'checkpoints') o 'off' para desactivar los checkpoints.
+    """
+    global _store
+    if _store is None:
+        target = os.environ.get('CHECKPOINT_STORE', 'checkpoints').strip()
+        if target.lower() in ('', 'off', '0', 'false', 'no'):
+            return None
+        _store = GCSCheckpointStore(target) if target.startswith("gs://") else LocalCheckpointStore(target)
+    return _store
+
+class Checkpointer:
+    """Guarda el estado del GA cada `every` generaciones bajo la clave del job."""
+
+    def __init__(self, store, key: str, every: int = 10, meta: Optional[Dict] = None):
+        self.store = store
+        self.key = key
+        self.every = max(1, int(every))
+        self.meta = meta or {}
+
+    def due(self, generation: int) -> bool:
+        return generation > 0 and generation % self.every == 0
+
+    def save(self, ckpt: GACheckpoint, clases: List[Clase]):
+        ckpt.meta = dict(self.meta, **ckpt.meta)
+        try:
+            self.store.save(self.key, encode_checkpoint(ckpt, clases))
+        except Exception as e:
+            # Un checkpoint fallido no debe tumbar la corrida
+            print(f"⚠️ No se pudo guardar el checkpoint de {self.key}: {e}")
+
+    def clear(self):
+        try:
+            self.store.delete(self.key)
+        except Exception as e:
+            print(f"⚠️ No se pudo borrar el checkpoint de {self.key}: {e}")
@@ -0,0 +1,240 @@
+from dataclasses import dataclass, field, asdict
+from collections import defaultdict
+from typing import List, Dict, Set, Tuple, Optional, Callable, Iterator
+from .model import Horario
+
+# Tipos de conflicto (mismos prefijos que los mensajes históricos de get_conflicts)
+BREAK = "BREAK"
+BOUNDS = "BOUNDS"
+CAPACITY = "CAPACITY"
+PROF = "PROF"
+ROOM = "ROOM"
+GROUP = "GROUP"
+MAX_HOURS = "MAX HOURS"
+AVAILABILITY = "AVAILABILITY"
+
+@dataclass
+class Conflict:
+    """
+    Registro estructurado de un conflicto.
+    sessions son índices dentro de Horario.sesiones; slot_end es inclusivo.
+    """
+    tipo: str
+    resources: Tuple[str, ...]
+    sessions: Tuple[int, ...]
+    dia_idx: Optional[int] = None
+    slot_start: Optional[int] = None
+    slot_end: Optional[int] = None
+    detail: Dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["resources"] = list(self.resources)
+        data["sessions"] = list(self.sessions)
+        return data
+
+def _sweep(intervals: List[Tuple[int, int, int]], conflicting: Optional[Callable[[List[int]], List[int]]] = None) -> Iterator[Tuple[Tuple[int, ...], int, int]]:
+    """
+    Barrido ordenado sobre intervalos (inicio, fin_exclusivo, idx_sesion) de un mismo recurso y día.
+    Emite (sesiones, inicio, fin_exclusivo) por cada tramo maximal en que el conjunto de
+    sesiones en conflicto no cambia, así k sesiones apiladas generan un solo registro.
+    conflicting filtra las sesiones activas que realmente chocan (por defecto: todas si hay 2+).
+    """
+    events = []
+    for start, end, idx in intervals:
+        events.append((start, 1, idx))
+        events.append((end, 0, idx))
+    events.sort()
+
+    active: Set[int] = set()
+    current: Tuple[int, ...] = ()
+    current_start = 0
+    i = 0
+    while i < len(events):
+        point = events[i][0]
+        # Aplicar todos los eventos en este punto (salidas antes que entradas)
+        while i < len(events) and events[i][0] == point:
+            _, is_start, idx = events[i]
+            if is_start:
+                active.add(idx)
+            else:
+                active.discard(idx)
+            i += 1
+
+        if len(active) < 2:
+            clashing: Tuple[int, ...] = ()
+        elif conflicting is None:
+            clashing = tuple(sorted(active))
+        else:
+            clashing = tuple(sorted(conflicting(sorted(active))))
+
+        if clashing != current:
+            if current:
+                yield current, current_start, point
+            current = clashing
+            current_start = point
+
+class ConflictReport:
+    """
+    Resultado del motor de conflictos. Los mensajes de texto se generan solo
+    cuando se piden (messages()), a partir de los registros estructurados.
+    """
+
+    def __init__(self, records: List[Conflict], individual: Horario, evaluator):
+        self.records = records
+        self._individual = individual
+        self._evaluator = evaluator
+        self._messages: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __bool__(self) -> bool:
+        return bool(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def to_dicts(self) -> List[dict]:
+        sesiones = self._individual.sesiones
+        dicts = []
+        for c in self.records:
+            data = c.to_dict()
+            # Los índices solo valen para este Horario; el id de clase sirve fuera de él
+            data["clase_ids"] = [sesiones[i].clase_id for i in c.sessions]
+            dicts.append(data)
+        return dicts
+
+    def messages(self) -> List[str]:
+        if self._messages is None:
+            self._messages = [self._render(c) for c in self.records]
+        return self._messages
+
+    def _render(self, c: Conflict) -> str:
+        ev = self._evaluator
+        sesiones = self._individual.sesiones
+
+        def curso_of(idx: int) -> str:
+            clase = ev.clases_by_id[sesiones[idx].clase_id]
+            return ev.cursos[clase.curso_id].nombre
+
+        def courses() -> str:
+            names = [curso_of(idx) for idx in c.sessions]
+            return " and ".join(names) if len(names) <= 2 else ", ".join(names[:-1]) + f" and {names[-1]}"
+
+        def when() -> str:
+            if c.slot_start == c.slot_end:
+                return f"Day {c.dia_idx} Slot {c.slot_start}"
+            return f"Day {c.dia_idx} Slots {c.slot_start}-{c.slot_end}"
+
+        if c.tipo == BREAK:
+            return f"BREAK CONFLICT: {curso_of(c.sessions[0])} (Group {c.resources[0]}) overlaps with break at {when()}."
+        if c.tipo == BOUNDS:
+            return f"BOUNDS CONFLICT: {curso_of(c.sessions[0])} (Group {c.resources[0]}) goes out of time bounds."
+        if c.tipo == CAPACITY:
+            aula = ev.aulas[c.resources[0]]
+            grupo = ev.grupos[c.resources[1]]
+            return f"CAPACITY CONFLICT: {aula.nombre} ({aula.capacidad}) too small for {grupo.id} ({grupo.num_estudiantes})"
+        if c.tipo == PROF:
+            profesor = ev.profesores[c.resources[0]]
+            return f"PROF CONFLICT: {profesor.nombre} has {courses()} at {when()}"
+        if c.tipo == ROOM:
+            aula = ev.aulas[c.resources[0]]
+            return f"ROOM CONFLICT: {aula.nombre} has {courses()} at {when()}"
+        if c.tipo == GROUP:
+            label = "Group" if len(c.resources) == 1 else "Groups"
+            return f"GROUP CONFLICT: {label} {', '.join(c.resources)} overlap ({courses()}) at {when()}"
+        if c.tipo == AVAILABILITY:
+            profesor = ev.profesores[c.resources[0]]
+            return f"AVAILABILITY CONFLICT: {profesor.nombre} is not available for {curso_of(c.sessions[0])} at {when()}"
+        if c.tipo == MAX_HOURS:
+            profesor = ev.profesores[c.resources[0]]
+            return f"MAX HOURS CONFLICT: {profesor.nombre} assigned {c.detail['assigned']} slots, limit {c.detail['limit']}"
+        return f"{c.tipo} CONFLICT: {', '.join(c.resources)}"
+
+def find_conflicts(evaluator, individual: Horario) -> ConflictReport:
+    """
+    Detecta conflictos con barridos ordenados por recurso y día.
+    Cada tramo de solape genera un único registro con todas las sesiones involucradas
+    y el rango de slots (en lugar de un mensaje por par y por slot).
+    """
+    records: List[Conflict] = []
+    model = evaluator.model
+    total_slots = model.num_slots
+    group_ancestry: Dict[str, Set[str]] = evaluator.group_ancestry
+    group_root: Dict[str, str] = evaluator.group_root
+
+    sesiones = individual.sesiones
+    session_groups: List[str] = []
+    by_prof: Dict[Tuple[str, int], List[Tuple[int, int, int]]] = defaultdict(list)
+    by_room: Dict[Tuple[str, int], List[Tuple[int, int, int]]] = defaultdict(list)
+    # Solo grupos del mismo árbol (misma raíz) pueden estar relacionados
+    by_family: Dict[Tuple[str, int], List[Tuple[int, int, int]]] = defaultdict(list)
+    prof_hours: Dict[str, float] = defaultdict(float)
+
+    for idx, sesion in enumerate(sesiones):
+        clase = evaluator.clases_by_id[sesion.clase_id]
+        grupo = evaluator.grupos[clase.grupo_id]
+        aula = evaluator.aulas[sesion.aula_id]
+        session_groups.append(grupo.id)
+
+        start = sesion.start_slot_idx
+        end = start + sesion.num_slots
+
+        prof_hours[sesion.profesor_id] += sesion.num_slots
+
+        # Break (del primer al último slot de break cubierto por la sesión)
+        hits = [s for s in range(start, end) if model.is_break(s)]
+        if hits:
+            records.append(Conflict(BREAK, (grupo.id,), (idx,), sesion.dia_idx, hits[0], hits[-1]))
+
+        # Bounds
+        if end > total_slots:
+            records.append(Conflict(BOUNDS, (grupo.id,), (idx,), sesion.dia_idx, total_slots, end - 1))
+
+        # Capacity
+        if aula.capacidad < grupo.num_estudiantes:
+            records.append(Conflict(CAPACITY, (aula.id, grupo.id), (idx,)))
+
+        # Availability
+        if not model.prof_available(sesion.profesor_id, sesion.dia_idx, start, sesion.num_slots):
+            records.append(Conflict(AVAILABILITY, (sesion.profesor_id,), (idx,), sesion.dia_idx, start, end - 1))
+
+        interval = (start, end, idx)
+        by_prof[(sesion.profesor_id, sesion.dia_idx)].append(interval)
+        by_room[(sesion.aula_id, sesion.dia_idx)].append(interval)
+        by_family[(group_root.get(grupo.id, grupo.id), sesion.dia_idx)].append(interval)
+
+    for (prof_id, dia), intervals in by_prof.items():
+        if len(intervals) > 1:
+            for idxs, s0, s1 in _sweep(intervals):
+                records.append(Conflict(PROF, (prof_id,), idxs, dia, s0, s1 - 1))
+
+    for (aula_id, dia), intervals in by_room.items():
+        if len(intervals) > 1:
+            for idxs, s0, s1 in _sweep(intervals):
+                records.append(Conflict(ROOM, (aula_id,), idxs, dia, s0, s1 - 1))
+
+    def related_subset(active: List[int]) -> List[int]:
+        # Sesiones activas cuyo grupo choca con el de otra sesión activa (mismo grupo o ancestro/descendiente)
+        hit = set()
+        for pos, a in enumerate(active):
+            related = group_ancestry.get(session_groups[a], {session_groups[a]})
+            for b in active[pos + 1:]:
+                if session_groups[b] in related:
+                    hit.add(a)
+                    hit.add(b)
+        return list(hit)
+
+    for (_, dia), intervals in by_family.items():
+        if len(intervals) > 1:
+            for idxs, s0, s1 in _sweep(intervals, related_subset):
+                groups = tuple(sorted({session_groups[i] for i in idxs}))
+                records.append(Conflict(GROUP, groups, idxs, dia, s0, s1 - 1))
+
+    for prof_id, total in prof_hours.items():
+        max_h = evaluator.profesores[prof_id].max_horas_semana
+        if total > max_h:
+            records.append(Conflict(MAX_HOURS, (prof_id,), (), detail={"assigned": total, "limit": max_h}))
+
+    return ConflictReport(records, individual, evaluator)
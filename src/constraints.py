@@ -0,0 +1,256 @@
+import hashlib
+import json
+import os
+import unicodedata
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import List, Dict, Tuple, Optional
+from .model import Curso, Profesor, Aula, Grupo, Clase
+
+# Rangos de slots válidos por turno (inclusivos)
+TURN_RANGES: Dict[str, Tuple[int, int]] = {
+    "MAÑANA": (0, 7),
+    "TARDE": (7, 18),
+    "NOCHE": (13, 18),
+    "NOCHE_A": (13, 18),
+    "NOCHE_B": (13, 18)
+}
+
+@dataclass
+class ConstraintModel:
+    """
+    Índices de restricciones compilados una sola vez a partir de los datos maestros.
+    Lo comparten FitnessEvaluator, GeneticAlgorithm y los scripts de análisis,
+    y es serializable a JSON para poder cachearlo.
+    """
+    fingerprint: str
+    num_days: int
+    num_slots: int
+    break_slots: List[int]
+    break_mask: int                             # bit s = 1 si el slot s es break
+    slot_minutes: List[Tuple[int, int]]         # slot -> (inicio, fin) en minutos
+    turn_ranges: Dict[str, Tuple[int, int]]
+    group_ancestry: Dict[str, List[str]]        # grupo -> él mismo + ancestros + descendientes
+    group_root: Dict[str, str]                  # grupo -> raíz de su árbol
+    eligible_profs: Dict[str, List[str]]        # curso -> profesores habilitados
+    rooms_by_type: Dict[str, List[str]]         # tipo de aula -> aulas
+    room_type: Dict[str, str]                   # aula -> tipo
+    availability: Dict[str, List[int]]          # profesor -> máscara de slots disponibles por día (solo profesores con restricciones)
+
+    def __post_init__(self):
+        # Sets para consultas O(1) (no se serializan)
+        self.ancestry_sets = {g: frozenset(rel) for g, rel in self.group_ancestry.items()}
+        self.eligible_sets = {c: frozenset(p) for c, p in self.eligible_profs.items()}
+
+    def related(self, group_a: str, group_b: str) -> bool:
+        """True si los grupos comparten estudiantes (mismo grupo o ancestro/descendiente)."""
+        return group_b in self.ancestry_sets.get(group_a, (group_a,))
+
+    def is_break(self, slot: int) -> bool:
+        return bool(self.break_mask >> slot & 1)
+
+    def span_mask(self, start_slot: int, num_slots: int) -> int:
+        """Máscara de bits de los slots [start_slot, start_slot + num_slots)."""
+        return ((1 << num_slots) - 1) << start_slot
+
+    def hits_break(self, start_slot: int, num_slots: int) -> bool:
+        return bool(self.break_mask & self.span_mask(start_slot, num_slots))
+
+    def prof_available(self, prof_id: str, dia_idx: int, start_slot: int, num_slots: int) -> bool:
+        """True si el profesor está disponible en todos los slots de la sesión (un solo test de bits)."""
+        masks = self.availability.get(prof_id)
+        if masks is None:
+            return True
+        span = self.span_mask(start_slot, num_slots)
+        return dia_idx < len(masks) and masks[dia_idx] & span == span
+
+    def unavailable_slots(self, prof_id: str, dia_idx: int, start_slot: int, num_slots: int) -> int:
+        """Cantidad de slots de la sesión fuera de la disponibilidad del profesor."""
+        masks = self.availability.get(prof_id)
+        if masks is None:
+            return 0
+        span = self.span_mask(start_slot, num_slots)
+        day_mask = masks[dia_idx] if dia_idx < len(masks) else 0
+        return (span & ~day_mask).bit_count()
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ConstraintModel":
+        data = dict(data)
+        data["slot_minutes"] = [tuple(x) for x in data["slot_minutes"]]
+        data["turn_ranges"] = {k: tuple(v) for k, v in data["turn_ranges"].items()}
+        return cls(**data)
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> "ConstraintModel":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+def _parse_minutes(time_str: str) -> int:
+    try:
+        h, m = map(int, time_str.strip().split(':'))
+        return h * 60 + m
+    except ValueError:
+        return 0
+
+def _normalize_day(day: str) -> str:
+    # "Miércoles " / "miercoles" -> "miercoles"
+    decomposed = unicodedata.normalize('NFKD', str(day).strip().lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+def build_availability_masks(profesores: List[Profesor], days: List[str], slot_minutes: List[Tuple[int, int]]) -> Dict[str, List[int]]:
+    """
+    Convierte Profesor.disponibilidad ({"Lunes": ["08:00-12:30", ...]}) en una máscara de bits
+    por día: el bit s está encendido si el slot s cae completo dentro de algún rango.
+    Profesores sin disponibilidad declarada no tienen restricciones (no aparecen en el resultado);
+    si declaran alguno, los días no listados se consideran no disponibles.
+    """
+    day_index = {_normalize_day(d): i for i, d in enumerate(days)}
+    masks = {}
+    for p in profesores:
+        if not p.disponibilidad:
+            continue
+        day_masks = [0] * len(days)
+        for day_name, ranges in p.disponibilidad.items():
+            d_idx = day_index.get(_normalize_day(day_name))
+            if d_idx is None:
+                print(f"Advertencia: Día desconocido '{day_name}' en disponibilidad de {p.id}")
+                continue
+            if isinstance(ranges, str):
+                ranges = [ranges]
+            for r in ranges:
+                parts = str(r).split('-')
+                if len(parts) != 2:
+                    print(f"Advertencia: Rango inválido '{r}' en disponibilidad de {p.id}")
+                    continue
+                r_start, r_end = _parse_minutes(parts[0]), _parse_minutes(parts[1])
+                for s_idx, (s_start, s_end) in enumerate(slot_minutes):
+                    if r_start <= s_start and s_end <= r_end:
+                        day_masks[d_idx] |= 1 << s_idx
+        masks[p.id] = day_masks
+    return masks
+
+def build_group_ancestry(grupos: List[Grupo]) -> Dict[str, List[str]]:
+    """
+    Cierre de parentesco: cada grupo se relaciona consigo mismo, sus ancestros y todos
+    sus descendientes (ej. C1 choca con C1-A y C1-B, pero C1-A no choca con C1-B).
+    Padres inexistentes se ignoran.
+    """
+    g_map = {g.id: g for g in grupos}
+    children = {g_id: [] for g_id in g_map}
+    for g in grupos:
+        if g.parent_grupo_id in g_map:
+            children[g.parent_grupo_id].append(g.id)
+
+    related = {}
+    for g in grupos:
+        rel = {g.id}
+        parent_id = g.parent_grupo_id
+        while parent_id in g_map and parent_id not in rel:
+            rel.add(parent_id)
+            parent_id = g_map[parent_id].parent_grupo_id
+
+        queue = deque([g.id])
+        while queue:
+            for child_id in children[queue.popleft()]:
+                if child_id not in rel:
+                    rel.add(child_id)
+                    queue.append(child_id)
+        related[g.id] = sorted(rel)
+    return related
+
+def build_group_roots(grupos: List[Grupo]) -> Dict[str, str]:
+    """Raíz del árbol de cada grupo: solo grupos con la misma raíz pueden estar relacionados."""
+    g_map = {g.id: g for g in grupos}
+    roots = {}
+    for g in grupos:
+        current = g
+        seen = {g.id}
+        while current.parent_grupo_id in g_map and current.parent_grupo_id not in seen:
+            current = g_map[current.parent_grupo_id]
+            seen.add(current.id)
+        roots[g.id] = current.id
+    return roots
+
+def data_fingerprint(cursos: List[Curso], profesores: List[Profesor], aulas: List[Aula], grupos: List[Grupo], clases: List[Clase], config: dict) -> str:
+    """Hash estable de los datos de entrada, para validar un modelo cacheado."""
+    payload = json.dumps(
+        [[asdict(x) for x in items] for items in (cursos, profesores, aulas, grupos, clases)]
+        + [{k: config.get(k) for k in ('days', 'time_slots', 'break_slots')}],
+        sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def compile_constraints(cursos: List[Curso], profesores: List[Profesor], aulas: List[Aula], grupos: List[Grupo], clases: List[Clase], config: dict, fingerprint: Optional[str] = None) -> ConstraintModel:
+    time_slots = config.get('time_slots', [])
+    break_slots = [int(s) for s in config.get('break_slots', [6])]
+
+    break_mask = 0
+    for s in break_slots:
+        break_mask |= 1 << s
+
+    slot_minutes = []
+    for slot in time_slots:
+        parts = slot.split('-')
+        start = _parse_minutes(parts[0])
+        end = _parse_minutes(parts[1]) if len(parts) > 1 else start
+        slot_minutes.append((start, end))
+
+    rooms_by_type: Dict[str, List[str]] = {}
+    for a in aulas:
+        rooms_by_type.setdefault(a.tipo, []).append(a.id)
+
+    return ConstraintModel(
+        fingerprint=fingerprint or data_fingerprint(cursos, profesores, aulas, grupos, clases, config),
+        num_days=len(config.get('days', [])),
+        num_slots=len(time_slots),
+        break_slots=break_slots,
+        break_mask=break_mask,
+        slot_minutes=slot_minutes,
+        turn_ranges=dict(TURN_RANGES),
+        group_ancestry=build_group_ancestry(grupos),
+        group_root=build_group_roots(grupos),
+        eligible_profs={c.id: list(c.profesores_ids) for c in cursos},
+        rooms_by_type=rooms_by_type,
+        room_type={a.id: a.tipo for a in aulas},
+        availability=build_availability_masks(profesores, config.get('days', []), slot_minutes)
+    )
+
+def constraint_cache_path(config: dict) -> Optional[str]:
+    """
+    Ruta del caché del modelo compilado: parámetro 'constraint_cache' de 'Configuracion' >
+    variable CONSTRAINT_CACHE > 'cache/constraints.json'. 'off' desactiva el caché.
+    """
+    path = str(config.get('constraint_cache') or os.environ.get('CONSTRAINT_CACHE', 'cache/constraints.json')).strip()
+    if path.lower() in ('', 'off', '0', 'false', 'no'):
+        return None
+    return path
+
+def load_or_compile(cursos: List[Curso], profesores: List[Profesor], aulas: List[Aula], grupos: List[Grupo], clases: List[Clase], config: dict, cache_path: Optional[str] = None) -> ConstraintModel:
+    """
+    Devuelve el modelo cacheado en cache_path si corresponde a los mismos datos;
+    si no, lo compila y actualiza el caché.
+    """
+    fingerprint = data_fingerprint(cursos, profesores, aulas, grupos, clases, config)
+    if cache_path and os.path.exists(cache_path):
+        try:
+            cached = ConstraintModel.load(cache_path)
+            if cached.fingerprint == fingerprint:
+                return cached
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"⚠️ Caché de restricciones inválido ({cache_path}): {e}")
+
+    model = compile_constraints(cursos, profesores, aulas, grupos, clases, config, fingerprint)
+    if cache_path:
+        try:
+            os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+            model.save(cache_path)
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar el caché de restricciones: {e}")
+    return model
@@ -0,0 +1,237 @@
+import time
+import threading
+from collections import defaultdict
+from typing import List, Dict, Optional
+from .model import Curso, Profesor, Aula, Horario, Sesion, Grupo, Clase
+from .fitness import FitnessEvaluator
+from .conflicts import ConflictReport
+from .constraints import ConstraintModel, compile_constraints
+from .domains import build_domains
+from .presolve import InfeasibleInstanceError
+
+class CpSatSolver:
+    """
+    Motor exacto con OR-Tools CP-SAT (importado recién en solve(), no al cargar la API).
+    Mismo contrato que GeneticAlgorithm: solve(on_progress, should_cancel) -> Horario.
+
+    Modelo: una variable de inicio por clase sobre el índice global dia * num_slots + slot,
+    restringida a las colocaciones legales del dominio (sin break, dentro del día);
+    intervalos opcionales por (clase, profesor) y (clase, aula) con NoOverlap por recurso,
+    NoOverlap por cada cadena hoja -> raíz de grupos, máximo de horas lineal y
+    disponibilidad del profesor condicionada a su elección.
+    Con objective=True minimiza las penalidades blandas (turno + inicio temprano) de FitnessEvaluator.
+    """
+
+    def __init__(self, cursos: List[Curso], profesores: List[Profesor], aulas: List[Aula], grupos: List[Grupo], clases: List[Clase], config: dict, model: Optional[ConstraintModel] = None, objective: bool = True):
+        self.profesores = {p.id: p for p in profesores}
+        self.grupos = {g.id: g for g in grupos}
+        self.clases = clases
+        self.config = config
+        self.objective = objective
+        self.time_limit = float(config.get('cpsat_time_limit', 60))
+        if config.get('time_budget'):
+            self.time_limit = min(self.time_limit, float(config['time_budget']))
+        self.num_workers = int(config.get('cpsat_workers', 8))
+
+        self.model = model or compile_constraints(cursos, profesores, aulas, grupos, clases, config)
+        self.evaluator = FitnessEvaluator(cursos, profesores, aulas, grupos, clases, config, model=self.model)
+        self.domains = build_domains(self.model, profesores, aulas, grupos, clases)
+
+        self.stats = {"generation": 0, "generations_per_sec": 0.0, "pool_utilization": 0.0, "status": None, "wall_time": 0.0}
+        self.best_individual: Optional[Horario] = None
+
+    def _leaf_chains(self) -> List[List[str]]:
+        """Cadenas hoja -> raíz: dos grupos comparten estudiantes si y solo si están en una misma cadena."""
+        has_children = {g.parent_grupo_id for g in self.grupos.values() if g.parent_grupo_id in self.grupos}
+        chains = []
+        for g in self.grupos.values():
+            if g.id in has_children:
+                continue
+            chain = [g.id]
+            parent_id = g.parent_grupo_id
+            while parent_id in self.grupos and parent_id not in chain:
+                chain.append(parent_id)
+                parent_id = self.grupos[parent_id].parent_grupo_id
+            chains.append(chain)
+        return chains
+
+    def _build(self, cp_model):
+        cp = cp_model.CpModel()
+        num_slots = self.model.num_slots
+        horizon = self.model.num_days * num_slots
+
+        self._starts: Dict[str, object] = {}
+        self._prof_vars: Dict[str, Dict[str, object]] = {}
+        self._room_vars: Dict[str, Dict[str, object]] = {}
+        prof_intervals = defaultdict(list)
+        room_intervals = defaultdict(list)
+        prof_load = defaultdict(list)
+        group_intervals = defaultdict(list)
+        costs = []
+
+        for clase in self.clases:
+            domain = self.domains[clase.id]
+            n = domain.num_slots
+
+            # Only the legal tier: the domain fallback ignores breaks and availability
+            legal_by_prof = {}
+            for p in domain.profs:
+                legal = domain.legal_placements(p)
+                if legal:
+                    legal_by_prof[p] = sorted({d * num_slots + s for d, s in legal.pairs})
+            if not legal_by_prof:
+                raise InfeasibleInstanceError([f"Clase {clase.id}: no hay colocación legal para ningún profesor elegible"])
+            values = sorted({v for vals in legal_by_prof.values() for v in vals})
+
+            start = cp.new_int_var_from_domain(cp_model.Domain.from_values(values), f"start_{clase.id}")
+            self._starts[clase.id] = start
+            interval = cp.new_interval_var(start, n, start + n, f"iv_{clase.id}")
+            group_intervals[clase.grupo_id].append(interval)
+
+            x = {}
+            for p, vals in legal_by_prof.items():
+                x[p] = cp.new_bool_var(f"x_{clase.id}_{p}")
+                if len(vals) < len(values):
+                    cp.add_linear_expression_in_domain(start, cp_model.Domain.from_values(vals)).only_enforce_if(x[p])
+                prof_intervals[p].append(cp.new_optional_interval_var(start, n, start + n, x[p], f"ivp_{clase.id}_{p}"))
+                prof_load[p].append(n * x[p])
+            cp.add_exactly_one(x.values())
+            self._prof_vars[clase.id] = x
+
+            y = {}
+            for a in domain.rooms:
+                y[a] = cp.new_bool_var(f"y_{clase.id}_{a}")
+                room_intervals[a].append(cp.new_optional_interval_var(start, n, start + n, y[a], f"iva_{clase.id}_{a}"))
+            cp.add_exactly_one(y.values())
+            self._room_vars[clase.id] = y
+
+            if self.objective:
+                table = [0] * horizon
+                for v in values:
+                    table[v] = int(self.evaluator.soft_placement_penalty(clase.id, v % num_slots, n))
+                cost = cp.new_int_var(0, max(table), f"cost_{clase.id}")
+                cp.add_element(start, table, cost)
+                costs.append(cost)
+
+        for intervals in prof_intervals.values():
+            if len(intervals) > 1:
+                cp.add_no_overlap(intervals)
+        for intervals in room_intervals.values():
+            if len(intervals) > 1:
+                cp.add_no_overlap(intervals)
+        for chain in self._leaf_chains():
+            intervals = [iv for g in chain for iv in group_intervals.get(g, [])]
+            if len(intervals) > 1:
+                cp.add_no_overlap(intervals)
+        for p, load in prof_load.items():
+            if p in self.profesores:
+                cp.add(sum(load) <= self.profesores[p].max_horas_semana)
+
+        if costs:
+            cp.minimize(sum(costs))
+        return cp
+
+    def _add_hints(self, cp, seed: Horario):
+        """Usa un horario previo como punto de partida de la búsqueda."""
+        num_slots = self.model.num_slots
+        for sesion in seed.sesiones:
+            if sesion.clase_id not in self._starts:
+                continue
+            cp.add_hint(self._starts[sesion.clase_id], sesion.dia_idx * num_slots + sesion.start_slot_idx)
+            for p, var in self._prof_vars[sesion.clase_id].items():
+                cp.add_hint(var, p == sesion.profesor_id)
+            for a, var in self._room_vars[sesion.clase_id].items():
+                cp.add_hint(var, a == sesion.aula_id)
+
+    def _extract(self, value) -> Horario:
+        num_slots = self.model.num_slots
+        sesiones = []
+        for clase in self.clases:
+            t = value(self._starts[clase.id])
+            prof_id = next(p for p, var in self._prof_vars[clase.id].items() if value(var))
+            aula_id = next(a for a, var in self._room_vars[clase.id].items() if value(var))
+            sesiones.append(Sesion(
+                clase_id=clase.id,
+                profesor_id=prof_id,
+                aula_id=aula_id,
+                dia_idx=t // num_slots,
+                start_slot_idx=t % num_slots,
+                num_slots=clase.duracion_bloques
+            ))
+        horario = Horario(sesiones=sesiones)
+        horario.fitness = self.evaluator.evaluate(horario)
+        return horario
+
+    def solve(self, on_progress: callable = None, should_cancel: callable = None, seed_individuals: Optional[List[Horario]] = None) -> Optional[Horario]:
+        try:
+            from ortools.sat.python import cp_model
+        except ImportError:
+            raise RuntimeError("El motor 'cpsat' requiere OR-Tools: pip install ortools")
+
+        build_start = time.perf_counter()
+        cp = self._build(cp_model)
+        print(f"🧮 Modelo CP-SAT construido en {time.perf_counter() - build_start:.2f}s "
+              f"({len(self.clases)} clases, límite {self.time_limit:.0f}s, {self.num_workers} workers)")
+
+        if seed_individuals:
+            self._add_hints(cp, seed_individuals[0])
+
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = self.time_limit
+        solver.parameters.num_workers = self.num_workers
+
+        max_gens = int(self.config.get('max_generations', 100))
+        owner = self
+        solve_start = time.perf_counter()
+
+        class _ProgressCallback(cp_model.CpSolverSolutionCallback):
+            def on_solution_callback(self):
+                owner.best_individual = owner._extract(self.value)
+                # Avance reportado como fracción del límite de tiempo, en la escala de generaciones de la API
+                elapsed = time.perf_counter() - solve_start
+                step = min(max_gens - 1, int(elapsed / owner.time_limit * max_gens))
+                owner.stats["generation"] = step
+                if on_progress:
+                    on_progress(step, owner.best_individual.fitness)
+
+        # Cancelación también entre soluciones (la búsqueda puede tardar en mejorar)
+        cancelled = threading.Event()
+        finished = threading.Event()
+
+        def watch_cancel():
+            while not finished.wait(0.5):
+                if should_cancel and should_cancel():
+                    cancelled.set()
+                    solver.stop_search()
+                    return
+
+        watcher = threading.Thread(target=watch_cancel, daemon=True)
+        watcher.start()
+        try:
+            status = solver.solve(cp, _ProgressCallback())
+        finally:
+            finished.set()
+            watcher.join()
+
+        self.stats["status"] = solver.status_name(status)
+        self.stats["wall_time"] = solver.wall_time
+        print(f"🧮 CP-SAT: {self.stats['status']} en {solver.wall_time:.2f}s")
+
+        if cancelled.is_set():
+            print("🛑 CP-SAT cancelled by user.")
+            return None
+        if status == cp_model.INFEASIBLE:
+            raise InfeasibleInstanceError(["CP-SAT demostró que las restricciones duras no tienen solución"])
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            raise RuntimeError(f"CP-SAT no encontró solución en {self.time_limit:.0f}s (estado {self.stats['status']})")
+
+        self.best_individual = self._extract(solver.value)
+        if on_progress:
+            on_progress(max_gens - 1, self.best_individual.fitness)
+        return self.best_individual
+
+    def get_conflicts(self, individual: Horario) -> List[str]:
+        return self.evaluator.get_conflicts(individual)
+
+    def find_conflicts(self, individual: Horario) -> ConflictReport:
+        return self.evaluator.find_conflicts(individual)
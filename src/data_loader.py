@@ -1,21 +1,61 @@
 import json
 import os
-from typing import List, Tuple, Dict, Any
-import gspread
-from google.oauth2.service_account import Credentials
+import threading
+import time
+from collections import defaultdict
+from typing import List, Tuple, Dict, Any, Callable, TYPE_CHECKING
 from .model import Curso, Profesor, Aula, Grupo, Clase
+from .metrics import track_sheets_call
+
+# gspread y google.oauth2 se importan al primer uso (ver _get_gspread_client)
+# para no cargarlos durante el arranque en frío de la API.
+if TYPE_CHECKING:
+    import gspread
 
 SCOPES = [
     'https://www.googleapis.com/auth/spreadsheets',
     'https://www.googleapis.com/auth/drive'
 ]
 
-def _get_gspread_client(credentials_path: str = 'credentials.json') -> gspread.Client:
+# Clientes autenticados reutilizables (la credencial se refresca sola)
+_clients: Dict[str, "gspread.Client"] = {}
+_clients_lock = threading.Lock()
+_spreadsheets: Dict[Tuple[int, str], "gspread.Spreadsheet"] = {}
+
+# Origen de los datos maestros y la configuración: 'sheets' (default) o 'local'
+# (dataset columnar en DATASET_DIR, ver dataset_store). Los resultados siguen en Sheets.
+DATA_BACKEND = os.environ.get('DATA_BACKEND', 'sheets').strip().lower()
+
+# Conteo de clases visto en la última carga: spreadsheet_name -> (conteo, timestamp)
+# Permite a /save validar integridad sin recargar todas las tablas.
+CLASES_COUNT_TTL = float(os.environ.get('CLASES_COUNT_TTL', '600'))
+_clases_count_cache: Dict[str, Tuple[int, float]] = {}
+
+def _get_gspread_client(credentials_path: str = 'credentials.json') -> "gspread.Client":
+    """
+    Obtiene el cliente de gspread (cacheado tras el primer uso).
+    """
+    creds_json_str = os.environ.get('GCP_CREDENTIALS_JSON')
+    cache_key = 'env' if creds_json_str else credentials_path
+
+    client = _clients.get(cache_key)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        if cache_key not in _clients:
+            _clients[cache_key] = _build_gspread_client(credentials_path)
+        return _clients[cache_key]
+
+def _build_gspread_client(credentials_path: str) -> "gspread.Client":
     """
-    Obtiene el cliente de gspread usando autenticación híbrida:
+    Construye el cliente de gspread usando autenticación híbrida:
     1. Intenta leer la variable de entorno GCP_CREDENTIALS_JSON (Cloud Run).
     2. Si no existe, intenta leer el archivo credentials_path (Local).
     """
+    import gspread
+    from google.oauth2.service_account import Credentials
+
     creds_json_str = os.environ.get('GCP_CREDENTIALS_JSON')
 
     if creds_json_str:
@@ -31,20 +71,53 @@ def _get_gspread_client(credentials_path: str = 'credentials.json') -> gspread.C
 
     return gspread.authorize(creds)
 
-def load_data(spreadsheet_name: str, credentials_path: str = 'credentials.json') -> Tuple[List[Curso], List[Profesor], List[Aula], List[Grupo], List[Clase]]:
+def _open_spreadsheet(client: "gspread.Client", spreadsheet_name: str) -> "gspread.Spreadsheet":
     """
-    Carga los datos desde una Google Sheet.
+    Abre la hoja de cálculo registrando la llamada en las métricas.
+    client.open() busca por nombre en Drive en cada llamada, así que cacheamos el handle.
     """
+    cache_key = (id(client), spreadsheet_name)
+    sh = _spreadsheets.get(cache_key)
+    if sh is None:
+        with track_sheets_call("open"):
+            sh = client.open(spreadsheet_name)
+        _spreadsheets[cache_key] = sh
+    return sh
+
+def _read_records(sh: "gspread.Spreadsheet", title: str) -> List[Dict[str, Any]]:
+    """Lee todos los registros de una pestaña registrando la llamada en las métricas."""
+    with track_sheets_call("read_records"):
+        return sh.worksheet(title).get_all_records()
+
+def _open_sheet(spreadsheet_name: str, credentials_path: str) -> "gspread.Spreadsheet":
+    import gspread
+
     client = _get_gspread_client(credentials_path)
-    
     try:
-        sh = client.open(spreadsheet_name)
+        return _open_spreadsheet(client, spreadsheet_name)
     except gspread.SpreadsheetNotFound:
         raise ValueError(f"No se encontró la hoja de cálculo: {spreadsheet_name}")
 
+def _table_reader(spreadsheet_name: str, credentials_path: str) -> Callable[[str], List[Dict[str, Any]]]:
+    """
+    Lector de pestañas según DATA_BACKEND: devuelve registros con la forma de
+    get_all_records, vengan de Google Sheets o del dataset local.
+    """
+    if DATA_BACKEND == 'local':
+        from .dataset_store import open_dataset
+        return open_dataset(spreadsheet_name).records
+
+    sh = _open_sheet(spreadsheet_name, credentials_path)
+    return lambda title: _read_records(sh, title)
+
+def load_data(spreadsheet_name: str, credentials_path: str = 'credentials.json') -> Tuple[List[Curso], List[Profesor], List[Aula], List[Grupo], List[Clase]]:
+    """
+    Carga los datos desde una Google Sheet (o del dataset local si DATA_BACKEND=local).
+    """
+    read = _table_reader(spreadsheet_name, credentials_path)
+
     # --- Cursos ---
-    ws_cursos = sh.worksheet("Cursos")
-    cursos_records = ws_cursos.get_all_records()
+    cursos_records = read("Cursos")
     cursos = []
     for r in cursos_records:
         # Parse profesores_ids: "DOC1, DOC2" -> ["DOC1", "DOC2"]
@@ -61,8 +134,7 @@ def load_data(spreadsheet_name: str, credentials_path: str = 'credentials.json')
         ))
 
     # --- Profesores ---
-    ws_profesores = sh.worksheet("Profesores")
-    profesores_records = ws_profesores.get_all_records()
+    profesores_records = read("Profesores")
     profesores = []
     for r in profesores_records:
         # Parse disponibilidad: String JSON -> Dict
@@ -81,8 +153,7 @@ def load_data(spreadsheet_name: str, credentials_path: str = 'credentials.json')
         ))
 
     # --- Aulas ---
-    ws_aulas = sh.worksheet("Aulas")
-    aulas_records = ws_aulas.get_all_records()
+    aulas_records = read("Aulas")
     aulas = [Aula(
         id=str(r['id']),
         nombre=str(r['nombre']),
@@ -91,8 +162,7 @@ def load_data(spreadsheet_name: str, credentials_path: str = 'credentials.json')
     ) for r in aulas_records]
 
     # --- Grupos ---
-    ws_grupos = sh.worksheet("Grupos")
-    grupos_records = ws_grupos.get_all_records()
+    grupos_records = read("Grupos")
     grupos = []
     for r in grupos_records:
         try:
@@ -113,8 +183,7 @@ def load_data(spreadsheet_name: str, credentials_path: str = 'credentials.json')
         ))
 
     # --- Clases ---
-    ws_clases = sh.worksheet("Clases")
-    clases_records = ws_clases.get_all_records()
+    clases_records = read("Clases")
     clases = [Clase(
         id=str(r['id']),
         curso_id=str(r['curso_id']),
@@ -123,21 +192,40 @@ def load_data(spreadsheet_name: str, credentials_path: str = 'credentials.json')
         tipo_aula=str(r['tipo_aula'])
     ) for r in clases_records]
 
+    _clases_count_cache[spreadsheet_name] = (len(clases), time.time())
+
     return cursos, profesores, aulas, grupos, clases
 
+def get_clases_count(spreadsheet_name: str, credentials_path: str = 'credentials.json', max_age: float = CLASES_COUNT_TTL) -> int:
+    """
+    Devuelve la cantidad de clases definidas en la hoja 'Clases'.
+    Usa el conteo de la última carga si tiene menos de max_age segundos;
+    si no, lee solo la columna de IDs (una llamada) en lugar de todas las tablas.
+    """
+    cached = _clases_count_cache.get(spreadsheet_name)
+    if cached and time.time() - cached[1] < max_age:
+        return cached[0]
+
+    if DATA_BACKEND == 'local':
+        from .dataset_store import open_dataset
+        # Solo se decodifica la columna de IDs
+        ids = open_dataset(spreadsheet_name).column("Clases", "id")
+    else:
+        sh = _open_sheet(spreadsheet_name, credentials_path)
+        with track_sheets_call("read_column"):
+            # Primera fila = encabezado
+            ids = sh.worksheet("Clases").col_values(1)[1:]
+    # Ignoramos celdas vacías al final
+    count = sum(1 for v in ids if str(v).strip())
+    _clases_count_cache[spreadsheet_name] = (count, time.time())
+    return count
+
 def load_config(spreadsheet_name: str, credentials_path: str = 'credentials.json') -> dict:
     """
-    Carga la configuración desde la hoja 'Configuracion'.
+    Carga la configuración desde la hoja 'Configuracion' (o del dataset local).
     Maneja tipos de datos específicos (enteros, listas, floats).
     """
-    client = _get_gspread_client(credentials_path)
-    try:
-        sh = client.open(spreadsheet_name)
-    except gspread.SpreadsheetNotFound:
-        raise ValueError(f"No se encontró la hoja de cálculo: {spreadsheet_name}")
-        
-    ws_config = sh.worksheet("Configuracion")
-    records = ws_config.get_all_records()
+    records = _table_reader(spreadsheet_name, credentials_path)("Configuracion")
     
     # Crear diccionario base
     raw_config = {r['parametro']: r['valor'] for r in records}
@@ -183,32 +271,120 @@ def load_config(spreadsheet_name: str, credentials_path: str = 'credentials.json
 
     return config
 
-def save_schedule_to_sheet(schedule_data: List[Dict[str, Any]], spreadsheet_name: str, credentials_path: str = 'credentials.json'):
+def export_dataset(spreadsheet_name: str, credentials_path: str = 'credentials.json', path: str = None) -> str:
     """
-    Guarda el horario generado en la hoja 'Resultados'.
-    Crea la hoja si no existe, limpia contenido previo y escribe nuevos datos.
+    Descarga las pestañas de datos maestros y configuración de Google Sheets
+    al dataset local (siempre desde Sheets, sin importar DATA_BACKEND).
     """
-    client = _get_gspread_client(credentials_path)
-    try:
-        sh = client.open(spreadsheet_name)
-    except gspread.SpreadsheetNotFound:
-        raise ValueError(f"No se encontró la hoja de cálculo: {spreadsheet_name}")
+    from .dataset_store import TABLES, dataset_path, write_dataset
+
+    sh = _open_sheet(spreadsheet_name, credentials_path)
+    path = path or dataset_path(spreadsheet_name)
+    write_dataset(path, {title: _read_records(sh, title) for title in TABLES})
+    return path
+
+def import_dataset(path: str, spreadsheet_name: str, credentials_path: str = 'credentials.json'):
+    """
+    Sube un dataset local a Google Sheets: reescribe cada pestaña (encabezado + filas)
+    y la crea si no existe.
+    """
+    import gspread
+    from .dataset_store import Dataset
 
-    # Buscar o crear hoja "Resultados"
+    sh = _open_sheet(spreadsheet_name, credentials_path)
+    dataset = Dataset(path)
     try:
-        ws = sh.worksheet("Resultados")
-        ws.clear()
-    except gspread.WorksheetNotFound:
-        ws = sh.add_worksheet(title="Resultados", rows=1000, cols=10)
+        for title in dataset.tables():
+            columns = dataset.columns(title)
+            values = [dataset.column(title, c) for c in columns]
+            rows = [columns] + [list(row) for row in zip(*values)]
+            try:
+                with track_sheets_call("worksheet"):
+                    ws = sh.worksheet(title)
+                with track_sheets_call("clear"):
+                    ws.clear()
+            except gspread.WorksheetNotFound:
+                with track_sheets_call("add_worksheet"):
+                    ws = sh.add_worksheet(title=title, rows=max(100, len(rows)), cols=max(10, len(columns)))
+            with track_sheets_call("update"):
+                ws.update(rows)
+    finally:
+        dataset.close()
 
-    # Preparar datos para escritura por lotes
-    headers = ["Día", "Inicio", "Fin", "Curso", "Grupo", "Aula", "Profesor", "Tipo Aula", "MetaDiaIdx", "MetaSlotIdx", "MetaNumSlots"]
-    
-    # Convertir lista de dicts a lista de listas (filas)
-    rows = [headers]
+RESULTS_HEADERS = ["Día", "Inicio", "Fin", "Curso", "Grupo", "Aula", "Profesor", "Tipo Aula", "MetaDiaIdx", "MetaSlotIdx", "MetaNumSlots"]
+
+# Última versión escrita de 'Resultados': spreadsheet_name -> (filas con encabezado, revisión de Drive)
+_results_snapshots: Dict[str, Tuple[List[List[Any]], str]] = {}
+_results_lock = threading.Lock()
+RESULTS_WRITE_ATTEMPTS = 3
+
+class ResultsConflictError(RuntimeError):
+    """'Resultados' cambió durante cada intento de guardado: no se escribió nada."""
+
+def _norm_row(row: List[Any], width: int) -> Tuple[str, ...]:
+    # Sheets devuelve todo como texto: comparamos las celdas como strings
+    return tuple(str(v) for v in row) + ("",) * (width - len(row))
+
+def _align_rows(old_rows: List[List[Any]], new_rows: List[List[Any]], width: int) -> List[List[Any]]:
+    """
+    Ubica las filas nuevas sobre las posiciones de las anteriores: una fila idéntica conserva
+    su posición y una sesión movida cae en la fila que ocupaba su (curso, grupo). Así mover
+    dos sesiones cambia dos filas, en vez de desplazar todo el orden. Las posiciones que
+    sobran quedan en blanco y las filas que no caben se agregan al final.
+    """
+    aligned: List[Any] = [None] * len(old_rows)
+    placed = [False] * len(new_rows)
+
+    by_value = defaultdict(list)
+    for j in reversed(range(len(new_rows))):
+        by_value[_norm_row(new_rows[j], width)].append(j)
+    for i, row in enumerate(old_rows):
+        bucket = by_value.get(_norm_row(row, width))
+        if bucket:
+            j = bucket.pop()
+            aligned[i], placed[j] = new_rows[j], True
+
+    free_by_key = defaultdict(list)
+    for i in reversed(range(len(old_rows))):
+        if aligned[i] is None:
+            free_by_key[_norm_row(old_rows[i], width)[3:5]].append(i)
+    rest = []
+    for j, row in enumerate(new_rows):
+        if placed[j]:
+            continue
+        bucket = free_by_key.get(_norm_row(row, width)[3:5])
+        if bucket:
+            aligned[bucket.pop()] = row
+        else:
+            rest.append(row)
+
+    free = [i for i in range(len(old_rows)) if aligned[i] is None]
+    for i, row in zip(free, rest):
+        aligned[i] = row
+    rest = rest[len(free):]
+    return [row if row is not None else [""] * width for row in aligned] + rest
+
+def save_schedule_to_sheet(schedule_data: List[Dict[str, Any]], spreadsheet_name: str, credentials_path: str = 'credentials.json') -> Dict[str, int]:
+    """
+    Guarda el horario generado en la hoja 'Resultados' escribiendo solo las filas que cambiaron.
+    Compara contra la última versión guardada, cacheada junto con la revisión de la hoja en Drive.
+    Si la revisión cambió (edición manual u otra instancia), compara contra el contenido actual
+    de la hoja. Los rangos cambiados van en un único batch_update y la hoja nunca queda vacía.
+
+    Sheets no tiene escrituras condicionales: justo antes del batch_update se vuelve a leer la
+    revisión y, si cambió, se compara de nuevo (hasta RESULTS_WRITE_ATTEMPTS veces, luego
+    ResultsConflictError). Es best-effort: una edición entre ese chequeo y la escritura, o que
+    Drive todavía no refleja en la revisión, puede pisarse.
+    """
+    import gspread
+    from gspread.utils import rowcol_to_a1
+
+    sh = _open_sheet(spreadsheet_name, credentials_path)
+
+    # Convertir lista de dicts a lista de listas (filas), en el orden de RESULTS_HEADERS
+    rows = []
     for item in schedule_data:
-        # Asegurar el orden de columnas
-        row = [
+        rows.append([
             item.get('dia', ''),
             item.get('hora_inicio', ''),
             item.get('hora_fin', ''),
@@ -220,32 +396,105 @@ def save_schedule_to_sheet(schedule_data: List[Dict[str, Any]], spreadsheet_name
             item.get('meta_dia_idx', 0),
             item.get('meta_slot_idx', 0),
             item.get('meta_num_slots', 1)
-        ]
-        rows.append(row)
+        ])
 
-    # Escribir todo de una vez (Batch Update)
-    ws.update(rows)
-    
-    # Formato opcional: Congelar primera fila (headers)
-    ws.freeze(rows=1)
+    with _results_lock:
+        # Buscar o crear hoja "Resultados"
+        created = False
+        try:
+            with track_sheets_call("worksheet"):
+                ws = sh.worksheet("Resultados")
+        except gspread.WorksheetNotFound:
+            with track_sheets_call("add_worksheet"):
+                ws = sh.add_worksheet(title="Resultados", rows=max(1000, len(rows) + 1), cols=len(RESULTS_HEADERS))
+            created = True
+
+        # Concurrencia optimista: el snapshot local solo vale si nadie tocó la hoja desde que lo escribimos
+        snapshot = _results_snapshots.get(spreadsheet_name)
+        for attempt in range(RESULTS_WRITE_ATTEMPTS):
+            with track_sheets_call("revision"):
+                revision = sh.get_lastUpdateTime()
+            if created:
+                current = []
+            elif snapshot and snapshot[1] == revision:
+                current = snapshot[0]
+            else:
+                with track_sheets_call("read_values"):
+                    current = ws.get_all_values()
+
+            width = max([len(RESULTS_HEADERS)] + [len(r) for r in current])
+            new_sheet = [list(RESULTS_HEADERS)] + _align_rows(current[1:], rows, width)
+            changed = [
+                i for i, row in enumerate(new_sheet)
+                if i >= len(current) or _norm_row(row, width) != _norm_row(current[i], width)
+            ]
+
+            # Filas consecutivas cambiadas -> un rango A1 cada una
+            data = []
+            for i in changed:
+                if data and data[-1][1] == i - 1:
+                    data[-1][1] = i
+                else:
+                    data.append([i, i])
+            data = [{
+                "range": f"{rowcol_to_a1(start + 1, 1)}:{rowcol_to_a1(end + 1, width)}",
+                "values": [list(new_sheet[k]) + [""] * (width - len(new_sheet[k])) for k in range(start, end + 1)]
+            } for start, end in data]
+            if not data:
+                break
+
+            # Re-chequeo justo antes de escribir: si la hoja cambió mientras comparábamos, el diff es viejo
+            with track_sheets_call("revision"):
+                latest = sh.get_lastUpdateTime()
+            if latest == revision:
+                break
+            print(f"⚠️ 'Resultados' cambió durante el guardado (intento {attempt + 1}/{RESULTS_WRITE_ATTEMPTS}); comparando de nuevo")
+            created = False
+        else:
+            raise ResultsConflictError(
+                f"La hoja 'Resultados' se modificó durante {RESULTS_WRITE_ATTEMPTS} intentos de guardado; no se escribió nada."
+            )
+
+        if len(new_sheet) > ws.row_count:
+            with track_sheets_call("add_rows"):
+                ws.add_rows(len(new_sheet) - ws.row_count)
+        if data:
+            with track_sheets_call("batch_update"):
+                ws.batch_update(data)
+        if snapshot is None:
+            # Formato: Congelar primera fila (headers), una vez por proceso
+            with track_sheets_call("freeze"):
+                ws.freeze(rows=1)
+        if data or snapshot is None:
+            with track_sheets_call("revision"):
+                revision = sh.get_lastUpdateTime()
+
+        # Las filas en blanco del final no cuentan (get_all_values tampoco las devuelve)
+        while len(new_sheet) > 1 and not any(str(v) for v in new_sheet[-1]):
+            new_sheet.pop()
+        _results_snapshots[spreadsheet_name] = (new_sheet, revision)
+
+    print(f"💾 Resultados: {len(changed)} filas cambiadas en {len(data)} rangos")
+    return {"changed_rows": len(changed), "ranges": len(data)}
 
 def get_saved_schedule(spreadsheet_name: str, credentials_path: str = 'credentials.json') -> List[Dict[str, Any]]:
     """
     Recupera el horario guardado en la hoja 'Resultados'.
     Devuelve una lista de diccionarios con las claves del modelo SessionData.
     """
+    import gspread
+
     client = _get_gspread_client(credentials_path)
     try:
-        sh = client.open(spreadsheet_name)
+        sh = _open_spreadsheet(client, spreadsheet_name)
     except gspread.SpreadsheetNotFound:
         return []
 
     try:
-        ws = sh.worksheet("Resultados")
+        records = _read_records(sh, "Resultados")
     except gspread.WorksheetNotFound:
         return []
         
-    records = ws.get_all_records()
     if not records:
         return []
 
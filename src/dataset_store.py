@@ -0,0 +1,111 @@
+import mmap
+import os
+import struct
+from typing import List, Dict, Any, Optional, Tuple
+import msgpack
+
+# Dataset local en formato columnar (alternativa a Google Sheets):
+#   MAGIC | uint32 largo_índice | índice msgpack | bloques msgpack (uno por columna)
+# El índice guarda, por tabla, el número de filas y (offset, largo) de cada columna
+# respecto del inicio de los bloques. El archivo se abre con mmap: solo se
+# decodifican las columnas que se piden (p. ej. contar clases lee solo Clases.id).
+MAGIC = b"HDSET001"
+
+# Pestañas del layout de Sheets que viajan en el dataset (datos maestros + configuración)
+TABLES = ("Cursos", "Profesores", "Aulas", "Grupos", "Clases", "Configuracion")
+
+def dataset_path(name: str, directory: Optional[str] = None) -> str:
+    """Ruta del dataset de una hoja: DATASET_DIR/<nombre>.hds (default 'data')."""
+    directory = directory or os.environ.get('DATASET_DIR', 'data')
+    return os.path.join(directory, f"{name}.hds")
+
+def write_dataset(path: str, tables: Dict[str, List[Dict[str, Any]]]):
+    """
+    Escribe las tablas (registros como los de get_all_records) en formato columnar.
+    La escritura es atómica: un lector con el archivo anterior mapeado no se ve afectado.
+    """
+    index, blocks, offset = {}, [], 0
+    for title, records in tables.items():
+        columns: List[str] = []
+        for r in records:
+            columns.extend(k for k in r if k not in columns)
+        entry = {"rows": len(records), "columns": {}}
+        for col in columns:
+            block = msgpack.packb([r.get(col, "") for r in records], use_bin_type=True)
+            entry["columns"][col] = [offset, len(block)]
+            blocks.append(block)
+            offset += len(block)
+        index[title] = entry
+
+    header = msgpack.packb({"tables": index}, use_bin_type=True)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        for block in blocks:
+            f.write(block)
+    os.replace(tmp, path)
+
+class Dataset:
+    """Dataset local mapeado en memoria; las columnas se decodifican bajo demanda."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            self._mm.close()
+            raise ValueError(f"Dataset inválido o de otra versión: {path}")
+        (header_len,) = struct.unpack_from("<I", self._mm, len(MAGIC))
+        start = len(MAGIC) + 4
+        self._index = msgpack.unpackb(self._mm[start:start + header_len], raw=False)["tables"]
+        self._data_start = start + header_len
+
+    def tables(self) -> List[str]:
+        return list(self._index)
+
+    def columns(self, title: str) -> List[str]:
+        return list(self._table(title)["columns"])
+
+    def num_rows(self, title: str) -> int:
+        return self._table(title)["rows"]
+
+    def column(self, title: str, col: str) -> List[Any]:
+        offset, length = self._table(title)["columns"][col]
+        start = self._data_start + offset
+        return msgpack.unpackb(self._mm[start:start + length], raw=False)
+
+    def records(self, title: str) -> List[Dict[str, Any]]:
+        """Registros fila a fila, con la misma forma que get_all_records de gspread."""
+        cols = self.columns(title)
+        values = [self.column(title, c) for c in cols]
+        return [dict(zip(cols, row)) for row in zip(*values)]
+
+    def _table(self, title: str) -> dict:
+        try:
+            return self._index[title]
+        except KeyError:
+            raise ValueError(f"El dataset {self.path} no tiene la tabla '{title}'")
+
+    def close(self):
+        self._mm.close()
+
+# Datasets abiertos: ruta -> ((mtime, tamaño), Dataset). Se reabre si el archivo cambió.
+_open: Dict[str, Tuple[Tuple[int, int], Dataset]] = {}
+
+def open_dataset(name: str, directory: Optional[str] = None) -> Dataset:
+    """Abre (o reutiliza) el dataset local de una hoja."""
+    path = dataset_path(name, directory)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        raise ValueError(f"No se encontró el dataset local: {path}")
+    version = (st.st_mtime_ns, st.st_size)
+
+    cached = _open.get(path)
+    if cached and cached[0] == version:
+        return cached[1]
+    dataset = Dataset(path)
+    _open[path] = (version, dataset)
+    # El mapeo anterior se libera cuando ya nadie lo usa (gc), no aquí
+    return dataset
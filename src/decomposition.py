@@ -0,0 +1,415 @@
+import os
+import copy
+import math
+import queue
+import random
+import time
+import multiprocessing
+from dataclasses import dataclass, field, replace
+from typing import List, Dict, Set, Optional
+from .model import Curso, Profesor, Aula, Horario, Sesion, Grupo, Clase
+from .conflicts import ConflictReport, MAX_HOURS
+from .constraints import ConstraintModel, compile_constraints
+from .genetic_algorithm import GeneticAlgorithm
+
+@dataclass
+class Cluster:
+    """
+    Subproblema: familias de grupos completas (un grupo nunca se separa de sus
+    ancestros/descendientes) con su demanda estimada de profesores y aulas.
+    window es la máscara de slots de los turnos de sus grupos.
+    """
+    index: int
+    clase_ids: List[str]
+    group_ids: Set[str]
+    window: int
+    prof_demand: Dict[str, float] = field(default_factory=dict)
+    room_demand: Dict[str, int] = field(default_factory=dict)   # tipo de aula -> slots
+    max_students: int = 0
+
+def build_clusters(model: ConstraintModel, grupos: List[Grupo], clases: List[Clase], max_clases: int) -> List[Cluster]:
+    """
+    Agrupa familias de grupos por turno y, dentro de cada turno, las empaqueta en
+    clusters de hasta max_clases clases priorizando las que comparten más profesores
+    elegibles (así el acoplamiento entre clusters queda en pocos recursos).
+    """
+    grupos_map = {g.id: g for g in grupos}
+    families: Dict[str, List[Clase]] = {}
+    for c in clases:
+        root = model.group_root.get(c.grupo_id, c.grupo_id)
+        families.setdefault(root, []).append(c)
+
+    family_profs = {
+        root: {p for c in fam for p in model.eligible_profs.get(c.curso_id, [])}
+        for root, fam in families.items()
+    }
+    by_turn: Dict[str, List[str]] = {}
+    for root in families:
+        by_turn.setdefault(grupos_map[root].turno if root in grupos_map else "", []).append(root)
+
+    packed: List[List[str]] = []
+    for turno in sorted(by_turn):
+        remaining = sorted(by_turn[turno], key=lambda r: -len(families[r]))
+        while remaining:
+            members = [remaining.pop(0)]
+            size = len(families[members[0]])
+            profs = set(family_profs[members[0]])
+            while remaining:
+                fitting = [r for r in remaining if size + len(families[r]) <= max_clases]
+                if not fitting:
+                    break
+                best = max(fitting, key=lambda r: (len(profs & family_profs[r]), len(families[r])))
+                remaining.remove(best)
+                members.append(best)
+                size += len(families[best])
+                profs |= family_profs[best]
+            packed.append(members)
+
+    clusters = []
+    for idx, members in enumerate(packed):
+        member_clases = [c for root in members for c in families[root]]
+        window = 0
+        prof_demand: Dict[str, float] = {}
+        room_demand: Dict[str, int] = {}
+        max_students = 0
+        for c in member_clases:
+            grupo = grupos_map[c.grupo_id]
+            turn_range = model.turn_ranges.get(grupo.turno)
+            if turn_range:
+                window |= model.span_mask(turn_range[0], turn_range[1] - turn_range[0] + 1)
+            else:
+                window |= model.span_mask(0, model.num_slots)
+            eligible = model.eligible_profs.get(c.curso_id, [])
+            for p in eligible:
+                prof_demand[p] = prof_demand.get(p, 0.0) + c.duracion_bloques / len(eligible)
+            room_demand[c.tipo_aula] = room_demand.get(c.tipo_aula, 0) + c.duracion_bloques
+            max_students = max(max_students, grupo.num_estudiantes)
+        clusters.append(Cluster(
+            index=idx,
+            clase_ids=[c.id for c in member_clases],
+            group_ids={c.grupo_id for c in member_clases} | {g for c in member_clases for g in model.group_ancestry.get(c.grupo_id, [])},
+            window=window,
+            prof_demand=prof_demand,
+            room_demand=room_demand,
+            max_students=max_students
+        ))
+    return clusters
+
+def _pick_owner(users: List[Cluster], demand: Dict[int, float], assigned: Dict[int, float]) -> Cluster:
+    # Ronda ponderada: el cluster con menor asignado / demanda recibe el siguiente recurso
+    return min(users, key=lambda c: (assigned[c.index] / max(demand[c.index], 1e-9), c.index))
+
+def reserve_resources(model: ConstraintModel, clusters: List[Cluster], profesores: List[Profesor], aulas: List[Aula]) -> Dict[int, dict]:
+    """
+    Reservas para resolver los clusters en paralelo sin pisarse:
+      - Profesor compartido: en los slots donde se solapan las ventanas de sus clusters,
+        cada día queda reservado a un solo cluster (ronda ponderada por demanda), vía su
+        máscara de disponibilidad; sus horas máximas se reparten en proporción a la demanda.
+      - Aulas de un tipo disputado por clusters con ventanas solapadas: se reparten completas
+        (mayor aforo primero); si hay menos aulas que clusters, se comparten.
+    Devuelve por cluster: {"availability": {prof: máscaras}, "max_horas": {prof: h}, "aulas": [ids]}.
+    """
+    full_day = model.span_mask(0, model.num_slots)
+    reservations = {c.index: {"availability": {}, "max_horas": {}, "aulas": []} for c in clusters}
+    p_map = {p.id: p for p in profesores}
+
+    for p_id, prof in p_map.items():
+        users = [c for c in clusters if c.prof_demand.get(p_id)]
+        if len(users) < 2:
+            continue
+        demand = {c.index: c.prof_demand[p_id] for c in users}
+        total = sum(demand.values())
+        for c in users:
+            reservations[c.index]["max_horas"][p_id] = int(prof.max_horas_semana * demand[c.index] / total)
+
+        # Slots cubiertos por 2+ ventanas: son los únicos que se reservan
+        contested = 0
+        seen = 0
+        for c in users:
+            contested |= seen & c.window
+            seen |= c.window
+        base = model.availability.get(p_id, [full_day] * model.num_days)
+        masks = {c.index: list(base) for c in users}
+        assigned = {c.index: 0.0 for c in users}
+        for d in range(model.num_days if contested else 0):
+            owner = _pick_owner(users, demand, assigned)
+            assigned[owner.index] += 1
+            for c in users:
+                if c is not owner:
+                    masks[c.index][d] &= ~contested
+        for c in users:
+            reservations[c.index]["availability"][p_id] = masks[c.index]
+
+    rooms_by_type: Dict[str, List[Aula]] = {}
+    for a in aulas:
+        rooms_by_type.setdefault(a.tipo, []).append(a)
+    for tipo, rooms in rooms_by_type.items():
+        users = [c for c in clusters if c.room_demand.get(tipo)]
+        overlapping = any(a.window & b.window for i, a in enumerate(users) for b in users[i + 1:])
+        if not overlapping or len(rooms) < len(users):
+            for c in clusters:
+                reservations[c.index]["aulas"].extend(r.id for r in rooms)
+            continue
+        demand = {c.index: float(c.room_demand[tipo]) for c in users}
+        assigned = {c.index: 0.0 for c in users}
+        ordered_users = sorted(users, key=lambda c: -c.max_students)
+        for r in sorted(rooms, key=lambda r: -r.capacidad):
+            # Primero un aula por cluster (los de grupos más grandes eligen antes), luego por demanda
+            without = [c for c in ordered_users if not assigned[c.index]]
+            owner = without[0] if without else _pick_owner(users, demand, assigned)
+            assigned[owner.index] += 1
+            reservations[owner.index]["aulas"].append(r.id)
+        for c in clusters:
+            if c not in users:
+                reservations[c.index]["aulas"].extend(r.id for r in rooms)
+    return reservations
+
+def merge_partials(clases: List[Clase], partial: Dict[int, Optional[List[Sesion]]], num_clusters: int) -> Optional[Horario]:
+    """
+    Fusión de las sesiones de los clusters en el orden original de las clases.
+    None si falta algún cluster (o devolvió None por detenerse antes de su primera generación).
+    """
+    parts = [sesiones for sesiones in partial.values() if sesiones is not None]
+    if len(parts) < num_clusters:
+        return None
+    by_clase = {s.clase_id: s for sesiones in parts for s in sesiones}
+    return Horario(sesiones=[by_clase[c.id] for c in clases])
+
+def _cluster_worker(cluster_idx: int, seed: int, sub: dict, config: dict, results, stop_event):
+    """
+    Resuelve un cluster con un GA serial y devuelve sus sesiones. Mientras corre envía su
+    mejor parcial cuando mejora (como mucho cada best_publish_interval segundos).
+    """
+    random.seed(seed)
+    publish_every = float(config.get('best_publish_interval', 10))
+    last_sent = {"at": None, "fitness": None}
+    try:
+        ga = GeneticAlgorithm(sub["cursos"], sub["profesores"], sub["aulas"], sub["grupos"], sub["clases"], config, model=sub["model"])
+        ga.num_workers = 1
+
+        def on_progress(generation, fitness):
+            now = time.perf_counter()
+            improved = last_sent["fitness"] is None or fitness > last_sent["fitness"]
+            if improved and (last_sent["at"] is None or now - last_sent["at"] >= publish_every):
+                last_sent.update(at=now, fitness=fitness)
+                results.put(("best", cluster_idx, copy.deepcopy(ga.best_individual.sesiones)))
+            results.put(("progress", cluster_idx, generation, fitness))
+
+        best = ga.evolve(on_progress=on_progress, should_cancel=stop_event.is_set) or ga.best_individual
+        results.put(("done", cluster_idx, best.sesiones if best else None))
+    except Exception as e:
+        results.put(("error", cluster_idx, f"{type(e).__name__}: {e}"))
+
+class DecomposedSolver:
+    """
+    Descomposición por turno/familia de grupos: clusters débilmente acoplados que se
+    resuelven en paralelo con recursos reservados, se fusionan y se reparan con un GA
+    que solo muta las clases en conflicto en la frontera.
+    Parámetros en config: decomposition_max_clases (default 150),
+    decomposition_repair_generations (default 100).
+    Con time_budget, el presupuesto cubre todo el solve: cada tanda de clusters y la
+    reparación reciben una parte de lo que queda hasta el deadline.
+    """
+
+    def __init__(self, cursos: List[Curso], profesores: List[Profesor], aulas: List[Aula], grupos: List[Grupo], clases: List[Clase], config: dict, model: Optional[ConstraintModel] = None):
+        self.cursos = cursos
+        self.profesores = profesores
+        self.aulas = aulas
+        self.grupos = grupos
+        self.clases = clases
+        self.config = config
+        self.model = model or compile_constraints(cursos, profesores, aulas, grupos, clases, config)
+        self.ga = GeneticAlgorithm(cursos, profesores, aulas, grupos, clases, config, model=self.model)
+        self.evaluator = self.ga.evaluator
+
+        self.max_clases = int(config.get('decomposition_max_clases', 150))
+        self.repair_generations = int(config.get('decomposition_repair_generations', 100))
+        self.num_workers = min(int(config.get('decomposition_workers') or os.cpu_count() or 1), os.cpu_count() or 1)
+
+        self.stats = {"generation": 0, "generations_per_sec": 0.0, "pool_utilization": 0.0, "clusters": [], "boundary_clases": 0}
+        self.best_individual: Optional[Horario] = None
+        self._deadline: Optional[float] = None
+
+    def _budget_share(self, shares: int) -> Optional[float]:
+        # Lo que queda hasta el deadline repartido en `shares` fases (nunca 0: para el GA es "sin límite")
+        if self._deadline is None:
+            return None
+        return max(1e-3, (self._deadline - time.perf_counter()) / shares)
+
+    def _subproblem(self, cluster: Cluster, reservation: dict) -> dict:
+        ids = set(cluster.clase_ids)
+        clases = [c for c in self.clases if c.id in ids]
+        grupos = [g for g in self.grupos if g.id in cluster.group_ids]
+        profesores = [
+            replace(p, max_horas_semana=reservation["max_horas"][p.id]) if p.id in reservation["max_horas"] else p
+            for p in self.profesores
+        ]
+        room_ids = set(reservation["aulas"])
+        aulas = [a for a in self.aulas if a.id in room_ids]
+        model = compile_constraints(self.cursos, profesores, aulas, grupos, clases, self.config)
+        model.availability.update(reservation["availability"])
+        return {"cursos": self.cursos, "profesores": profesores, "aulas": aulas, "grupos": grupos, "clases": clases, "model": model}
+
+    def solve(self, on_progress: callable = None, should_cancel: callable = None, seed_individuals: Optional[List[Horario]] = None) -> Optional[Horario]:
+        budget = float(self.config.get('time_budget') or 0)
+        self._deadline = time.perf_counter() + budget if budget else None
+        # Infactibilidad real se detecta sobre la instancia completa (las reservas podrían simularla)
+        if str(self.config.get('presolve', 1)).strip().lower() not in ('0', 'false', 'no'):
+            self.ga.presolve()
+
+        clusters = build_clusters(self.model, self.grupos, self.clases, self.max_clases)
+        if len(clusters) <= 1:
+            print("🧩 Descomposición: un solo cluster, se resuelve con el GA completo.")
+            self.stats = self.ga.stats
+
+            def on_ga_progress(generation, fitness):
+                self.best_individual = self.ga.best_individual
+                if on_progress:
+                    on_progress(generation, fitness)
+
+            best = self.ga.evolve(on_progress=on_ga_progress, should_cancel=should_cancel, seed_individuals=seed_individuals,
+                                  time_budget=self._budget_share(1))
+            self.best_individual = self.ga.best_individual
+            return best
+
+        reservations = reserve_resources(self.model, clusters, self.profesores, self.aulas)
+        subproblems = [self._subproblem(c, reservations[c.index]) for c in clusters]
+        self.stats["clusters"] = [len(c.clase_ids) for c in clusters]
+        print(f"🧩 Descomposición en {len(clusters)} clusters {self.stats['clusters']} ({self.num_workers} procesos)")
+
+        sub_config = dict(self.config, presolve=0)
+        base_seed = random.randrange(1 << 30)
+        ctx = multiprocessing.get_context()
+        results = ctx.Queue()
+        stops = [ctx.Event() for _ in clusters]
+        # Los procesos se crean al lanzarse: el presupuesto de cada cluster depende de cuándo arranca
+        procs: List[Optional[multiprocessing.Process]] = [None] * len(clusters)
+        total_waves = math.ceil(len(clusters) / self.num_workers)
+        launched = 0
+
+        partial: Dict[int, Optional[List[Sesion]]] = {}
+        latest: Dict[int, List[Sesion]] = {}   # mejor parcial enviado por cada cluster mientras corre
+        fitness: Dict[int, float] = {}
+        generation: Dict[int, int] = {}
+        errors: List[str] = []
+        waiting = list(range(len(clusters)))
+        running: Set[int] = set()
+        cancelled = False
+        try:
+            while waiting or running:
+                while waiting and len(running) < self.num_workers:
+                    idx = waiting.pop(0)
+                    # Lo que queda se reparte entre las tandas pendientes (incluida esta) y la reparación
+                    share = self._budget_share(total_waves - launched // self.num_workers + 1)
+                    run_config = sub_config if share is None else dict(sub_config, time_budget=share)
+                    procs[idx] = ctx.Process(target=_cluster_worker, args=(idx, base_seed + idx, subproblems[idx], run_config, results, stops[idx]), daemon=True)
+                    procs[idx].start()
+                    launched += 1
+                    running.add(idx)
+
+                try:
+                    msg = results.get(timeout=0.5)
+                except queue.Empty:
+                    msg = None
+
+                if msg and msg[0] == "best":
+                    # Con un parcial de cada cluster, la fusión es el mejor horario hasta el momento
+                    _, idx, sesiones = msg
+                    latest[idx] = sesiones
+                    merged = merge_partials(self.clases, latest, len(clusters))
+                    if merged is not None:
+                        merged.fitness = self.evaluator.evaluate(merged)
+                        self.best_individual = merged
+                elif msg and msg[0] == "progress":
+                    _, idx, gen, fit = msg
+                    fitness[idx], generation[idx] = fit, gen
+                    # Penalidades aditivas: el total aproxima el fitness del horario fusionado
+                    self.stats["generation"] = min(generation.get(i, 0) for i in range(len(clusters)))
+                    if on_progress:
+                        on_progress(self.stats["generation"], sum(fitness.values()))
+                elif msg and msg[0] == "done":
+                    _, idx, sesiones = msg
+                    partial[idx] = sesiones
+                    running.discard(idx)
+                elif msg and msg[0] == "error":
+                    _, idx, error = msg
+                    errors.append(f"Cluster {idx}: {error}")
+                    running.discard(idx)
+                elif msg is None:
+                    for idx in list(running):
+                        if not procs[idx].is_alive():
+                            errors.append(f"Cluster {idx} terminó sin resultado (exitcode {procs[idx].exitcode})")
+                            running.discard(idx)
+
+                if not cancelled and should_cancel and should_cancel():
+                    cancelled = True
+                    waiting.clear()
+                    for e in stops:
+                        e.set()
+        finally:
+            for e in stops:
+                e.set()
+            for p in procs:
+                if p is not None:
+                    p.join(timeout=5)
+                    if p.is_alive():
+                        p.terminate()
+
+        if cancelled:
+            # Los clusters devuelven su mejor parcial al detenerse (None si no llegaron a la primera
+            # generación: se usa el último enviado). Si están todos, la fusión queda como mejor hasta el momento
+            merged = merge_partials(self.clases, {**latest, **{i: s for i, s in partial.items() if s is not None}}, len(clusters))
+            if merged is not None:
+                merged.fitness = self.evaluator.evaluate(merged)
+                self.best_individual = merged
+            print("🛑 Decomposition cancelled by user.")
+            return None
+        if errors:
+            raise RuntimeError("Falló la resolución de clusters: " + "; ".join(errors))
+
+        # Fusión en el orden original de las clases
+        merged = merge_partials(self.clases, partial, len(clusters))
+        merged.fitness = self.evaluator.evaluate(merged)
+        report = self.evaluator.find_conflicts(merged)
+        print(f"🧩 Fusión: fitness {merged.fitness}, {len(report)} conflictos en la frontera")
+        if not report:
+            self.best_individual = merged
+            return merged
+        return self._repair(merged, report, on_progress, should_cancel)
+
+    def _repair(self, merged: Horario, report: ConflictReport, on_progress: callable, should_cancel: callable) -> Optional[Horario]:
+        """GA sembrado con el horario fusionado que solo muta las clases en conflicto."""
+        boundary: Set[int] = set()
+        for c in report:
+            boundary.update(c.sessions)
+            if c.tipo == MAX_HOURS:
+                boundary.update(i for i, s in enumerate(merged.sesiones) if s.profesor_id == c.resources[0])
+        self.stats["boundary_clases"] = len(boundary)
+
+        repair_config = dict(self.config, presolve=0, max_generations=self.repair_generations)
+        if self._deadline is not None:
+            # La reparación usa lo que dejaron los clusters (su parte reservada, más lo que no gastaron)
+            repair_config["time_budget"] = self._budget_share(1)
+        ga = GeneticAlgorithm(self.cursos, self.profesores, self.aulas, self.grupos, self.clases, repair_config, model=self.model)
+        ga.free_indices = sorted(boundary)
+        ga.fixed_sessions = {
+            s.clase_id: copy.copy(s) for i, s in enumerate(merged.sesiones) if i not in boundary
+        }
+        self.stats = dict(ga.stats, clusters=self.stats["clusters"], boundary_clases=len(boundary))
+        print(f"🔧 Reparación: {len(boundary)} clases de frontera, {self.repair_generations} generaciones")
+
+        def on_repair_progress(generation, fitness):
+            self.stats.update(ga.stats)
+            self.best_individual = ga.best_individual
+            if on_progress:
+                on_progress(generation, fitness)
+
+        best = ga.evolve(on_progress=on_repair_progress, should_cancel=should_cancel, seed_individuals=[merged])
+        self.best_individual = ga.best_individual or merged
+        return best
+
+    def get_conflicts(self, individual: Horario) -> List[str]:
+        return self.evaluator.get_conflicts(individual)
+
+    def find_conflicts(self, individual: Horario) -> ConflictReport:
+        return self.evaluator.find_conflicts(individual)
@@ -0,0 +1,131 @@
+import random
+from dataclasses import dataclass, field
+from typing import List, Dict, Tuple, Optional
+from .model import Profesor, Aula, Grupo, Clase
+from .constraints import ConstraintModel
+
+class Placements:
+    """
+    Pares (día, slot de inicio) de una sesión, indexados por día para muestrear en O(1).
+    early guarda el primer inicio de cada día (sesga hacia empezar temprano en el turno).
+    """
+    __slots__ = ("pairs", "by_day", "early")
+
+    def __init__(self, pairs: List[Tuple[int, int]]):
+        self.pairs = pairs
+        self.by_day: Dict[int, List[int]] = {}
+        for d, s in pairs:
+            self.by_day.setdefault(d, []).append(s)
+        self.early = [(d, starts[0]) for d, starts in self.by_day.items()]
+
+    def __bool__(self) -> bool:
+        return bool(self.pairs)
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def sample(self, early_bias: float = 0.0) -> Tuple[int, int]:
+        if early_bias and random.random() < early_bias:
+            return random.choice(self.early)
+        return random.choice(self.pairs)
+
+    def sample_start(self, dia_idx: int, early_bias: float = 0.0) -> Optional[int]:
+        """Nuevo inicio dentro del mismo día; None si ese día no tiene inicios legales."""
+        starts = self.by_day.get(dia_idx)
+        if not starts:
+            return None
+        if early_bias and random.random() < early_bias:
+            return starts[0]
+        return random.choice(starts)
+
+    def contains(self, dia_idx: int, start_slot: int) -> bool:
+        starts = self.by_day.get(dia_idx)
+        return bool(starts) and start_slot in starts
+
+@dataclass
+class ClaseDomain:
+    """
+    Dominio precomputado de una clase: profesores y aulas elegibles (aulas filtradas por
+    tipo y capacidad) y los (día, inicio) legales por profesor.
+    Niveles de colocación: en turno -> legales (sin break ni fuera de rango) -> cualquiera.
+    """
+    clase_id: str
+    num_slots: int
+    profs: List[str]
+    rooms: List[str]
+    pairs: List[Tuple[str, str]]                                            # (profesor, aula)
+    tiers: Dict[Optional[str], Tuple[Placements, Placements]] = field(default_factory=dict)  # profesor (None = sin restricción) -> (en turno, legales)
+    fallback: Placements = None
+
+    def placements(self, prof_id: str, in_turn: bool = True) -> Placements:
+        """Mejor nivel no vacío para el profesor (los profesores sin restricciones comparten el nivel None)."""
+        turn_tier, legal_tier = self.tiers.get(prof_id) or self.tiers[None]
+        if in_turn and turn_tier:
+            return turn_tier
+        return legal_tier or turn_tier or self.fallback
+
+    def legal_placements(self, prof_id: str) -> Placements:
+        """Solo el nivel legal (sin break, disponible), nunca el fallback: puede estar vacío."""
+        return (self.tiers.get(prof_id) or self.tiers[None])[1]
+
+def _legal_starts(model: ConstraintModel, num_slots: int) -> List[int]:
+    return [s for s in range(0, model.num_slots - num_slots + 1) if not model.hits_break(s, num_slots)]
+
+def build_domains(model: ConstraintModel, profesores: List[Profesor], aulas: List[Aula], grupos: List[Grupo], clases: List[Clase]) -> Dict[str, ClaseDomain]:
+    """
+    Enumera una sola vez, por clase, las colocaciones legales y los pares (profesor, aula)
+    elegibles, para que inicialización y mutación solo muestreen de listas.
+    Las listas de colocaciones se comparten entre clases con la misma
+    duración, turno y máscara de disponibilidad.
+    """
+    grupos_map = {g.id: g for g in grupos}
+    capacity = {a.id: a.capacidad for a in aulas}
+    all_rooms = [a.id for a in aulas]
+    default_prof = [profesores[0].id] if profesores else ["UNKNOWN"]
+    days = range(model.num_days)
+
+    tier_cache: Dict[tuple, Tuple[Placements, Placements]] = {}
+    fallback_cache: Dict[int, Placements] = {}
+
+    def tiers_for(num_slots: int, turno: str, prof_id: Optional[str]) -> Tuple[Placements, Placements]:
+        key = (num_slots, turno, prof_id)
+        if key not in tier_cache:
+            starts = _legal_starts(model, num_slots)
+            legal = [(d, s) for d in days for s in starts]
+            if prof_id is not None:
+                legal = [(d, s) for d, s in legal if model.prof_available(prof_id, d, s, num_slots)]
+            valid_range = model.turn_ranges.get(turno)
+            in_turn = []
+            if valid_range:
+                in_turn = [(d, s) for d, s in legal if s >= valid_range[0] and s + num_slots - 1 <= valid_range[1]]
+            tier_cache[key] = (Placements(in_turn), Placements(legal))
+        return tier_cache[key]
+
+    domains = {}
+    for clase in clases:
+        grupo = grupos_map[clase.grupo_id]
+        num_slots = clase.duracion_bloques
+
+        profs = list(model.eligible_profs.get(clase.curso_id, [])) or default_prof
+        typed_rooms = model.rooms_by_type.get(clase.tipo_aula, [])
+        rooms = [a for a in typed_rooms if capacity[a] >= grupo.num_estudiantes] or list(typed_rooms) or all_rooms[:1] or ["UNKNOWN"]
+
+        tiers = {None: tiers_for(num_slots, grupo.turno, None)}
+        for p in profs:
+            if p in model.availability:
+                tiers[p] = tiers_for(num_slots, grupo.turno, p)
+
+        if num_slots not in fallback_cache:
+            max_start = max(0, model.num_slots - num_slots)
+            fallback_cache[num_slots] = Placements([(d, s) for d in days for s in range(max_start + 1)])
+
+        domains[clase.id] = ClaseDomain(
+            clase_id=clase.id,
+            num_slots=num_slots,
+            profs=profs,
+            rooms=rooms,
+            pairs=[(p, a) for p in profs for a in rooms],
+            tiers=tiers,
+            fallback=fallback_cache[num_slots]
+        )
+    return domains
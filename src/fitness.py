@@ -1,51 +1,100 @@
-from typing import List, Dict, Set, Tuple
+from typing import List, Dict, Tuple, Optional
 from collections import defaultdict
-from .model import Curso, Profesor, Aula, Horario, Sesion, Grupo, Clase
+from dataclasses import dataclass
+from .model import Curso, Profesor, Aula, Horario, Grupo, Clase
+from .conflicts import ConflictReport, find_conflicts
+from .constraints import ConstraintModel, compile_constraints
+
+# Per-constraint counters of the single evaluation pass (order of the penalty terms tuple)
+BREAKDOWN_FIELDS = ("break", "bounds", "capacity", "availability", "prof", "room", "group", "max_hours", "turn", "early_start")
+HARD_FIELDS = ("bounds", "capacity", "availability", "prof", "room", "group", "max_hours")
+
+@dataclass
+class PenaltyBreakdown:
+    """Counts and weighted penalties per constraint; total equals the scalar fitness."""
+    counts: Dict[str, int]
+    penalties: Dict[str, float]
+
+    @property
+    def total(self) -> float:
+        return 0.0 - sum(self.penalties.values())
+
+    @property
+    def hard_violations(self) -> int:
+        return sum(self.counts[f] for f in HARD_FIELDS) + self.counts["break"]
+
+    def to_dict(self) -> Dict:
+        return {
+            "total": self.total,
+            "hard_violations": self.hard_violations,
+            "items": {f: {"count": self.counts[f], "penalty": self.penalties[f]} for f in BREAKDOWN_FIELDS}
+        }
 
 class FitnessEvaluator:
-    def __init__(self, cursos: List[Curso], profesores: List[Profesor], aulas: List[Aula], grupos: List[Grupo], clases: List[Clase], config: dict):
+    # Penalties
+    HARD_PENALTY = 5000
+    BREAK_PENALTY = 10000
+    SOFT_PENALTY = 10
+    EARLY_START_PENALTY = 5
+
+    def __init__(self, cursos: List[Curso], profesores: List[Profesor], aulas: List[Aula], grupos: List[Grupo], clases: List[Clase], config: dict, model: Optional[ConstraintModel] = None):
         self.cursos = {c.id: c for c in cursos}
         self.profesores = {p.id: p for p in profesores}
         self.aulas = {a.id: a for a in aulas}
         self.grupos = {g.id: g for g in grupos}
         self.clases = clases
+        self.clases_by_id = {c.id: c for c in clases}
         self.config = config
         
-        # Ranges definition
-        self.TURN_RANGES = {
-            "MAÑANA": (0, 7),
-            "TARDE": (7, 18),
-            "NOCHE": (13, 18),
-            "NOCHE_A": (13, 18),
-            "NOCHE_B": (13, 18)
-        }
+        # Shared compiled constraint indexes (ancestry, eligibility, room types, break mask)
+        self.model = model or compile_constraints(cursos, profesores, aulas, grupos, clases, config)
+        self.TURN_RANGES = self.model.turn_ranges
+        self.group_ancestry = self.model.ancestry_sets
+        self.group_root = self.model.group_root
         
-        self.group_ancestry = self._build_group_ancestry()
-
-    def _build_group_ancestry(self) -> Dict[str, Set[str]]:
-        children_map = {g_id: [] for g_id in self.grupos}
-        for g in self.grupos.values():
-            if g.parent_grupo_id:
-                children_map[g.parent_grupo_id].append(g.id)
-
-        related = {g_id: set() for g_id in self.grupos}
-        for g_id, group in self.grupos.items():
-            related[g_id].add(g_id)
-            curr = group
-            while curr.parent_grupo_id:
-                related[g_id].add(curr.parent_grupo_id)
-                curr = self.grupos[curr.parent_grupo_id]
-            
-            queue = [g_id]
-            while queue:
-                curr_id = queue.pop(0)
-                for child_id in children_map[curr_id]:
-                    related[g_id].add(child_id)
-                    queue.append(child_id)
-        return related
+        # clase_id -> grupo, precomputed once instead of per evaluation
+        self.class_group_map = {c.id: self.grupos[c.grupo_id] for c in clases}
+
+    # Objective components, in the order returned by objectives()
+    OBJECTIVES = ("hard", "break", "turn", "early_start")
+
+    def weights(self) -> Tuple[int, ...]:
+        # Penalty per unit of each BREAKDOWN_FIELDS counter
+        H = self.HARD_PENALTY
+        return (self.BREAK_PENALTY, H, H, H, H, H, H, H, self.SOFT_PENALTY, self.EARLY_START_PENALTY)
+
+    def score(self, terms: Tuple[int, ...]) -> float:
+        return 0.0 - sum(c * w for c, w in zip(terms, self.weights()))
 
     def evaluate(self, individual: Horario) -> float:
-        score = 0.0
+        return self.evaluate_terms(individual)[0]
+
+    def evaluate_terms(self, individual: Horario) -> Tuple[float, Tuple[int, ...]]:
+        """(fitness, per-constraint counters) from one pass; the GA keeps the counters on the individual."""
+        terms = self._penalty_terms(individual)
+        return self.score(terms), terms
+
+    def breakdown(self, individual: Horario) -> PenaltyBreakdown:
+        """Per-constraint breakdown, reusing the counters stored at evaluation time when present."""
+        terms = individual.penalties or self._penalty_terms(individual)
+        return PenaltyBreakdown(
+            counts=dict(zip(BREAKDOWN_FIELDS, terms)),
+            penalties={f: float(c * w) for f, c, w in zip(BREAKDOWN_FIELDS, terms, self.weights())}
+        )
+
+    def objectives(self, individual: Horario) -> Tuple[float, float, float, float]:
+        """
+        Weighted penalty per component (hard, break, turn, early_start), from the same
+        single pass as evaluate(): evaluate(ind) == -sum(objectives(ind)).
+        """
+        penalties = self.breakdown(individual).penalties
+        return (sum(penalties[f] for f in HARD_FIELDS), penalties["break"], penalties["turn"], penalties["early_start"])
+
+    def _penalty_terms(self, individual: Horario) -> Tuple[int, ...]:
+        # Unweighted counters in BREAKDOWN_FIELDS order
+        breaks = bounds = capacity = availability = 0
+        prof_clashes = room_clashes = group_clashes = 0
+        max_hours = out_of_turn_total = early_gap = 0
         
         # Build maps once
         prof_schedule = defaultdict(set)
@@ -54,19 +103,13 @@ class FitnessEvaluator:
         prof_hours = defaultdict(float)
         group_day_starts = defaultdict(lambda: defaultdict(list))
         
-        # Penalties
-        HARD_PENALTY = 5000
-        BREAK_PENALTY = 10000
-        SOFT_PENALTY = 10
-        EARLY_START_PENALTY = 5
-        
-        break_slots = set(self.config.get('break_slots', [6]))
-        total_slots = len(self.config.get('time_slots', []))
+        break_mask = self.model.break_mask
+        total_slots = self.model.num_slots
 
         # 1. Single Pass Loop for Per-Session Checks
         for sesion in individual.sesiones:
             # Metadata
-            clase = next((c for c in self.clases if c.id == sesion.clase_id), None)
+            clase = self.clases_by_id.get(sesion.clase_id)
             if not clase: continue # Should not happen
             
             group_id = clase.grupo_id
@@ -81,18 +124,23 @@ class FitnessEvaluator:
 
             # --- HARD CONSTRAINTS (Immediate Check) ---
             
-            # Break Overlap
-            for s in session_slots:
-                if s in break_slots:
-                    score -= BREAK_PENALTY
+            # Break Overlap (one bit test per session)
+            break_hits = (break_mask & self.model.span_mask(sesion.start_slot_idx, sesion.num_slots)).bit_count()
+            if break_hits:
+                breaks += break_hits
             
             # Bounds
             if sesion.start_slot_idx + sesion.num_slots > total_slots:
-                score -= HARD_PENALTY
+                bounds += 1
 
             # Room Capacity
             if aula.capacidad < grupo.num_estudiantes:
-                score -= HARD_PENALTY
+                capacity += 1
+
+            # Professor Availability (per slot outside the professor's availability mask)
+            unavailable = self.model.unavailable_slots(sesion.profesor_id, sesion.dia_idx, sesion.start_slot_idx, sesion.num_slots)
+            if unavailable:
+                availability += unavailable
 
             # --- RESOURCE CONFLICTS (Map Building) ---
             related_groups = self.group_ancestry.get(group_id, {group_id})
@@ -102,12 +150,12 @@ class FitnessEvaluator:
                 
                 # Professor Conflict
                 if sesion.profesor_id in prof_schedule[key]:
-                    score -= HARD_PENALTY
+                    prof_clashes += 1
                 prof_schedule[key].add(sesion.profesor_id)
                 
                 # Room Conflict
                 if sesion.aula_id in room_schedule[key]:
-                    score -= HARD_PENALTY
+                    room_clashes += 1
                 room_schedule[key].add(sesion.aula_id)
                 
                 # Group Hierarchical Conflict
@@ -120,7 +168,7 @@ class FitnessEvaluator:
                         conflict = True
                         break
                 if conflict:
-                    score -= HARD_PENALTY
+                    group_clashes += 1
                 group_schedule[key].add(group_id)
 
             # --- SOFT CONSTRAINTS (Turn Preference) ---
@@ -144,7 +192,7 @@ class FitnessEvaluator:
                 out_of_turn = sesion.num_slots - valid_count
                 
                 if out_of_turn > 0:
-                    score -= (out_of_turn * SOFT_PENALTY)
+                    out_of_turn_total += out_of_turn
 
         # 2. Post-Loop Checks
         
@@ -152,12 +200,11 @@ class FitnessEvaluator:
         for prof_id, total in prof_hours.items():
             max_h = self.profesores[prof_id].max_horas_semana
             if total > max_h:
-                score -= (total - max_h) * HARD_PENALTY
+                max_hours += total - max_h
                 
         # Early Start Preference
-        class_group_map = {c.id: self.grupos[c.grupo_id] for c in self.clases}
         for clase_id, days_data in group_day_starts.items():
-            group = class_group_map[clase_id]
+            group = self.class_group_map[clase_id]
             turn_start = 0
             if group.turno == 'TARDE': turn_start = 7
             elif 'NOCHE' in group.turno: turn_start = 13
@@ -166,78 +213,35 @@ class FitnessEvaluator:
                 if not starts: continue
                 first_class = min(starts)
                 if first_class > turn_start:
-                    gap = first_class - turn_start
-                    score -= gap * EARLY_START_PENALTY
+                    early_gap += first_class - turn_start
                     
-        return score
+        return (breaks, bounds, capacity, availability, prof_clashes, room_clashes, group_clashes,
+                int(max_hours), out_of_turn_total, early_gap)
+
+    def soft_placement_penalty(self, clase_id: str, start_slot_idx: int, num_slots: int) -> float:
+        """
+        Turn + early-start penalty of a single session placed at start_slot_idx
+        (same terms as evaluate() when the clase has one session that day).
+        Lets exact solvers price soft preferences per placement.
+        """
+        group = self.class_group_map[clase_id]
+        penalty = 0.0
+        if group.turno in self.TURN_RANGES:
+            turn_start, turn_end = self.TURN_RANGES[group.turno]
+            valid_count = max(0, min(turn_end, start_slot_idx + num_slots - 1) - max(turn_start, start_slot_idx) + 1)
+            penalty += (num_slots - valid_count) * self.SOFT_PENALTY
+
+        turn_start = 0
+        if group.turno == 'TARDE': turn_start = 7
+        elif 'NOCHE' in group.turno: turn_start = 13
+        if start_slot_idx > turn_start:
+            penalty += (start_slot_idx - turn_start) * self.EARLY_START_PENALTY
+        return penalty
+
+    def find_conflicts(self, individual: Horario) -> ConflictReport:
+        """Conflictos estructurados (tipo, recursos, sesiones, día, rango de slots)."""
+        return find_conflicts(self, individual)
 
     def get_conflicts(self, individual: Horario) -> List[str]:
-        conflicts = []
-        break_slots = set(self.config.get('break_slots', [6]))
-        total_slots = len(self.config.get('time_slots', []))
-        
-        prof_schedule = defaultdict(set) # (dia, slot) -> Set[(prof_id, curso_nombre)]
-        room_schedule = defaultdict(set) # (dia, slot) -> Set[(aula_id, curso_nombre)]
-        group_schedule = defaultdict(set) # (dia, slot) -> Set[(group_id, curso_nombre)]
-        prof_hours = defaultdict(float)
-
-        # Iterate
-        for sesion in individual.sesiones:
-            clase = next(c for c in self.clases if c.id == sesion.clase_id)
-            curso = self.cursos[clase.curso_id]
-            grupo = self.grupos[clase.grupo_id]
-            profesor = self.profesores[sesion.profesor_id]
-            aula = self.aulas[sesion.aula_id]
-            
-            session_slots = range(sesion.start_slot_idx, sesion.start_slot_idx + sesion.num_slots)
-            
-            prof_hours[sesion.profesor_id] += sesion.num_slots
-            
-            # Break
-            for s in session_slots:
-                if s in break_slots:
-                    conflicts.append(f"BREAK CONFLICT: {curso.nombre} (Group {grupo.id}) overlaps with break at slot {s}.")
-                    break
-            
-            # Bounds
-            if sesion.start_slot_idx + sesion.num_slots > total_slots:
-                conflicts.append(f"BOUNDS CONFLICT: {curso.nombre} (Group {grupo.id}) goes out of time bounds.")
-
-            # Capacity
-            if aula.capacidad < grupo.num_estudiantes:
-                conflicts.append(f"CAPACITY CONFLICT: {aula.nombre} ({aula.capacidad}) too small for {grupo.id} ({grupo.num_estudiantes})")
-            
-            related_groups = self.group_ancestry.get(grupo.id, {grupo.id})
-
-            for slot in session_slots:
-                key = (sesion.dia_idx, slot)
-                time_str = f"Day {sesion.dia_idx} Slot {slot}"
-                
-                # Check Maps
-                # Prof
-                # To provide detailed error, we check who is there
-                # prof_schedule[key] contains tuples (prof_id, curso_nome)
-                for p_id, c_name in prof_schedule[key]:
-                    if p_id == sesion.profesor_id:
-                        conflicts.append(f"PROF CONFLICT: {profesor.nombre} has {curso.nombre} and {c_name} at {time_str}")
-                prof_schedule[key].add((sesion.profesor_id, curso.nombre))
-                
-                # Room
-                for r_id, c_name in room_schedule[key]:
-                    if r_id == sesion.aula_id:
-                        conflicts.append(f"ROOM CONFLICT: {aula.nombre} has {curso.nombre} and {c_name} at {time_str}")
-                room_schedule[key].add((sesion.aula_id, curso.nombre))
-                
-                # Group
-                for g_id, c_name in group_schedule[key]:
-                    if g_id in related_groups:
-                        conflicts.append(f"GROUP CONFLICT: Group {grupo.id} conflicts with {g_id} ({c_name}) at {time_str}")
-                group_schedule[key].add((grupo.id, curso.nombre))
-
-        # Max Hours
-        for prof_id, total in prof_hours.items():
-            max_h = self.profesores[prof_id].max_horas_semana
-            if total > max_h:
-                conflicts.append(f"MAX HOURS CONFLICT: {self.profesores[prof_id].nombre} assigned {total} slots, limit {max_h}")
-
-        return list(set(conflicts))
+        """Mensajes de texto de los conflictos (uno por solape, no uno por slot)."""
+        return self.find_conflicts(individual).messages()
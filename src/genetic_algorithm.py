@@ -1,10 +1,19 @@
+import math
 import random
 import copy
-from typing import List, Dict, Set
-from collections import defaultdict
+import heapq
+import time
+from contextlib import nullcontext
+from typing import List, Dict, Optional
+from collections import OrderedDict
 from concurrent.futures import ProcessPoolExecutor
 from .model import Curso, Profesor, Aula, Horario, Sesion, Grupo, Clase
 from .fitness import FitnessEvaluator
+from .conflicts import ConflictReport
+from .constraints import ConstraintModel, compile_constraints
+from .domains import build_domains
+from .presolve import PresolveResult, InfeasibleInstanceError, presolve as presolve_domains
+from .checkpoint import GACheckpoint, Checkpointer
 
 # --- Parallel Execution Helpers ---
 _worker_evaluator = None
@@ -15,215 +24,433 @@ def _init_worker(evaluator):
     _worker_evaluator = evaluator
 
 def _evaluate_wrapper(individual):
-    """Función top-level para evaluar individuo usando el evaluador global del worker."""
+    """
+    Función top-level para evaluar individuo usando el evaluador global del worker.
+    Devuelve (fitness, contadores por restricción, segundos de CPU-evaluación): los contadores
+    viajan con el fitness (sin segunda pasada para el desglose) y el tiempo mide la utilización del pool.
+    """
+    start = time.perf_counter()
     if _worker_evaluator:
-         # El método evaluate devuelve un float
-        return _worker_evaluator.evaluate(individual)
-    return -999999.0
+        fitness, terms = _worker_evaluator.evaluate_terms(individual)
+    else:
+        fitness, terms = -999999.0, None
+    return fitness, terms, time.perf_counter() - start
 
 class GeneticAlgorithm:
-    def __init__(self, cursos: List[Curso], profesores: List[Profesor], aulas: List[Aula], grupos: List[Grupo], clases: List[Clase], config: dict):
+    TOURNAMENT_SIZE = 5
+    # evolve() saves self.checkpointer periodically and accepts resume_from
+    SUPPORTS_CHECKPOINTS = True
+
+    def __init__(self, cursos: List[Curso], profesores: List[Profesor], aulas: List[Aula], grupos: List[Grupo], clases: List[Clase], config: dict, model: Optional[ConstraintModel] = None):
         self.cursos = {c.id: c for c in cursos}
         self.profesores = {p.id: p for p in profesores}
         self.aulas = {a.id: a for a in aulas}
         self.grupos = {g.id: g for g in grupos}
         self.clases = clases
+        self.clases_by_id = {c.id: c for c in clases}
         self.config = config
         self.population: List[Horario] = []
+        self.best_individual: Optional[Horario] = None
+        self.num_workers = 4
         
-        # Initialize Evaluator
-        self.evaluator = FitnessEvaluator(cursos, profesores, aulas, grupos, clases, config)
-
-        # Access constants from evaluator or define locally if needed for mutations
-        # We need TURN_RANGES for mutation/init
-        self.TURN_RANGES = self.evaluator.TURN_RANGES
+        # Instrumentación (leída por la API para /metrics)
+        self.stats = {"generation": 0, "generations_per_sec": 0.0, "pool_utilization": 0.0}
         
-        # Pre-process eligible professors per course for fast lookup (Optimized for Init/Mutation)
-        self.course_professors = {c.id: c.profesores_ids for c in cursos}
+        # Compiled constraint model shared with the evaluator (and the offline scripts)
+        self.model = model or compile_constraints(cursos, profesores, aulas, grupos, clases, config)
         
-        # Pre-process classrooms by type
-        self.classrooms_by_type = {}
-        for a in aulas:
-            if a.tipo not in self.classrooms_by_type:
-                self.classrooms_by_type[a.tipo] = []
-            self.classrooms_by_type[a.tipo].append(a.id)
-
-    def initialize_population(self):
+        # Initialize Evaluator
+        self.evaluator = FitnessEvaluator(cursos, profesores, aulas, grupos, clases, config, model=self.model)
+
+        # Per-clase domains: eligible (prof, room) pairs and legal (day, start) placements (O(1) sampling)
+        self.domains = build_domains(self.model, profesores, aulas, grupos, clases)
+
+        # Pre-solve state: forced sessions are copied as-is, only free genes are mutated
+        self.presolve_result: Optional[PresolveResult] = None
+        self.fixed_sessions: Dict[str, Sesion] = {}
+        self.free_indices: List[int] = list(range(len(clases)))
+
+        # Periodic checkpoints (population + generation + RNG) so an interrupted run can resume
+        self.checkpointer: Optional[Checkpointer] = None
+        # Start of the time-budget clock, shifted back by the seconds spent before a resume
+        self._budget_start: Optional[float] = None
+        # EMA of the wall time of one generation; checkpointed so a resume keeps the measured rate
+        self._gen_seconds = 0.0
+
+        # Bounded LRU fitness cache keyed by the genome hash: elites and converged duplicates skip evaluation
+        self.cache_size = int(config.get('fitness_cache_size', 4096))
+        self.fitness_cache: "OrderedDict[int, tuple]" = OrderedDict()
+        self.cache_lookups = 0
+        self.cache_hits = 0
+        self.stats["cache_hit_rate"] = 0.0
+
+    def presolve(self) -> PresolveResult:
+        """
+        Forced assignments + propagation over the domains before evolving.
+        Raises InfeasibleInstanceError when the instance can never reach fitness 0.
+        """
+        result = presolve_domains(self.model, self.domains, list(self.cursos), list(self.profesores.values()),
+                                  list(self.aulas.values()), list(self.grupos.values()), self.clases)
+        for warning in result.warnings:
+            print(f"⚠️ Pre-solve: {warning}")
+        if not result.feasible:
+            self.presolve_result = result
+            raise InfeasibleInstanceError(result.reasons)
+
+        self.apply_presolve(result)
+        print(f"🧩 Pre-solve: {len(result.fixed)} clases fijadas, {len(self.free_indices)} libres, "
+              f"{result.stats['pruned_placements']} colocaciones podadas")
+        return result
+
+    def apply_presolve(self, result: PresolveResult):
+        # Reuse a pre-solve computed elsewhere (e.g. by the racing parent) without running it again
+        self.presolve_result = result
+        self.domains = result.domains
+        self.fixed_sessions = result.fixed
+        self.free_indices = [i for i, c in enumerate(self.clases) if c.id not in result.fixed]
+
+    def initialize_population(self, seed_individuals: Optional[List[Horario]] = None):
         self.population = []
-        for _ in range(self.config['population_size']):
+        seeds = [copy.deepcopy(ind) for ind in (seed_individuals or [])][:self.config['population_size']]
+        self.population.extend(seeds)
+        # Seeded runs: half the rest are mutated copies of the seeds (stay close to them), half random
+        num_mutants = (self.config['population_size'] - len(seeds)) // 2 if seeds else 0
+        for _ in range(num_mutants):
+            individual = copy.deepcopy(random.choice(seeds))
+            self.mutation(individual)
+            self.population.append(individual)
+        while len(self.population) < self.config['population_size']:
             individual = self._create_random_individual()
             self.population.append(individual)
 
     def _create_random_individual(self) -> Horario:
         sesiones = []
-        total_slots = len(self.config['time_slots'])
-        break_slots = self.config.get('break_slots', [6])
-        first_break_idx = break_slots[0] if break_slots else -1
-
         for clase in self.clases:
-            # 1. Assign Professor
-            eligible_profs = self.course_professors.get(clase.curso_id, [])
-            if not eligible_profs:
-                # Fallback
-                prof_id = list(self.profesores.keys())[0] if self.profesores else "UNKNOWN"
-            else:
-                prof_id = random.choice(eligible_profs)
+            fixed = self.fixed_sessions.get(clase.id)
+            if fixed:
+                sesiones.append(copy.copy(fixed))
+                continue
+            domain = self.domains[clase.id]
 
-            # 2. Assign Classroom
-            eligible_rooms = self.classrooms_by_type.get(clase.tipo_aula, [])
-            if not eligible_rooms:
-                # Fallback
-                aula_id = list(self.aulas.keys())[0] if self.aulas else "UNKNOWN"
-            else:
-                aula_id = random.choice(eligible_rooms)
+            # 1. Assign Professor + Classroom (eligible pair, room filtered by type and capacity)
+            prof_id, aula_id = random.choice(domain.pairs)
 
-            # 3. Assign Time Slot
-            num_slots = clase.duracion_bloques
-            num_days = len(self.config['days'])
-            
-            dia_idx = random.randint(0, num_days - 1)
-            
-            grupo = self.grupos[clase.grupo_id]
-            valid_range = self.TURN_RANGES.get(grupo.turno)
-            
-            # --- INTELLIGENT INITIALIZATION FOR LONG CLASSES ---
-            is_long_morning = (grupo.turno == "MAÑANA" and num_slots >= 5)
-            
-            if is_long_morning and first_break_idx >= 0:
-                if num_slots <= first_break_idx:
-                     start_slot_idx = 0
-                else:
-                    start_slot_idx = 0
-            
-            elif valid_range and random.random() < 0.9: 
-                start, end = valid_range
-                effective_end = end - num_slots + 1 
-                if effective_end > start:
-                    if random.random() < 0.5:
-                        start_slot_idx = start
-                    else:
-                        start_slot_idx = random.randint(start, effective_end)
-                else:
-                    start_slot_idx = random.randint(0, max(0, total_slots - num_slots))
-            else:
-                start_slot_idx = random.randint(0, max(0, total_slots - num_slots))
-            
-            sesion = Sesion(
+            # 2. Assign Time Slot: legal placement for this professor, mostly in turn, biased to early starts
+            placements = domain.placements(prof_id, in_turn=random.random() < 0.9)
+            dia_idx, start_slot_idx = placements.sample(early_bias=0.5)
+
+            sesiones.append(Sesion(
                 clase_id=clase.id,
                 profesor_id=prof_id,
                 aula_id=aula_id,
                 dia_idx=dia_idx,
                 start_slot_idx=start_slot_idx,
-                num_slots=num_slots
-            )
-            sesiones.append(sesion)
+                num_slots=domain.num_slots
+            ))
             
         return Horario(sesiones=sesiones)
 
+    def _timed_evaluate(self, individual: Horario) -> tuple:
+        # Same (fitness, terms, seconds) contract as _evaluate_wrapper, without the pool
+        start = time.perf_counter()
+        fitness, terms = self.evaluator.evaluate_terms(individual)
+        return fitness, terms, time.perf_counter() - start
+
     def calculate_fitness(self, individual: Horario) -> float:
         # Delegate to FitnessEvaluator (used for serialfallback or init)
-        individual.fitness = self.evaluator.evaluate(individual)
+        individual.fitness, individual.penalties = self.evaluator.evaluate_terms(individual)
         return individual.fitness
 
     def get_conflicts(self, individual: Horario) -> List[str]:
         # Delegate to FitnessEvaluator
         return self.evaluator.get_conflicts(individual)
 
-    def selection(self) -> Horario:
-        # Tournament Selection
-        tournament_size = 5
-        tournament = random.sample(self.population, tournament_size)
-        return max(tournament, key=lambda x: x.fitness)
-
-    def crossover(self, parent1: Horario, parent2: Horario) -> Horario:
-        # Uniform Crossover
-        if random.random() > self.config['crossover_rate']:
-            return copy.deepcopy(parent1)
-            
-        child_sesiones = []
-        for i in range(len(parent1.sesiones)):
-            if random.random() < 0.5:
-                child_sesiones.append(copy.deepcopy(parent1.sesiones[i]))
-            else:
-                child_sesiones.append(copy.deepcopy(parent2.sesiones[i]))
-        
-        return Horario(sesiones=child_sesiones)
+    def find_conflicts(self, individual: Horario) -> ConflictReport:
+        # Structured conflicts (text rendered on demand)
+        return self.evaluator.find_conflicts(individual)
 
     def mutation(self, individual: Horario):
-        break_slots = self.config.get('break_slots', [6])
-        first_break_idx = break_slots[0] if break_slots else -1
-
-        for i in range(len(individual.sesiones)):
+        # Counters from a previous evaluation no longer describe this individual
+        individual.penalties = None
+        # Fixed genes (pre-solve) never change
+        for i in self.free_indices:
             if random.random() < self.config['mutation_rate']:
-                attr = random.choice(['dia', 'slot', 'aula', 'profesor'])
                 sesion = individual.sesiones[i]
-                clase = next(c for c in self.clases if c.id == sesion.clase_id)
-                
-                if attr == 'dia':
-                    sesion.dia_idx = random.randint(0, len(self.config['days']) - 1)
-                elif attr == 'slot':
-                    max_slot = len(self.config['time_slots']) - sesion.num_slots
-                    grupo = self.grupos[clase.grupo_id]
-                    valid_range = self.TURN_RANGES.get(grupo.turno)
-                    
-                    is_long_morning = (grupo.turno == "MAÑANA" and sesion.num_slots >= 5)
+                gene = (sesion.profesor_id, sesion.aula_id, sesion.dia_idx, sesion.start_slot_idx)
+                sesion.profesor_id, sesion.aula_id, sesion.dia_idx, sesion.start_slot_idx = \
+                    self._mutate_gene(self.domains[sesion.clase_id], gene, sesion.num_slots)
 
-                    if is_long_morning and first_break_idx >= 0 and random.random() < 0.8:
-                        sesion.start_slot_idx = 0
-                    
-                    elif valid_range and random.random() < 0.8: 
-                        start, end = valid_range
-                        effective_end = end - sesion.num_slots + 1
-                        if effective_end > start:
-                            safe_start = max(0, start)
-                            safe_end = min(max_slot, effective_end)
-                            if safe_end >= safe_start:
-                                if random.random() < 0.5:
-                                    sesion.start_slot_idx = safe_start
-                                else:
-                                    sesion.start_slot_idx = random.randint(safe_start, safe_end)
-                            else:
-                                sesion.start_slot_idx = random.randint(0, max(0, max_slot))
-                        else:
-                            sesion.start_slot_idx = random.randint(0, max(0, max_slot))
-                    else:
-                        sesion.start_slot_idx = random.randint(0, max(0, max_slot))
-                elif attr == 'aula':
-                    eligible_rooms = self.classrooms_by_type.get(clase.tipo_aula, [])
-                    if eligible_rooms:
-                        sesion.aula_id = random.choice(eligible_rooms)
-                elif attr == 'profesor':
-                    eligible_profs = self.course_professors.get(clase.curso_id, [])
-                    if eligible_profs:
-                        sesion.profesor_id = random.choice(eligible_profs)
-
-    def evolve(self, on_progress: callable = None, should_cancel: callable = None):
-        self.initialize_population()
+    def _mutate_gene(self, domain, gene: tuple, num_slots: int) -> tuple:
+        # One mutation move on an immutable (prof, room, day, start) gene
+        prof_id, aula_id, dia_idx, start_slot_idx = gene
+        attr = random.choice(['dia', 'slot', 'aula', 'profesor'])
+
+        if attr == 'dia':
+            # New day, keeping the start slot when it is still legal there
+            placements = domain.placements(prof_id)
+            new_dia, new_start = placements.sample()
+            if placements.contains(new_dia, start_slot_idx):
+                new_start = start_slot_idx
+            dia_idx, start_slot_idx = new_dia, new_start
+        elif attr == 'slot':
+            # New start on the same day (mostly in turn); move the day only if it has none
+            placements = domain.placements(prof_id, in_turn=random.random() < 0.8)
+            new_start = placements.sample_start(dia_idx, early_bias=0.5)
+            if new_start is None:
+                dia_idx, new_start = placements.sample(early_bias=0.5)
+            start_slot_idx = new_start
+        elif attr == 'aula':
+            aula_id = random.choice(domain.rooms)
+        elif attr == 'profesor':
+            # Prefer professors available at the current placement
+            available_profs = [
+                p for p in domain.profs
+                if self.model.prof_available(p, dia_idx, start_slot_idx, num_slots)
+            ]
+            prof_id = random.choice(available_profs or domain.profs)
+            if not available_profs:
+                dia_idx, start_slot_idx = domain.placements(prof_id).sample()
+        return (prof_id, aula_id, dia_idx, start_slot_idx)
+
+    def _mutation_positions(self, rate: float) -> List[int]:
+        # Geometric skips between mutated genes: one random draw per mutation instead of one per gene
+        free = self.free_indices
+        if rate <= 0:
+            return []
+        if rate >= 1:
+            return list(free)
+        positions, k, log_q = [], -1, math.log(1.0 - rate)
+        while True:
+            k += 1 + int(math.log(1.0 - random.random()) / log_q)
+            if k >= len(free):
+                return positions
+            positions.append(free[k])
+
+    @staticmethod
+    def encode_genome(individual: Horario) -> tuple:
+        # Sessions follow the clase order, so the placements alone identify the genome
+        return tuple((s.profesor_id, s.aula_id, s.dia_idx, s.start_slot_idx) for s in individual.sesiones)
+
+    @staticmethod
+    def decode_genome(genes, shape: List[tuple]) -> Horario:
+        # shape: (clase_id, num_slots) per position; every child gets its own Sesion objects
+        return Horario(sesiones=[Sesion(c, p, a, d, s, n) for (c, n), (p, a, d, s) in zip(shape, genes)])
+
+    @classmethod
+    def genome_key(cls, individual: Horario) -> int:
+        return hash(cls.encode_genome(individual))
+
+    def reproduce(self, pop_size: int, fits: Optional[List[float]] = None) -> List[Horario]:
+        """
+        Batched reproduction: builds the whole next generation from the encoded parents.
+        fits is the fitness list aligned with the population (the population is never sorted):
+        elites come from a top-k heap selection.
+        Tournament entrants of every parent come from a single draw, uniform crossover uses
+        one random bitmask per child and mutation positions are drawn by geometric skips.
+        Genes are immutable tuples shared by parents and children, so there is no deepcopy:
+        each child materializes its Sesion objects once.
+        Pure Python on purpose: genes are tuples of ids, and numpy only comes in transitively
+        (OR-Tools, pandas), so vectorizing would first need an integer re-encoding of every genome.
+        """
+        population = self.population
+        n = len(population)
+        genomes = [self.encode_genome(ind) for ind in population]
+        if fits is None:
+            fits = [ind.fitness for ind in population]
+        shape = [(s.clase_id, s.num_slots) for s in population[0].sesiones]
+
+        new_population = []
+        for i in heapq.nlargest(min(self.config['elitism_count'], pop_size), range(n), key=fits.__getitem__):
+            elite = self.decode_genome(genomes[i], shape)
+            elite.fitness, elite.penalties = population[i].fitness, population[i].penalties
+            new_population.append(elite)
+
+        num_children = pop_size - len(new_population)
+        k = min(self.TOURNAMENT_SIZE, n)
+        entrants = random.choices(range(n), k=2 * num_children * k)
+        winners = [max(entrants[j:j + k], key=fits.__getitem__) for j in range(0, len(entrants), k)]
+        new_population.extend(self.breed(genomes, [(winners[2 * c], winners[2 * c + 1]) for c in range(num_children)], shape))
+        return new_population
+
+    def breed(self, genomes: List[tuple], parents: List[tuple], shape: List[tuple]) -> List[Horario]:
+        # One child per (parent1, parent2) index pair: uniform crossover by bitmask, then skip-sampled mutation
+        length = len(shape)
+        crossover_rate = self.config['crossover_rate']
+        mutation_rate = self.config['mutation_rate']
+        children = []
+        for p1, p2 in parents:
+            parent1, parent2 = genomes[p1], genomes[p2]
+            if random.random() > crossover_rate:
+                genes = list(parent1)
+            else:
+                mask = format(random.getrandbits(length), f'0{length}b')
+                genes = [g1 if bit == '1' else g2 for g1, g2, bit in zip(parent1, parent2, mask)]
+            for i in self._mutation_positions(mutation_rate):
+                clase_id, num_slots = shape[i]
+                genes[i] = self._mutate_gene(self.domains[clase_id], genes[i], num_slots)
+            children.append(self.decode_genome(genes, shape))
+        return children
+
+    def _apply_cache(self, population: List[Horario]) -> tuple:
+        """
+        Fills fitness from the cache and collapses duplicates within the generation.
+        Returns (indices to evaluate, one per distinct genome; [(duplicate, representative)]; keys).
+        """
+        keys = [self.genome_key(ind) for ind in population]
+        pending, duplicates, first = [], [], {}
+        cache = self.fitness_cache
+        for i, key in enumerate(keys):
+            cached = cache.get(key)
+            if cached is not None:
+                cache.move_to_end(key)
+                population[i].fitness, population[i].penalties = cached
+            elif key in first:
+                duplicates.append((i, first[key]))
+            else:
+                first[key] = i
+                pending.append(i)
+        self.cache_lookups += len(population)
+        self.cache_hits += len(population) - len(pending)
+        self.stats["cache_hit_rate"] = self.cache_hits / self.cache_lookups
+        return pending, duplicates, keys
+
+    def _store_cache(self, key: int, fitness: float, terms: tuple):
+        self.fitness_cache[key] = (fitness, terms)
+        if len(self.fitness_cache) > self.cache_size:
+            self.fitness_cache.popitem(last=False)
+
+    def checkpoint(self, generation: int) -> GACheckpoint:
+        # State at the start of `generation` (before evaluation, which never touches the RNG)
+        meta = {"gen_seconds": self._gen_seconds}
+        if self._budget_start is not None:
+            meta["budget_elapsed"] = time.perf_counter() - self._budget_start
+        return GACheckpoint(
+            generation=generation,
+            fingerprint=self.model.fingerprint,
+            population=self.population,
+            best=self.best_individual,
+            rng_state=random.getstate(),
+            meta=meta
+        )
+
+    def solve(self, on_progress: callable = None, should_cancel: callable = None, seed_individuals: Optional[List[Horario]] = None, resume_from: Optional[GACheckpoint] = None):
+        # Common engine interface (see src/solvers.py)
+        return self.evolve(on_progress=on_progress, should_cancel=should_cancel, seed_individuals=seed_individuals, resume_from=resume_from)
+
+    def _budget_population_size(self, remaining: float, gens_left: int, gen_seconds: float, pop_size: int) -> int:
+        # Cost per individual per generation (evaluation + reproduction) is roughly linear in the population
+        if gens_left <= 0 or gen_seconds <= 0:
+            return pop_size
+        per_individual = gen_seconds / pop_size
+        min_pop = max(int(self.config.get('min_population_size', 20)), self.config['elitism_count'] + 2)
+        max_pop = int(self.config.get('max_population_size', 2 * self.config['population_size']))
+        target = int(remaining / (gens_left * per_individual))
+        return max(min_pop, min(max_pop, target))
+
+    def evolve(self, on_progress: callable = None, should_cancel: callable = None, seed_individuals: Optional[List[Horario]] = None, resume_from: Optional[GACheckpoint] = None, time_budget: Optional[float] = None):
+        if resume_from is not None and resume_from.fingerprint != self.model.fingerprint:
+            raise ValueError("Los datos cambiaron desde el checkpoint; no se puede reanudar la corrida")
+        if str(self.config.get('presolve', 1)).strip().lower() not in ('0', 'false', 'no'):
+            self.presolve()
+
+        start_gen = 0
+        if resume_from is not None:
+            # Continue exactly where the checkpoint left off (same population and RNG stream)
+            self.population = resume_from.population
+            self.best_individual = resume_from.best
+            if resume_from.rng_state is not None:
+                random.setstate(resume_from.rng_state)
+            start_gen = resume_from.generation
+            print(f"⏯️ Reanudando desde la generación {start_gen}")
+        else:
+            self.initialize_population(seed_individuals)
         
         max_gens = self.config['max_generations']
+        pop_size = len(self.population)
+
+        # Wall-clock budget in seconds (0 = none): stops on time and resizes the population
+        # so the remaining generations fit, based on the measured seconds per generation
+        budget = float(time_budget if time_budget is not None else (self.config.get('time_budget') or 0))
+        self._gen_seconds = float(resume_from.meta.get("gen_seconds", 0.0)) if resume_from is not None else 0.0
+        evaluations = 0
+        chunksize = 1
 
         # Import local to avoid top-level overhead if not used
-        print(f"🚀 Iniciando evolución paralela con 4 workers...")
+        # num_workers <= 1: serial evaluation in this process (e.g. one racing run per core)
+        serial = self.num_workers <= 1
+        if serial:
+            print("🚀 Iniciando evolución serial...")
+        else:
+            print(f"🚀 Iniciando evolución paralela con {self.num_workers} workers...")
         
-        with ProcessPoolExecutor(max_workers=4, initializer=_init_worker, initargs=(self.evaluator,)) as executor:
+        # The evaluator may have been swapped since the last run (e.g. re-scheduling): start with a cold cache
+        self.fitness_cache.clear()
+        use_cache = self.cache_size > 0
+
+        evolve_start = time.perf_counter()
+        # The budget covers the whole job: a resumed run only gets what the previous attempts left over
+        budget_elapsed = float(resume_from.meta.get("budget_elapsed", 0.0)) if resume_from is not None else 0.0
+        self._budget_start = evolve_start - budget_elapsed
+        busy_time = 0.0
+        pool = nullcontext() if serial else ProcessPoolExecutor(max_workers=self.num_workers, initializer=_init_worker, initargs=(self.evaluator,))
+        with pool as executor:
             
-            for generation in range(max_gens):
+            stopped = False
+            for generation in range(start_gen, max_gens):
+                gen_start = time.perf_counter()
                 # Check Cancellation
                 if should_cancel and should_cancel():
                     print("🛑 Genetic Algorithm cancelled by user.")
                     return None
 
+                if self.checkpointer and generation != start_gen and self.checkpointer.due(generation):
+                    self.checkpointer.save(self.checkpoint(generation), self.clases)
+
+                # Cache lookup before dispatch: only distinct, unseen genomes go to the pool
+                if use_cache:
+                    pending, duplicates, keys = self._apply_cache(self.population)
+                    to_evaluate = [self.population[i] for i in pending]
+                else:
+                    pending, duplicates, keys = range(len(self.population)), [], None
+                    to_evaluate = self.population
+
                 # PARALLEL FITNESS EVALUATION
                 # Map returns results in order
-                results = list(executor.map(_evaluate_wrapper, self.population))
+                if serial:
+                    results = [self._timed_evaluate(ind) for ind in to_evaluate]
+                else:
+                    results = list(executor.map(_evaluate_wrapper, to_evaluate, chunksize=chunksize))
                 
                 # Assign fitness back to individuals
-                for ind, fit in zip(self.population, results):
+                for i, (fit, terms, elapsed) in zip(pending, results):
+                    ind = self.population[i]
                     ind.fitness = fit
+                    ind.penalties = terms
+                    busy_time += elapsed
+                    if use_cache:
+                        self._store_cache(keys[i], fit, terms)
+                for i, rep in duplicates:
+                    self.population[i].fitness = self.population[rep].fitness
+                    self.population[i].penalties = self.population[rep].penalties
+                evaluations += len(results)
+
+                # Evaluation batching: chunks of ~20 ms of work amortize the IPC cost of cheap evaluations
+                if not serial and busy_time > 0 and results:
+                    per_eval = busy_time / evaluations
+                    chunksize = max(1, min(math.ceil(len(results) / self.num_workers), int(0.02 / per_eval)))
+                self.stats["chunksize"] = chunksize
+                
+                # Utilización acumulada: incluye el tiempo en que los workers esperan la reproducción serial
+                elapsed_total = time.perf_counter() - evolve_start
+                self.stats["generation"] = generation
+                if elapsed_total > 0:
+                    self.stats["generations_per_sec"] = (generation + 1 - start_gen) / elapsed_total
+                    self.stats["pool_utilization"] = min(1.0, busy_time / (elapsed_total * max(1, self.num_workers)))
                 
-                # Sort to find best
-                self.population.sort(key=lambda x: x.fitness, reverse=True)
-                best_fitness = self.population[0].fitness
+                # Flat fitness list aligned with the population: argmax for the best, no full sort
+                fits = [ind.fitness for ind in self.population]
+                self.best_individual = self.population[max(range(len(fits)), key=fits.__getitem__)]
+                best_fitness = self.best_individual.fitness
                 
                 # Update Progress every 5 generations or first/last
                 if on_progress and (generation % 5 == 0 or generation == max_gens - 1):
@@ -234,28 +461,48 @@ class GeneticAlgorithm:
                     
                 if best_fitness == 0: 
                     print("Solution found!")
+                    stopped = True
                     break
 
-                new_population = []
-                
-                # Elitism
-                new_population.extend(copy.deepcopy(self.population[:self.config['elitism_count']]))
-                
-                # Generate rest
-                while len(new_population) < self.config['population_size']:
-                    parent1 = self.selection()
-                    parent2 = self.selection()
-                    child = self.crossover(parent1, parent2)
-                    self.mutation(child)
-                    new_population.append(child)
-                
-                self.population = new_population
+                if budget and time.perf_counter() - self._budget_start >= budget:
+                    print(f"⏱️ Presupuesto de {budget:.0f}s agotado en la generación {generation}")
+                    if on_progress:
+                        on_progress(generation, best_fitness)
+                    stopped = True
+                    break
+
+                # Elitism + selection, crossover and mutation of the whole generation in one batch
+                self.population = self.reproduce(pop_size, fits)
+
+                # Rate-aware scheduling: ETA from the recent generation time, population resized to the budget
+                duration = time.perf_counter() - gen_start
+                self._gen_seconds = duration if self._gen_seconds == 0 else 0.7 * self._gen_seconds + 0.3 * duration
+                gens_left = max_gens - generation - 1
+                elapsed_total = time.perf_counter() - evolve_start
+                eta = gens_left * self._gen_seconds
+                if budget:
+                    budget_elapsed = time.perf_counter() - self._budget_start
+                    remaining = max(0.0, budget - budget_elapsed)
+                    eta = min(eta, remaining)
+                    self.stats["budget_used"] = min(1.0, budget_elapsed / budget)
+                    # Re-plan every 5 generations (absolute, so a resumed run keeps the same cadence); ignore changes under 20%
+                    if generation % 5 == 2:
+                        new_size = self._budget_population_size(remaining, gens_left, self._gen_seconds, pop_size)
+                        if abs(new_size - pop_size) > 0.2 * pop_size:
+                            print(f"📏 Población {pop_size} -> {new_size} ({self._gen_seconds:.2f}s/gen, {remaining:.0f}s restantes, {gens_left} generaciones)")
+                            self._gen_seconds *= new_size / pop_size
+                            pop_size = new_size
+                self.stats["eta_seconds"] = eta
+                self.stats["population_size"] = pop_size
             
         # Final evaluation (Serial or Parallel, reusing pool is cleaner but we exited context)
         # For simplicity and given population size is small, serial final pass or reuse logic.
         # Since we are out of context, let's do serial or minimal overhead.
-        for ind in self.population:
-            self.calculate_fitness(ind)
-        self.population.sort(key=lambda x: x.fitness, reverse=True)
+        # Early stops leave an already evaluated population (no extra pass over the budget)
+        if not stopped:
+            for ind in self.population:
+                self.calculate_fitness(ind)
+        self.stats["eta_seconds"] = 0.0
+        self.best_individual = max(self.population, key=lambda x: x.fitness)
         
-        return self.population[0]
+        return self.best_individual
@@ -0,0 +1,246 @@
+import os
+import threading
+from abc import ABC, abstractmethod
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+# Métricas operativas en formato de exposición de texto de Prometheus.
+# Implementación mínima (sin prometheus_client) para no sumar dependencias
+# ni tiempo de importación en el arranque en frío de Cloud Run.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry: List["_Metric"] = []
+
+
+def _format_labels(label_names: Tuple[str, ...], label_values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in zip(label_names, label_values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Líneas de muestra del formato de texto (sin HELP/TYPE)."""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def _samples(self):
+        if self._callback is not None:
+            # Gauges calculados al momento del scrape (ej. RSS, profundidad de cola)
+            values = self._callback()
+            if not isinstance(values, dict):
+                values = {(): values}
+            items = [(k if isinstance(k, tuple) else (k,), v) for k, v in values.items()]
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # key -> [bucket_counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[i] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self):
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = []
+        for key, data in items:
+            for i, bound in enumerate(self.buckets):
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(data[i])}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(data[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(data[-1])}")
+        return lines
+
+
+def _process_rss_bytes() -> float:
+    """RSS actual del proceso (Linux /proc) con fallback al pico de getrusage."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return float(resident_pages * os.sysconf("SC_PAGE_SIZE"))
+    except (OSError, ValueError, IndexError):
+        try:
+            import resource
+            return float(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)
+        except Exception:
+            return 0.0
+
+
+# --- Métricas de la aplicación ---
+
+HTTP_REQUEST_LATENCY = Histogram(
+    "horario_http_request_duration_seconds",
+    "Latencia de peticiones HTTP por ruta.",
+    ("method", "route", "status"),
+)
+
+SHEETS_CALLS = Counter(
+    "horario_sheets_calls_total",
+    "Llamadas a Google Sheets por operación.",
+    ("operation",),
+)
+
+SHEETS_ERRORS = Counter(
+    "horario_sheets_errors_total",
+    "Llamadas a Google Sheets que terminaron en error.",
+    ("operation",),
+)
+
+SHEETS_LATENCY = Histogram(
+    "horario_sheets_call_duration_seconds",
+    "Latencia de llamadas a Google Sheets por operación.",
+    ("operation",),
+)
+
+AUTH_VERIFY_LATENCY = Histogram(
+    "horario_auth_verify_duration_seconds",
+    "Latencia de verificación de tokens de Firebase.",
+    ("outcome",),
+)
+
+GA_GENERATIONS_PER_SECOND = Gauge(
+    "horario_ga_generations_per_second",
+    "Generaciones por segundo del job en ejecución.",
+)
+
+GA_POOL_UTILIZATION = Gauge(
+    "horario_ga_pool_utilization_ratio",
+    "Fracción del tiempo de los workers dedicada a evaluar fitness (0-1).",
+)
+
+GA_FITNESS_CACHE_HIT_RATIO = Gauge(
+    "horario_ga_fitness_cache_hit_ratio",
+    "Fracción de individuos cuyo fitness salió del caché (duplicados sin re-evaluar).",
+)
+
+GA_GENERATIONS_PER_SECOND.set(0)
+GA_POOL_UTILIZATION.set(0)
+GA_FITNESS_CACHE_HIT_RATIO.set(0)
+
+PROCESS_RSS = Gauge(
+    "horario_process_resident_memory_bytes",
+    "Memoria residente (RSS) del proceso.",
+    callback=_process_rss_bytes,
+)
+
+
+@contextmanager
+def track_sheets_call(operation: str):
+    """Cuenta y mide una llamada a Google Sheets, registrando errores."""
+    SHEETS_CALLS.inc(operation=operation)
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        SHEETS_ERRORS.inc(operation=operation)
+        raise
+    finally:
+        SHEETS_LATENCY.observe(time.perf_counter() - start, operation=operation)
+
+
+def render_latest() -> str:
+    """Serializa todas las métricas registradas en formato texto de Prometheus."""
+    lines = []
+    for metric in list(_registry):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
@@ -55,3 +55,4 @@ class Sesion:
 class Horario:
     sesiones: List[Sesion]
     fitness: float = 0.0
+    penalties: Optional[tuple] = None # Contadores por restricción de la última evaluación (ver fitness.BREAKDOWN_FIELDS)
@@ -0,0 +1,200 @@
+import random
+import time
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Optional, Dict
+from .model import Curso, Profesor, Aula, Horario, Grupo, Clase
+from .constraints import ConstraintModel
+from . import genetic_algorithm as _ga
+from .genetic_algorithm import GeneticAlgorithm, _init_worker
+
+def _objectives_wrapper(individual):
+    """Componentes de penalidad en el worker (mismo evaluador global que _evaluate_wrapper)."""
+    return _ga._worker_evaluator.objectives(individual)
+
+def _violation(objs: tuple) -> float:
+    # hard + break: restricciones, no objetivos a negociar
+    return objs[0] + objs[1]
+
+def _soft(objs: tuple) -> tuple:
+    # turno + inicio temprano: los objetivos del frente
+    return objs[2:]
+
+def constrained_dominates(a: tuple, b: tuple) -> bool:
+    """
+    Dominancia restringida de NSGA-II: menor violación dura gana; a igual violación,
+    dominancia de Pareto sobre las penalidades blandas (todas a minimizar).
+    """
+    va, vb = _violation(a), _violation(b)
+    if va != vb:
+        return va < vb
+    sa, sb = _soft(a), _soft(b)
+    return all(x <= y for x, y in zip(sa, sb)) and sa != sb
+
+def fast_non_dominated_sort(objs: List[tuple]) -> List[List[int]]:
+    """Frentes (índices) en orden: el primero no está dominado por nadie. O(M·N²)."""
+    n = len(objs)
+    dominated: List[List[int]] = [[] for _ in range(n)]
+    counts = [0] * n
+    for p in range(n):
+        for q in range(p + 1, n):
+            if constrained_dominates(objs[p], objs[q]):
+                dominated[p].append(q)
+                counts[q] += 1
+            elif constrained_dominates(objs[q], objs[p]):
+                dominated[q].append(p)
+                counts[p] += 1
+
+    fronts = [[i for i in range(n) if counts[i] == 0]]
+    while fronts[-1]:
+        nxt = []
+        for p in fronts[-1]:
+            for q in dominated[p]:
+                counts[q] -= 1
+                if counts[q] == 0:
+                    nxt.append(q)
+        fronts.append(nxt)
+    return fronts[:-1]
+
+def crowding_distance(front: List[int], objs: List[tuple]) -> Dict[int, float]:
+    """Distancia de aglomeración sobre las penalidades blandas (extremos = infinito)."""
+    distance = {i: 0.0 for i in front}
+    if len(front) <= 2:
+        return {i: float('inf') for i in front}
+    for m in range(len(_soft(objs[front[0]]))):
+        ordered = sorted(front, key=lambda i: _soft(objs[i])[m])
+        lo, hi = _soft(objs[ordered[0]])[m], _soft(objs[ordered[-1]])[m]
+        distance[ordered[0]] = distance[ordered[-1]] = float('inf')
+        if hi == lo:
+            continue
+        for k in range(1, len(ordered) - 1):
+            distance[ordered[k]] += (_soft(objs[ordered[k + 1]])[m] - _soft(objs[ordered[k - 1]])[m]) / (hi - lo)
+    return distance
+
+def select_survivors(objs: List[tuple], n: int) -> Tuple[List[int], List[int], List[float]]:
+    """
+    Selección ambiental de NSGA-II: frentes completos mientras quepan y el último
+    recortado por aglomeración. Devuelve (índices, rango, aglomeración) alineados.
+    """
+    chosen, rank, crowd = [], [], []
+    for r, front in enumerate(fast_non_dominated_sort(objs)):
+        distance = crowding_distance(front, objs)
+        if len(chosen) + len(front) > n:
+            front = sorted(front, key=lambda i: distance[i], reverse=True)[:n - len(chosen)]
+        chosen.extend(front)
+        rank.extend([r] * len(front))
+        crowd.extend(distance[i] for i in front)
+        if len(chosen) >= n:
+            break
+    return chosen, rank, crowd
+
+class ParetoGA(GeneticAlgorithm):
+    """
+    Modo multiobjetivo (NSGA-II): en vez de un único escalar ponderado, evoluciona un
+    frente de Pareto entre la penalidad de turno y la de inicio temprano, con los
+    conflictos duros (hard + break) como restricción. Una sola corrida entrega varios
+    horarios de compromiso (pareto_front) en lugar de repetir corridas con otros pesos.
+    Reutiliza dominios, pre-solve, cruce y mutación del GA.
+    """
+    # Su evolve no guarda checkpoints ni admite reanudar
+    SUPPORTS_CHECKPOINTS = False
+
+    def __init__(self, cursos: List[Curso], profesores: List[Profesor], aulas: List[Aula], grupos: List[Grupo], clases: List[Clase], config: dict, model: Optional[ConstraintModel] = None):
+        super().__init__(cursos, profesores, aulas, grupos, clases, config, model=model)
+        self.front_size = int(config.get('pareto_front_size', 5))
+        self.pareto_front: List[Tuple[Horario, tuple]] = []   # (horario, componentes) de compromiso
+        self.stats["front_size"] = 0
+
+    def _objectives(self, individuals: List[Horario], executor) -> List[tuple]:
+        if executor is None:
+            objs = [self.evaluator.objectives(ind) for ind in individuals]
+        else:
+            objs = list(executor.map(_objectives_wrapper, individuals, chunksize=max(1, len(individuals) // (4 * self.num_workers))))
+        for ind, o in zip(individuals, objs):
+            ind.fitness = 0.0 - sum(o)
+        return objs
+
+    def _tournament(self, rank: List[int], crowd: List[float]) -> int:
+        # Torneo binario: menor rango, luego mayor aglomeración (diversidad). Devuelve el índice
+        i, j = random.randrange(len(rank)), random.randrange(len(rank))
+        if (rank[i], -crowd[i]) <= (rank[j], -crowd[j]):
+            return i
+        return j
+
+    def _spread(self, front: List[int], objs: List[tuple]) -> List[int]:
+        """Hasta front_size soluciones repartidas a lo largo del frente (extremos incluidos, sin duplicados)."""
+        unique = {}
+        for i in sorted(front, key=lambda i: _soft(objs[i])):
+            unique.setdefault(objs[i], i)
+        ordered = list(unique.values())
+        if len(ordered) <= self.front_size:
+            return ordered
+        step = (len(ordered) - 1) / (self.front_size - 1) if self.front_size > 1 else 0
+        return sorted({ordered[round(k * step)] for k in range(self.front_size)}, key=lambda i: _soft(objs[i]))
+
+    def evolve(self, on_progress: callable = None, should_cancel: callable = None, seed_individuals: Optional[List[Horario]] = None, resume_from=None, time_budget: Optional[float] = None):
+        if resume_from is not None:
+            raise ValueError("El modo pareto no admite reanudar desde un checkpoint")
+        if str(self.config.get('presolve', 1)).strip().lower() not in ('0', 'false', 'no'):
+            self.presolve()
+        self.initialize_population(seed_individuals)
+
+        pop_size = len(self.population)
+        max_gens = self.config['max_generations']
+        budget = float(time_budget if time_budget is not None else (self.config.get('time_budget') or 0))
+        serial = self.num_workers <= 1
+        print(f"🎯 Iniciando NSGA-II ({pop_size} individuos, {'serial' if serial else f'{self.num_workers} workers'})...")
+
+        evolve_start = time.perf_counter()
+        pool = nullcontext() if serial else ProcessPoolExecutor(max_workers=self.num_workers, initializer=_init_worker, initargs=(self.evaluator,))
+        with pool as executor:
+            objs = self._objectives(self.population, executor)
+            chosen, rank, crowd = select_survivors(objs, pop_size)
+
+            for generation in range(max_gens):
+                if should_cancel and should_cancel():
+                    print("🛑 Pareto GA cancelled by user.")
+                    return None
+
+                best_idx = max(range(len(self.population)), key=lambda i: self.population[i].fitness)
+                self.best_individual = self.population[best_idx]
+                best_fitness = self.best_individual.fitness
+
+                elapsed = time.perf_counter() - evolve_start
+                self.stats["generation"] = generation
+                self.stats["front_size"] = rank.count(0)
+                if elapsed > 0:
+                    self.stats["generations_per_sec"] = (generation + 1) / elapsed
+                if on_progress and (generation % 5 == 0 or generation == max_gens - 1):
+                    on_progress(generation, best_fitness)
+                if generation % 10 == 0:
+                    print(f"Generation {generation}: Best Fitness = {best_fitness}, frente = {self.stats['front_size']}")
+
+                if best_fitness == 0:
+                    # Domina a todo: el frente colapsa en un solo punto
+                    print("Solution found!")
+                    break
+                if budget and elapsed >= budget:
+                    print(f"⏱️ Presupuesto de {budget:.0f}s agotado en la generación {generation}")
+                    break
+
+                # Mismos operadores por lotes del GA: genes inmutables compartidos, sin deepcopy
+                genomes = [self.encode_genome(ind) for ind in self.population]
+                shape = [(s.clase_id, s.num_slots) for s in self.population[0].sesiones]
+                parents = [(self._tournament(rank, crowd), self._tournament(rank, crowd)) for _ in range(pop_size)]
+                offspring = self.breed(genomes, parents, shape)
+                offspring_objs = self._objectives(offspring, executor)
+
+                # (mu + lambda): padres e hijos compiten por los pop_size lugares
+                combined = self.population + offspring
+                combined_objs = objs + offspring_objs
+                chosen, rank, crowd = select_survivors(combined_objs, pop_size)
+                self.population = [combined[i] for i in chosen]
+                objs = [combined_objs[i] for i in chosen]
+
+        first_front = [i for i, r in enumerate(rank) if r == 0]
+        self.pareto_front = [(self.population[i], objs[i]) for i in self._spread(first_front, objs)]
+        self.stats["front_size"] = len(first_front)
+        self.best_individual = max(self.population, key=lambda ind: ind.fitness)
+        print(f"🎯 Frente de Pareto: {len(first_front)} soluciones no dominadas, {len(self.pareto_front)} de compromiso")
+        return self.best_individual
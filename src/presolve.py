@@ -0,0 +1,222 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import List, Dict, Tuple
+from .model import Profesor, Aula, Grupo, Clase, Sesion
+from .constraints import ConstraintModel
+from .domains import ClaseDomain, Placements
+
+class InfeasibleInstanceError(ValueError):
+    """La instancia no puede llegar a fitness 0: reasons lista cada causa detectada."""
+
+    def __init__(self, reasons: List[str]):
+        self.reasons = reasons
+        summary = "; ".join(reasons[:5])
+        if len(reasons) > 5:
+            summary += f" (y {len(reasons) - 5} más)"
+        super().__init__(f"Instancia infactible: {summary}")
+
+@dataclass
+class PresolveResult:
+    """
+    Dominios podados y sesiones forzadas. free_ids son las clases que el GA todavía
+    debe decidir; las de fixed tienen profesor, aula y colocación únicos.
+    """
+    domains: Dict[str, ClaseDomain]
+    fixed: Dict[str, Sesion]
+    free_ids: List[str]
+    reasons: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)   # avisos que no impiden llegar a fitness 0
+    stats: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def feasible(self) -> bool:
+        return not self.reasons
+
+def supply_demand_reasons(model: ConstraintModel, cursos_ids: List[str], profesores: List[Profesor], aulas: List[Aula], clases: List[Clase]) -> List[str]:
+    """Chequeos globales de oferta vs demanda (los mismos de scripts/check_feasibility.py)."""
+    reasons = []
+    p_map = {p.id: p for p in profesores}
+
+    demand = sum(c.duracion_bloques for c in clases)
+    supply = sum(p.max_horas_semana for p in profesores)
+    if supply < demand:
+        reasons.append(f"Horas de profesores insuficientes: demanda {demand} slots, oferta {supply}")
+
+    course_demand = defaultdict(int)
+    for c in clases:
+        course_demand[c.curso_id] += c.duracion_bloques
+    for c_id in cursos_ids:
+        # Sin profesores elegibles la clase usa el profesor de respaldo (ver presolve): no es infactible
+        if not course_demand[c_id] or not model.eligible_profs.get(c_id):
+            continue
+        capacity = sum(p_map[p].max_horas_semana for p in model.eligible_profs.get(c_id, []) if p in p_map)
+        if capacity < course_demand[c_id]:
+            reasons.append(f"Curso {c_id}: demanda {course_demand[c_id]} slots, profesores elegibles cubren {capacity}")
+
+    num_breaks = (model.break_mask & model.span_mask(0, model.num_slots)).bit_count()
+    room_capacity = len(aulas) * model.num_days * (model.num_slots - num_breaks)
+    if room_capacity < demand:
+        reasons.append(f"Capacidad de aulas insuficiente: demanda {demand} slots, capacidad {room_capacity}")
+    return reasons
+
+def _filter(placements: Placements, keep) -> Placements:
+    kept = [(d, s) for d, s in placements.pairs if keep(d, s)]
+    return placements if len(kept) == len(placements.pairs) else Placements(kept)
+
+def presolve(model: ConstraintModel, domains: Dict[str, ClaseDomain], cursos_ids: List[str], profesores: List[Profesor], aulas: List[Aula], grupos: List[Grupo], clases: List[Clase]) -> PresolveResult:
+    """
+    Propagación hasta punto fijo sobre los dominios precomputados:
+      1. Poda profesores sin colocación legal y aulas sin aforo.
+      2. Fija las clases con un único profesor, aula y (día, inicio).
+      3. Con lo fijado, poda de las demás las colocaciones que chocarían con el mismo
+         profesor, aula o un grupo relacionado, y repite mientras algo cambie.
+    Un dominio vacío o una carga forzada imposible queda en reasons; un curso sin profesores
+    elegibles solo queda en warnings (se dicta con el profesor de respaldo, como sin pre-solve).
+    """
+    p_map = {p.id: p for p in profesores}
+    capacity = {a.id: a.capacidad for a in aulas}
+    grupos_map = {g.id: g for g in grupos}
+    reasons = supply_demand_reasons(model, cursos_ids, profesores, aulas, clases)
+    warnings = []
+    stats = {"forced_profs": 0, "forced_rooms": 0, "pruned_placements": 0, "propagation_passes": 0}
+
+    # Estado mutable por clase: profesores, aulas y tiers (en turno, legales) por profesor
+    profs: Dict[str, List[str]] = {}
+    rooms: Dict[str, List[str]] = {}
+    tiers: Dict[str, Dict[str, Tuple[Placements, Placements]]] = {}
+    clase_group = {c.id: c.grupo_id for c in clases}
+    dead = set()
+
+    for clase in clases:
+        domain = domains[clase.id]
+        grupo = grupos_map[clase.grupo_id]
+        if not model.eligible_profs.get(clase.curso_id):
+            warnings.append(f"Clase {clase.id}: el curso {clase.curso_id} no tiene profesores elegibles; se usa {domain.profs[0]} como respaldo")
+        roomy = [a for a in domain.rooms if capacity.get(a, 0) >= grupo.num_estudiantes]
+        if not roomy:
+            reasons.append(f"Clase {clase.id}: ningún aula '{clase.tipo_aula}' tiene aforo para {grupo.num_estudiantes} alumnos")
+            roomy = domain.rooms
+        rooms[clase.id] = roomy
+
+        per_prof = {p: domain.tiers.get(p) or domain.tiers[None] for p in domain.profs}
+        viable = [p for p in domain.profs if per_prof[p][1]]
+        if not viable:
+            reasons.append(f"Clase {clase.id}: no hay colocación legal (break, turno, rango o disponibilidad) para ningún profesor elegible")
+            dead.add(clase.id)
+            viable = domain.profs
+        profs[clase.id] = viable
+        tiers[clase.id] = {p: per_prof[p] for p in viable}
+
+    # Carga forzada por profesor (clases que solo él puede dictar)
+    forced_load = defaultdict(int)
+    for clase in clases:
+        if len(profs[clase.id]) == 1:
+            forced_load[profs[clase.id][0]] += clase.duracion_bloques
+    for p_id, load in forced_load.items():
+        if p_id in p_map and load > p_map[p_id].max_horas_semana:
+            reasons.append(f"Profesor {p_id}: {load} slots forzados superan su máximo de {p_map[p_id].max_horas_semana}")
+
+    # Ocupación de lo fijado: (recurso, día) -> máscara de slots
+    busy_prof: Dict[Tuple[str, int], int] = defaultdict(int)
+    busy_room: Dict[Tuple[str, int], int] = defaultdict(int)
+    # Para grupos se marca de una vez a todos los relacionados (la relación es simétrica)
+    busy_group: Dict[Tuple[str, int], int] = defaultdict(int)
+    fixed: Dict[str, Sesion] = {}
+
+    changed = True
+    while changed:
+        changed = False
+        stats["propagation_passes"] += 1
+        for clase in clases:
+            c_id = clase.id
+            if c_id in fixed or c_id in dead:
+                continue
+            n = clase.duracion_bloques
+            room_ids = rooms[c_id]
+            forced_room = room_ids[0] if len(room_ids) == 1 else None
+
+            # Podar colocaciones que chocan con lo ya fijado
+            if busy_prof or busy_room or busy_group:
+                new_tiers = {}
+                for p in profs[c_id]:
+                    def keep(d, s, p=p):
+                        span = model.span_mask(s, n)
+                        if busy_prof.get((p, d), 0) & span or busy_group.get((clase_group[c_id], d), 0) & span:
+                            return False
+                        return not (forced_room and busy_room.get((forced_room, d), 0) & span)
+                    in_turn, legal = tiers[c_id][p]
+                    new_legal = _filter(legal, keep)
+                    if new_legal is not legal:
+                        stats["pruned_placements"] += len(legal) - len(new_legal)
+                        in_turn = _filter(in_turn, keep)
+                        changed = True
+                    new_tiers[p] = (in_turn, new_legal)
+                tiers[c_id] = new_tiers
+
+                viable = [p for p in profs[c_id] if tiers[c_id][p][1]]
+                if not viable:
+                    reasons.append(f"Clase {c_id}: todas sus colocaciones chocan con clases forzadas")
+                    dead.add(c_id)
+                    continue
+                if len(viable) < len(profs[c_id]):
+                    profs[c_id] = viable
+                    changed = True
+
+            # Asignación forzada: un profesor y una colocación legal
+            if len(profs[c_id]) != 1:
+                continue
+            prof_id = profs[c_id][0]
+            legal = tiers[c_id][prof_id][1]
+            if len(legal) != 1:
+                continue
+            d, s = legal.pairs[0]
+            span = model.span_mask(s, n)
+            free_rooms = [a for a in room_ids if not busy_room.get((a, d), 0) & span]
+            if not free_rooms:
+                reasons.append(f"Clase {c_id}: su única colocación no tiene aula libre")
+                dead.add(c_id)
+                continue
+            if len(free_rooms) != 1:
+                rooms[c_id] = free_rooms
+                continue
+
+            aula_id = free_rooms[0]
+            fixed[c_id] = Sesion(clase_id=c_id, profesor_id=prof_id, aula_id=aula_id, dia_idx=d, start_slot_idx=s, num_slots=n)
+            busy_prof[(prof_id, d)] |= span
+            busy_room[(aula_id, d)] |= span
+            for g in model.ancestry_sets.get(clase_group[c_id], (clase_group[c_id],)):
+                busy_group[(g, d)] |= span
+            changed = True
+
+    # Dominios podados (se reutilizan los originales cuando nada cambió)
+    new_domains = {}
+    for clase in clases:
+        domain = domains[clase.id]
+        c_profs, c_rooms = profs[clase.id], rooms[clase.id]
+        if len(c_profs) == 1 and len(domain.profs) > 1:
+            stats["forced_profs"] += 1
+        if len(c_rooms) == 1 and len(domain.rooms) > 1:
+            stats["forced_rooms"] += 1
+        c_tiers = tiers[clase.id]
+        unchanged = (
+            c_profs == domain.profs and c_rooms == domain.rooms
+            and all(c_tiers[p] is (domain.tiers.get(p) or domain.tiers[None]) for p in c_profs)
+        )
+        if unchanged:
+            new_domains[clase.id] = domain
+            continue
+        pruned_tiers = dict(c_tiers)
+        pruned_tiers[None] = c_tiers[c_profs[0]]
+        new_domains[clase.id] = ClaseDomain(
+            clase_id=clase.id,
+            num_slots=domain.num_slots,
+            profs=c_profs,
+            rooms=c_rooms,
+            pairs=[(p, a) for p in c_profs for a in c_rooms],
+            tiers=pruned_tiers,
+            fallback=domain.fallback
+        )
+
+    stats["fixed"] = len(fixed)
+    free_ids = [c.id for c in clases if c.id not in fixed]
+    return PresolveResult(domains=new_domains, fixed=fixed, free_ids=free_ids, reasons=reasons, warnings=warnings, stats=stats)
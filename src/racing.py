@@ -0,0 +1,195 @@
+import os
+import copy
+import queue
+import random
+import time
+import multiprocessing
+from typing import List, Dict, Optional
+from .model import Curso, Profesor, Aula, Horario, Grupo, Clase
+from .conflicts import ConflictReport
+from .constraints import ConstraintModel, compile_constraints
+from .genetic_algorithm import GeneticAlgorithm
+from .presolve import PresolveResult
+
+def _race_worker(run_idx: int, seed: int, data: tuple, config: dict, model: ConstraintModel, presolved: Optional[PresolveResult], results, stop_event):
+    """
+    Una corrida del GA con su propia semilla y evaluación serial (un núcleo por corrida).
+    Publica su mejor fitness en results y se detiene cooperativamente con stop_event
+    (el mismo should_cancel del GA). Al detenerse devuelve su mejor individuo hasta el momento.
+    Mientras corre, envía una copia de su mejor horario cuando mejora (como mucho cada
+    best_publish_interval segundos) para que la API pueda publicar el mejor hasta el momento.
+    El pre-solve llega ya hecho por el proceso padre (config con presolve=0): solo se aplica.
+    """
+    random.seed(seed)
+    cursos, profesores, aulas, grupos, clases = data
+    publish_every = float(config.get('best_publish_interval', 10))
+    last_sent = {"at": None, "fitness": None}
+    try:
+        ga = GeneticAlgorithm(cursos, profesores, aulas, grupos, clases, config, model=model)
+        ga.num_workers = 1
+        if presolved is not None:
+            ga.apply_presolve(presolved)
+
+        def on_progress(generation, fitness):
+            # Contadores guardados en la única pasada de evaluación: sin barrido de conflictos
+            feasible = ga.evaluator.breakdown(ga.best_individual).hard_violations == 0
+            now = time.perf_counter()
+            improved = last_sent["fitness"] is None or fitness > last_sent["fitness"]
+            if improved and (last_sent["at"] is None or now - last_sent["at"] >= publish_every):
+                last_sent.update(at=now, fitness=fitness)
+                results.put(("best", run_idx, copy.deepcopy(ga.best_individual), feasible))
+            results.put(("progress", run_idx, generation, fitness, feasible, ga.stats["generations_per_sec"]))
+
+        best = ga.evolve(on_progress=on_progress, should_cancel=stop_event.is_set) or ga.best_individual
+        feasible = best is not None and ga.evaluator.breakdown(best).hard_violations == 0
+        results.put(("done", run_idx, best, feasible))
+    except Exception as e:
+        results.put(("error", run_idx, f"{type(e).__name__}: {e}"))
+
+class RacingSolver:
+    """
+    Multi-arranque: N corridas del GA con semillas distintas, una por núcleo.
+    Apenas una llega a cero conflictos duros se detienen las demás (la ganadora sigue
+    afinando las preferencias blandas); con deadline, al vencer se detienen todas y se
+    queda el mejor horario hasta ese momento.
+    """
+
+    def __init__(self, cursos: List[Curso], profesores: List[Profesor], aulas: List[Aula], grupos: List[Grupo], clases: List[Clase], config: dict, model: Optional[ConstraintModel] = None):
+        self.data = (cursos, profesores, aulas, grupos, clases)
+        self.config = config
+        self.model = model or compile_constraints(cursos, profesores, aulas, grupos, clases, config)
+        # GA local: evaluador compartido y pre-solve antes de lanzar procesos
+        self.ga = GeneticAlgorithm(cursos, profesores, aulas, grupos, clases, config, model=self.model)
+        self.evaluator = self.ga.evaluator
+
+        self.num_runs = int(config.get('race_runs') or min(4, os.cpu_count() or 1))
+        # Sin race_deadline explícito, el presupuesto de tiempo general hace de deadline
+        deadline = config.get('race_deadline') or config.get('time_budget')
+        self.deadline: Optional[float] = float(deadline) if deadline not in (None, '', 0, '0') else None
+        self.base_seed = int(config.get('race_seed', random.randrange(1 << 30)))
+
+        self.stats = {"generation": 0, "generations_per_sec": 0.0, "pool_utilization": 0.0, "runs": {}, "winner": None}
+        self.best_individual: Optional[Horario] = None
+
+    def solve(self, on_progress: callable = None, should_cancel: callable = None, seed_individuals: Optional[List[Horario]] = None) -> Optional[Horario]:
+        # Instancias infactibles se rechazan una sola vez, antes de lanzar N procesos;
+        # las corridas reciben los dominios podados en vez de repetir el pre-solve
+        presolved = None
+        if str(self.config.get('presolve', 1)).strip().lower() not in ('0', 'false', 'no'):
+            presolved = self.ga.presolve()
+        run_config = dict(self.config, presolve=0)
+
+        ctx = multiprocessing.get_context()
+        results = ctx.Queue()
+        stops = [ctx.Event() for _ in range(self.num_runs)]
+        procs = [
+            ctx.Process(target=_race_worker, args=(i, self.base_seed + i, self.data, run_config, self.model, presolved, results, stops[i]), daemon=True)
+            for i in range(self.num_runs)
+        ]
+        print(f"🏁 Carrera de {self.num_runs} corridas del GA (semilla base {self.base_seed}"
+              + (f", deadline {self.deadline:.0f}s)" if self.deadline else ")"))
+        for p in procs:
+            p.start()
+
+        runs = self.stats["runs"]
+        for i in range(self.num_runs):
+            runs[i] = {"status": "running", "generation": 0, "fitness": None, "feasible": False, "generations_per_sec": 0.0}
+        finals: Dict[int, tuple] = {}
+        errors: List[str] = []
+        pending = set(range(self.num_runs))
+        best_fitness = None
+        streamed_feasible = False
+        cancelled = False
+        deadline_hit = False
+        start = time.perf_counter()
+
+        def stop(indices):
+            for i in indices:
+                stops[i].set()
+
+        try:
+            while pending:
+                try:
+                    msg = results.get(timeout=0.5)
+                except queue.Empty:
+                    msg = None
+
+                if msg and msg[0] == "best":
+                    # Mejor hasta el momento entre todas las corridas (primero sin conflictos duros)
+                    _, idx, horario, feasible = msg
+                    current = self.best_individual
+                    if current is None or (feasible, horario.fitness) > (streamed_feasible, current.fitness):
+                        self.best_individual, streamed_feasible = horario, feasible
+                elif msg and msg[0] == "progress":
+                    _, idx, generation, fitness, feasible, gps = msg
+                    runs[idx].update(generation=generation, fitness=fitness, feasible=feasible, generations_per_sec=gps)
+                    active = [r for r in runs.values() if r["status"] == "running"]
+                    self.stats["generations_per_sec"] = sum(r["generations_per_sec"] for r in active)
+                    # Cada corrida ocupa un núcleo: fracción de corridas aún activas
+                    self.stats["pool_utilization"] = len(active) / self.num_runs
+                    if feasible and self.stats["winner"] is None:
+                        # Primera corrida sin conflictos duros: se cancelan las perdedoras
+                        self.stats["winner"] = idx
+                        print(f"🥇 Corrida {idx} sin conflictos duros en la generación {generation}; deteniendo las demás.")
+                        stop(i for i in range(self.num_runs) if i != idx)
+                    if best_fitness is None or fitness > best_fitness:
+                        best_fitness = fitness
+                        self.stats["generation"] = generation
+                        if on_progress:
+                            on_progress(generation, fitness)
+                elif msg and msg[0] == "done":
+                    _, idx, horario, feasible = msg
+                    finals[idx] = (horario, feasible)
+                    runs[idx]["status"] = "done"
+                    pending.discard(idx)
+                elif msg and msg[0] == "error":
+                    _, idx, error = msg
+                    errors.append(error)
+                    runs[idx]["status"] = "failed"
+                    pending.discard(idx)
+
+                if not cancelled and should_cancel and should_cancel():
+                    cancelled = True
+                    stop(range(self.num_runs))
+                if not deadline_hit and self.deadline and time.perf_counter() - start > self.deadline:
+                    deadline_hit = True
+                    print(f"⏱️ Deadline de {self.deadline:.0f}s alcanzado; se conserva el mejor horario.")
+                    stop(range(self.num_runs))
+
+                # Procesos muertos sin mensaje final (p. ej. OOM)
+                if msg is None:
+                    for idx in list(pending):
+                        if not procs[idx].is_alive():
+                            errors.append(f"Corrida {idx} terminó sin resultado (exitcode {procs[idx].exitcode})")
+                            runs[idx]["status"] = "failed"
+                            pending.discard(idx)
+        finally:
+            stop(range(self.num_runs))
+            for p in procs:
+                p.join(timeout=5)
+                if p.is_alive():
+                    p.terminate()
+
+        self.stats["generations_per_sec"] = 0.0
+        self.stats["pool_utilization"] = 0.0
+        candidates = [(h, f) for h, f in finals.values() if h is not None]
+        if candidates:
+            # Preferir horarios sin conflictos duros, luego mayor fitness
+            best, _ = max(candidates, key=lambda hf: (hf[1], hf[0].fitness))
+            best.fitness = self.evaluator.evaluate(best)
+            self.best_individual = best
+        if cancelled:
+            # Las corridas detenidas entregan su mejor horario: queda en best_individual
+            print("🛑 Racing cancelled by user.")
+            return None
+        if not candidates:
+            raise RuntimeError("Ninguna corrida del GA produjo un horario: " + "; ".join(errors))
+
+        print(f"🏁 Carrera terminada en {time.perf_counter() - start:.2f}s: mejor fitness {best.fitness}")
+        return best
+
+    def get_conflicts(self, individual: Horario) -> List[str]:
+        return self.evaluator.get_conflicts(individual)
+
+    def find_conflicts(self, individual: Horario) -> ConflictReport:
+        return self.evaluator.find_conflicts(individual)
@@ -0,0 +1,69 @@
+from typing import List, Dict, Any
+from .model import Curso, Profesor, Aula, Grupo, Clase, Horario
+
+class ScheduleRenderer:
+    """
+    Convierte un Horario en la lista de dicts que consume el frontend (mismas claves que SessionData).
+    Los índices id -> objeto y la tabla slot -> hora se construyen una sola vez, así que
+    renderizar es O(n log n) por el ordenamiento, sin búsquedas lineales por sesión.
+    """
+
+    def __init__(self, cursos: List[Curso], profesores: List[Profesor], aulas: List[Aula], grupos: List[Grupo], clases: List[Clase], config: dict):
+        cursos_map = {c.id: c for c in cursos}
+        self.profesores = {p.id: p.nombre for p in profesores}
+        self.aulas = {a.id: (a.nombre, a.tipo) for a in aulas}
+        grupos_ids = {g.id for g in grupos}
+
+        # clase_id -> (nombre del curso, id del grupo)
+        self.clases: Dict[str, tuple] = {}
+        for c in clases:
+            curso = cursos_map[c.curso_id]
+            if c.grupo_id not in grupos_ids:
+                raise KeyError(f"Grupo '{c.grupo_id}' de la clase '{c.id}' no existe")
+            self.clases[c.id] = (curso.nombre, c.grupo_id)
+
+        self.days = list(config['days'])
+
+        # Tablas de hora de inicio / fin por índice de slot ("08:00-08:45" -> "08:00", "08:45")
+        self.slot_starts = []
+        self.slot_ends = []
+        for slot in config['time_slots']:
+            parts = slot.split('-')
+            self.slot_starts.append(parts[0])
+            self.slot_ends.append(parts[1] if len(parts) > 1 else "ERROR")
+
+    def time_range(self, start_slot_idx: int, num_slots: int) -> tuple:
+        total_slots = len(self.slot_starts)
+        if start_slot_idx >= total_slots:
+            return "ERROR", "ERROR"
+        end_slot_idx = start_slot_idx + num_slots - 1
+        if end_slot_idx >= total_slots:
+            return self.slot_starts[start_slot_idx], "OUT_OF_BOUNDS"
+        return self.slot_starts[start_slot_idx], self.slot_ends[end_slot_idx]
+
+    def render(self, horario: Horario) -> List[Dict[str, Any]]:
+        clases = self.clases
+        sorted_sessions = sorted(
+            horario.sesiones,
+            key=lambda s: (s.dia_idx, s.start_slot_idx, clases[s.clase_id][1] if s.clase_id in clases else "")
+        )
+
+        output = []
+        for s in sorted_sessions:
+            curso_nombre, grupo_id = clases[s.clase_id]
+            aula_nombre, aula_tipo = self.aulas[s.aula_id]
+            hora_inicio, hora_fin = self.time_range(s.start_slot_idx, s.num_slots)
+            output.append({
+                "dia": self.days[s.dia_idx],
+                "hora_inicio": hora_inicio,
+                "hora_fin": hora_fin,
+                "curso": curso_nombre,
+                "grupo": grupo_id,
+                "aula": aula_nombre,
+                "profesor": self.profesores[s.profesor_id],
+                "tipo_aula": aula_tipo,
+                "meta_dia_idx": s.dia_idx,
+                "meta_slot_idx": s.start_slot_idx,
+                "meta_num_slots": s.num_slots
+            })
+        return output
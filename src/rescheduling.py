@@ -0,0 +1,193 @@
+import copy
+import random
+from dataclasses import dataclass, field
+from typing import List, Dict, Set, Tuple, Optional, Iterable
+from .model import Curso, Profesor, Aula, Horario, Sesion, Grupo, Clase
+from .fitness import FitnessEvaluator
+from .conflicts import MAX_HOURS
+from .constraints import ConstraintModel, compile_constraints
+from .genetic_algorithm import GeneticAlgorithm
+
+class StabilityEvaluator(FitnessEvaluator):
+    """FitnessEvaluator + penalidad por cada sesión que se mueve respecto del horario guardado."""
+    MOVE_PENALTY = 20
+
+    def __init__(self, *args, baseline: Dict[str, tuple], **kwargs):
+        super().__init__(*args, **kwargs)
+        self.baseline = baseline
+
+    def evaluate_terms(self, individual: Horario) -> Tuple[float, tuple]:
+        score, terms = super().evaluate_terms(individual)
+        moved = sum(1 for s in individual.sesiones if self.baseline.get(s.clase_id) != _placement(s))
+        return score - moved * self.MOVE_PENALTY, terms
+
+@dataclass
+class RescheduleResult:
+    horario: Horario
+    baseline: Dict[str, tuple]                              # clase_id -> (profesor, aula, día, slot) guardado
+    saved_rows: Dict[str, dict] = field(default_factory=dict)  # clase_id -> fila guardada original
+    reasons: Dict[str, str] = field(default_factory=dict)   # clase afectada -> motivo
+    free_ids: List[str] = field(default_factory=list)       # afectadas + vecindario (re-optimizadas)
+    unmatched_rows: List[dict] = field(default_factory=list)
+
+    @property
+    def moved_ids(self) -> List[str]:
+        return [s.clase_id for s in self.horario.sesiones if self.baseline.get(s.clase_id) != _placement(s)]
+
+def _placement(s: Sesion) -> tuple:
+    return (s.profesor_id, s.aula_id, s.dia_idx, s.start_slot_idx)
+
+def match_saved_sessions(saved: List[dict], cursos: List[Curso], profesores: List[Profesor], aulas: List[Aula], clases: List[Clase]) -> Tuple[Dict[str, dict], List[dict]]:
+    """
+    Asocia las filas guardadas (claves de SessionData, con nombres) a clases por
+    (nombre del curso, grupo), prefiriendo la misma duración cuando hay varias clases
+    del mismo curso y grupo. Profesores/aulas que ya no existen quedan en None.
+    Devuelve (clase_id -> {profesor_id, aula_id, dia_idx, start_slot_idx, num_slots, row}, filas sin clase).
+    """
+    curso_nombre = {c.id: c.nombre for c in cursos}
+    prof_by_name = {p.nombre: p.id for p in profesores}
+    aula_by_name = {a.nombre: a.id for a in aulas}
+
+    pending: Dict[tuple, List[Clase]] = {}
+    for c in clases:
+        pending.setdefault((curso_nombre.get(c.curso_id), c.grupo_id), []).append(c)
+
+    matched: Dict[str, dict] = {}
+    unmatched: List[dict] = []
+    for row in saved:
+        candidates = pending.get((row.get('curso'), row.get('grupo')))
+        if not candidates:
+            unmatched.append(row)
+            continue
+        num_slots = int(row.get('meta_num_slots', 1))
+        clase = next((c for c in candidates if c.duracion_bloques == num_slots), candidates[0])
+        candidates.remove(clase)
+        matched[clase.id] = {
+            "profesor_id": prof_by_name.get(row.get('profesor')),
+            "aula_id": aula_by_name.get(row.get('aula')),
+            "dia_idx": int(row.get('meta_dia_idx', 0)),
+            "start_slot_idx": int(row.get('meta_slot_idx', 0)),
+            "num_slots": num_slots,
+            "row": row,
+        }
+    return matched, unmatched
+
+class Rescheduler:
+    """
+    Re-programación incremental: fija todas las sesiones no afectadas por el cambio de
+    datos y re-optimiza solo las afectadas y su vecindario (mismo profesor, aula o
+    familia de grupos el mismo día), partiendo del horario guardado y penalizando cada
+    sesión movida para que el resultado difiera lo mínimo posible.
+    """
+
+    def __init__(self, cursos: List[Curso], profesores: List[Profesor], aulas: List[Aula], grupos: List[Grupo], clases: List[Clase], config: dict, model: Optional[ConstraintModel] = None):
+        self.data = (cursos, profesores, aulas, grupos, clases)
+        self.clases = clases
+        self.config = config
+        self.model = model or compile_constraints(cursos, profesores, aulas, grupos, clases, config)
+        self.generations = int(config.get('reschedule_generations', 60))
+
+        reschedule_config = dict(config, presolve=0, max_generations=self.generations)
+        self.ga = GeneticAlgorithm(cursos, profesores, aulas, grupos, clases, reschedule_config, model=self.model)
+        # Pocas sesiones libres: la evaluación serial evita el costo de levantar el pool
+        self.ga.num_workers = int(config.get('reschedule_workers', 1))
+        self.evaluator = FitnessEvaluator(cursos, profesores, aulas, grupos, clases, config, model=self.model)
+
+    def _candidate(self, matched: Dict[str, dict], changed: Set[str]) -> Tuple[Horario, Dict[str, str]]:
+        """Horario inicial: lo guardado, con las sesiones inválidas bajo los datos nuevos re-muestreadas."""
+        model = self.model
+        reasons: Dict[str, str] = {}
+        sesiones = []
+        for clase in self.clases:
+            domain = self.ga.domains[clase.id]
+            saved = matched.get(clase.id)
+            if saved is None:
+                reasons[clase.id] = "clase nueva (sin sesión guardada)"
+                prof_id, aula_id = random.choice(domain.pairs)
+                dia_idx, start = domain.placements(prof_id).sample(early_bias=0.5)
+                sesiones.append(Sesion(clase.id, prof_id, aula_id, dia_idx, start, clase.duracion_bloques))
+                continue
+
+            prof_id, aula_id = saved["profesor_id"], saved["aula_id"]
+            dia_idx, start = saved["dia_idx"], saved["start_slot_idx"]
+            n = clase.duracion_bloques
+
+            if prof_id in changed or aula_id in changed or clase.id in changed:
+                reasons[clase.id] = "recurso marcado como modificado"
+            if saved["num_slots"] != n:
+                reasons[clase.id] = f"duración cambió ({saved['num_slots']} -> {n} bloques)"
+            if prof_id not in domain.profs:
+                reasons[clase.id] = "profesor ya no existe o no es elegible"
+                available = [p for p in domain.profs if model.prof_available(p, dia_idx, start, n)]
+                prof_id = random.choice(available or domain.profs)
+            if aula_id not in domain.rooms:
+                reasons[clase.id] = "aula ya no existe o no es apta (tipo/aforo)"
+                aula_id = random.choice(domain.rooms)
+            if dia_idx >= model.num_days or start + n > model.num_slots or model.hits_break(start, n):
+                reasons[clase.id] = "colocación fuera de rango o sobre el break"
+                dia_idx, start = domain.placements(prof_id).sample(early_bias=0.5)
+            elif not model.prof_available(prof_id, dia_idx, start, n):
+                reasons[clase.id] = "profesor no disponible en ese horario"
+                dia_idx, start = domain.placements(prof_id).sample(early_bias=0.5)
+            sesiones.append(Sesion(clase.id, prof_id, aula_id, dia_idx, start, n))
+        return Horario(sesiones=sesiones), reasons
+
+    def _neighbourhood(self, horario: Horario, reasons: Dict[str, str]) -> Set[int]:
+        """Afectadas + las que chocan con ellas + las que comparten profesor, aula o familia ese día."""
+        sesiones = horario.sesiones
+        free = {i for i, s in enumerate(sesiones) if s.clase_id in reasons}
+
+        for c in self.evaluator.find_conflicts(horario):
+            if c.tipo == MAX_HOURS:
+                idxs = [i for i, s in enumerate(sesiones) if s.profesor_id == c.resources[0]]
+            else:
+                idxs = list(c.sessions)
+            for i in idxs:
+                if i not in free:
+                    reasons.setdefault(sesiones[i].clase_id, f"conflicto {c.tipo} con los datos nuevos")
+                    free.add(i)
+
+        group_root = self.model.group_root
+        clase_group = {c.id: c.grupo_id for c in self.clases}
+        keys = set()
+        for i in free:
+            s = sesiones[i]
+            keys.update((("prof", s.profesor_id, s.dia_idx), ("room", s.aula_id, s.dia_idx),
+                         ("family", group_root.get(clase_group[s.clase_id]), s.dia_idx)))
+        for i, s in enumerate(sesiones):
+            if i in free:
+                continue
+            if (("prof", s.profesor_id, s.dia_idx) in keys or ("room", s.aula_id, s.dia_idx) in keys
+                    or ("family", group_root.get(clase_group[s.clase_id]), s.dia_idx) in keys):
+                free.add(i)
+        return free
+
+    def run(self, saved: List[dict], changed: Iterable[str] = (), on_progress: callable = None, should_cancel: callable = None) -> Optional[RescheduleResult]:
+        cursos, profesores, aulas, _, clases = self.data
+        matched, unmatched = match_saved_sessions(saved, cursos, profesores, aulas, clases)
+        baseline = {
+            c_id: (m["profesor_id"], m["aula_id"], m["dia_idx"], m["start_slot_idx"]) for c_id, m in matched.items()
+        }
+
+        candidate, reasons = self._candidate(matched, set(changed))
+        free = self._neighbourhood(candidate, reasons) if reasons or self.evaluator.find_conflicts(candidate) else set()
+        free_ids = [candidate.sesiones[i].clase_id for i in sorted(free)]
+        print(f"♻️ Re-programación: {len(reasons)} clases afectadas, {len(free)} a re-optimizar, "
+              f"{len(candidate.sesiones) - len(free)} fijas")
+
+        if free:
+            ga = self.ga
+            ga.evaluator = StabilityEvaluator(*self.data, self.config, model=self.model, baseline=baseline)
+            ga.free_indices = sorted(free)
+            ga.fixed_sessions = {
+                s.clase_id: copy.copy(s) for i, s in enumerate(candidate.sesiones) if i not in free
+            }
+            best = ga.evolve(on_progress=on_progress, should_cancel=should_cancel, seed_individuals=[candidate])
+            if best is None:
+                return None
+        else:
+            best = candidate
+
+        best.fitness = self.evaluator.evaluate(best)
+        return RescheduleResult(horario=best, baseline=baseline, saved_rows={c_id: m["row"] for c_id, m in matched.items()},
+                                reasons=reasons, free_ids=free_ids, unmatched_rows=unmatched)
@@ -0,0 +1,17 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# Pool dedicado y acotado para las llamadas bloqueantes a Google Sheets (gspread).
+# Los handlers async esperan aquí sus llamadas de red sin ocupar los workers del
+# threadpool por defecto de Starlette, y las esperas de peticiones concurrentes
+# se solapan hasta SHEETS_IO_WORKERS llamadas simultáneas.
+SHEETS_IO_WORKERS = int(os.environ.get('SHEETS_IO_WORKERS', '8'))
+
+_executor = ThreadPoolExecutor(max_workers=SHEETS_IO_WORKERS, thread_name_prefix="sheets-io")
+
+async def run_sheets(fn, *args, **kwargs):
+    """Ejecuta una función bloqueante de data_loader en el pool de I/O de Sheets."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(fn, *args, **kwargs))
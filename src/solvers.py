@@ -0,0 +1,80 @@
+import time
+from typing import List, Optional
+from .model import Curso, Profesor, Aula, Horario, Grupo, Clase
+from .fitness import FitnessEvaluator
+from .conflicts import ConflictReport
+from .constraints import ConstraintModel, compile_constraints
+from .genetic_algorithm import GeneticAlgorithm
+
+# Motores disponibles para run_ga_bg_task / POST /generate?engine=...
+ENGINES = ("ga", "cpsat", "hybrid", "race", "decomposed", "pareto")
+
+class HybridSolver:
+    """
+    CP-SAT resuelve solo las restricciones duras (primera solución factible) y el GA,
+    sembrado con ella, optimiza las preferencias blandas de turno e inicio temprano.
+    Si CP-SAT no encuentra solución a tiempo, corre el GA sin semilla.
+    Con time_budget, el GA solo dispone de lo que CP-SAT dejó del presupuesto.
+    """
+
+    def __init__(self, cursos: List[Curso], profesores: List[Profesor], aulas: List[Aula], grupos: List[Grupo], clases: List[Clase], config: dict, model: Optional[ConstraintModel] = None):
+        from .cpsat_solver import CpSatSolver
+
+        model = model or compile_constraints(cursos, profesores, aulas, grupos, clases, config)
+        self.cpsat = CpSatSolver(cursos, profesores, aulas, grupos, clases, config, model=model, objective=False)
+        self.ga = GeneticAlgorithm(cursos, profesores, aulas, grupos, clases, config, model=model)
+        self.model = model
+        self.config = config
+        self.evaluator: FitnessEvaluator = self.ga.evaluator
+        self.stats = self.ga.stats
+
+    @property
+    def best_individual(self) -> Optional[Horario]:
+        return self.ga.best_individual or self.cpsat.best_individual
+
+    def solve(self, on_progress: callable = None, should_cancel: callable = None, seed_individuals: Optional[List[Horario]] = None) -> Optional[Horario]:
+        start = time.perf_counter()
+        try:
+            seed = self.cpsat.solve(should_cancel=should_cancel, seed_individuals=seed_individuals)
+        except RuntimeError as e:
+            print(f"⚠️ Híbrido: {e}. Se continúa solo con el GA.")
+            seed = None
+        if seed is None and should_cancel and should_cancel():
+            return None
+        seeds = [seed] if seed is not None else seed_individuals
+        budget = float(self.config.get('time_budget') or 0)
+        remaining = None
+        if budget:
+            # Nunca 0: para el GA significa "sin presupuesto"; con lo mínimo evalúa una generación y se detiene
+            remaining = max(1e-3, budget - (time.perf_counter() - start))
+        return self.ga.evolve(on_progress=on_progress, should_cancel=should_cancel, seed_individuals=seeds, time_budget=remaining)
+
+    def get_conflicts(self, individual: Horario) -> List[str]:
+        return self.evaluator.get_conflicts(individual)
+
+    def find_conflicts(self, individual: Horario) -> ConflictReport:
+        return self.evaluator.find_conflicts(individual)
+
+def create_solver(engine: Optional[str], cursos: List[Curso], profesores: List[Profesor], aulas: List[Aula], grupos: List[Grupo], clases: List[Clase], config: dict, model: Optional[ConstraintModel] = None):
+    """
+    Crea el motor pedido (por defecto el parámetro 'engine' de Configuracion, o "ga").
+    Todos exponen solve(on_progress, should_cancel), stats, evaluator y find_conflicts.
+    """
+    engine = str(engine or config.get('engine') or 'ga').strip().lower()
+    if engine == 'ga':
+        return GeneticAlgorithm(cursos, profesores, aulas, grupos, clases, config, model=model)
+    if engine == 'cpsat':
+        from .cpsat_solver import CpSatSolver
+        return CpSatSolver(cursos, profesores, aulas, grupos, clases, config, model=model)
+    if engine == 'hybrid':
+        return HybridSolver(cursos, profesores, aulas, grupos, clases, config, model=model)
+    if engine == 'race':
+        from .racing import RacingSolver
+        return RacingSolver(cursos, profesores, aulas, grupos, clases, config, model=model)
+    if engine == 'pareto':
+        from .pareto import ParetoGA
+        return ParetoGA(cursos, profesores, aulas, grupos, clases, config, model=model)
+    if engine == 'decomposed':
+        from .decomposition import DecomposedSolver
+        return DecomposedSolver(cursos, profesores, aulas, grupos, clases, config, model=model)
+    raise ValueError(f"Motor desconocido: '{engine}'. Opciones: {', '.join(ENGINES)}")
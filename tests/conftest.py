@@ -0,0 +1,39 @@
+import os
+import sys
+
+# Agregar la raíz del repo al path para importar src (igual que los scripts)
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+from src.model import Curso, Profesor, Aula, Grupo, Clase
+
+SLOTS = ["07:00-07:45", "07:45-08:30", "08:30-09:15", "09:15-10:00", "10:00-10:45", "10:45-11:30", "12:30-13:15",
+         "13:15-14:00", "14:00-14:45", "14:45-15:30", "15:30-16:15", "16:15-17:00", "17:00-17:45", "17:45-18:30",
+         "18:30-19:15", "19:15-20:00", "20:00-20:45", "20:45-21:30", "21:30-22:15"]
+
+def make_instance(n_groups: int = 2):
+    """Instancia sintética chica: grupos con dos secciones de laboratorio, 4 profesores, break en el slot 6."""
+    profesores = [Profesor(f"P{i}", f"Prof {i}", 40, {}) for i in range(4)]
+    aulas = [Aula(f"A{i}", f"Aula {i}", 40, "Teoria") for i in range(3)] + [Aula("L0", "Lab 0", 30, "Laboratorio")]
+    turnos = ["MAÑANA", "TARDE", "NOCHE"]
+    grupos, cursos, clases = [], [], []
+    for g in range(n_groups):
+        gid = f"G{g}"
+        turno = turnos[g % len(turnos)]
+        grupos.append(Grupo(gid, gid, g + 1, turno, "A", 30))
+        grupos.append(Grupo(gid + "-A", gid + "-A", g + 1, turno, "A", 15, gid))
+        grupos.append(Grupo(gid + "-B", gid + "-B", g + 1, turno, "B", 15, gid))
+        for k in range(2):
+            cursos.append(Curso(f"C{g}_{k}", f"Curso {g}.{k}", str(g + 1), 3, "Teoria", [f"P{(g + k) % 4}", f"P{(g + k + 1) % 4}"]))
+            clases.append(Clase(f"K{g}_{k}", f"C{g}_{k}", gid, 3, "Teoria"))
+        cursos.append(Curso(f"C{g}_lab", f"Lab {g}", str(g + 1), 2, "Laboratorio", [f"P{(g + 2) % 4}"]))
+        for sub in ("-A", "-B"):
+            clases.append(Clase(f"K{g}_lab{sub}", f"C{g}_lab", gid + sub, 2, "Laboratorio"))
+    config = {"population_size": 30, "max_generations": 30, "elitism_count": 2, "mutation_rate": 0.05,
+              "crossover_rate": 0.9, "break_slots": [6], "time_slots": SLOTS,
+              "days": ["Lunes", "Martes", "Miercoles", "Jueves", "Viernes"]}
+    return cursos, profesores, aulas, grupos, clases, config
+
+@pytest.fixture
+def instance():
+    return make_instance()
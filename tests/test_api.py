@@ -0,0 +1,48 @@
+import copy
+import random
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")  # TestClient
+from fastapi.testclient import TestClient
+
+import src.api as api
+from conftest import make_instance
+from src.checkpoint import encode_checkpoint
+from src.genetic_algorithm import GeneticAlgorithm
+from test_checkpoint import MemoryStore
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setitem(api.app.dependency_overrides, api.get_current_user, lambda: "tester")
+    return TestClient(api.app)
+
+def test_interrupted_job_reports_best_fitness(client, monkeypatch):
+    random.seed(5)
+    cursos, profesores, aulas, grupos, clases, config = make_instance()
+    ga = GeneticAlgorithm(cursos, profesores, aulas, grupos, clases, dict(config, max_generations=3))
+    ga.num_workers = 1
+    ga.evolve()
+    ckpt = ga.checkpoint(3)
+    ckpt.best = copy.deepcopy(ckpt.best)
+    ckpt.best.fitness = -42.0
+    # Población recién reproducida: sin evaluar, fitness 0.0 por defecto
+    for ind in ckpt.population:
+        ind.fitness = 0.0
+    ckpt.meta = {"max_generations": 30}
+
+    store = MemoryStore()
+    store.save("job-x", encode_checkpoint(ckpt, clases))
+    monkeypatch.setattr(api, "get_checkpoint_store", lambda: store)
+
+    body = client.get("/progress/job-x").json()
+    assert body["status"] == "interrupted"
+    assert body["fitness"] == -42.0
+
+def test_only_checkpointing_engines_get_a_checkpointer():
+    from src.solvers import create_solver
+    cursos, profesores, aulas, grupos, clases, config = make_instance()
+    for engine, expected in (("ga", True), ("pareto", False), ("race", False)):
+        solver = create_solver(engine, cursos, profesores, aulas, grupos, clases, config)
+        assert getattr(solver, "SUPPORTS_CHECKPOINTS", False) is expected, engine
@@ -0,0 +1,90 @@
+import random
+
+from conftest import make_instance
+from src.checkpoint import Checkpointer, decode_checkpoint, encode_checkpoint, read_header
+from src.fitness import FitnessEvaluator
+from src.genetic_algorithm import GeneticAlgorithm
+
+class MemoryStore:
+    def __init__(self):
+        self.blobs = {}
+
+    def save(self, key, data):
+        self.blobs[key] = data
+
+    def load(self, key):
+        return self.blobs.get(key)
+
+    def delete(self, key):
+        self.blobs.pop(key, None)
+
+def _genes(horario):
+    return [(s.clase_id, s.profesor_id, s.aula_id, s.dia_idx, s.start_slot_idx, s.num_slots) for s in horario.sesiones]
+
+def _ga(config_overrides=None):
+    cursos, profesores, aulas, grupos, clases, config = make_instance()
+    ga = GeneticAlgorithm(cursos, profesores, aulas, grupos, clases, dict(config, **(config_overrides or {})))
+    ga.num_workers = 1
+    return ga
+
+def test_encode_decode_round_trip():
+    random.seed(7)
+    ga = _ga({"max_generations": 5})
+    ga.evolve()
+    ckpt = ga.checkpoint(5)
+    ckpt.meta = {"job_id": "j1", "time_budget": 60.0}
+
+    blob = encode_checkpoint(ckpt, ga.clases)
+    restored = decode_checkpoint(blob, ga.clases)
+
+    assert restored.generation == 5
+    assert restored.fingerprint == ckpt.fingerprint
+    assert restored.rng_state == ckpt.rng_state
+    assert restored.meta == ckpt.meta
+    assert [_genes(ind) for ind in restored.population] == [_genes(ind) for ind in ckpt.population]
+    assert [ind.fitness for ind in restored.population] == [ind.fitness for ind in ckpt.population]
+    assert _genes(restored.best) == _genes(ckpt.best) and restored.best.fitness == ckpt.best.fitness
+    assert read_header(blob)["meta"] == ckpt.meta
+
+def test_checkpoint_records_budget_spent():
+    store = MemoryStore()
+    ga = _ga({"max_generations": 12, "time_budget": 600})
+    ga.checkpointer = Checkpointer(store, "job", every=5, meta={"time_budget": 600.0})
+    ga.evolve()
+
+    meta = read_header(store.load("job"))["meta"]
+    assert meta["time_budget"] == 600.0
+    assert 0 < meta["budget_elapsed"] < 600
+
+def test_resume_only_gets_the_remaining_budget():
+    ga = _ga({"max_generations": 5})
+    ga.evolve()
+    ckpt = decode_checkpoint(encode_checkpoint(ga.checkpoint(2), ga.clases), ga.clases)
+    # El job original ya gastó todo su presupuesto antes de la interrupción
+    ckpt.meta = {"time_budget": 30.0, "budget_elapsed": 30.0}
+
+    resumed = _ga({"max_generations": 1000, "time_budget": 30})
+    resumed.evolve(resume_from=ckpt)
+    assert resumed.stats["generation"] == 2
+
+def test_resume_keeps_generation_rate_and_replan_cadence(monkeypatch):
+    # Sin fitness 0 alcanzable la corrida no se detiene antes por "Solution found"
+    score = FitnessEvaluator.score
+    monkeypatch.setattr(FitnessEvaluator, "score", lambda self, terms: score(self, terms) - 1.0)
+    ga = _ga({"max_generations": 5})
+    ga.evolve()
+    ckpt = decode_checkpoint(encode_checkpoint(ga.checkpoint(4), ga.clases), ga.clases)
+    assert ckpt.meta["gen_seconds"] > 0
+    ckpt.meta = {"gen_seconds": 0.5, "time_budget": 600.0, "budget_elapsed": 0.0}
+
+    resumed = _ga({"max_generations": 14, "time_budget": 600})
+    replans = []
+
+    def record(self, remaining, gens_left, gen_seconds, pop_size):
+        replans.append(self.stats["generation"])
+        return pop_size
+    monkeypatch.setattr(GeneticAlgorithm, "_budget_population_size", record)
+    resumed.evolve(resume_from=ckpt)
+    # Misma cadencia que una corrida sin interrupción (generaciones 2, 7, 12...) y EMA partiendo de la medida guardada
+    assert replans == [7, 12]
+    assert resumed._gen_seconds > 0.5 * 0.7 ** 10
@@ -0,0 +1,29 @@
+from conftest import make_instance
+from src import constraints
+from src.constraints import load_or_compile, constraint_cache_path
+
+def test_load_or_compile_reuses_cached_model(tmp_path, monkeypatch):
+    cursos, profesores, aulas, grupos, clases, config = make_instance()
+    path = str(tmp_path / "cache" / "constraints.json")
+    model = load_or_compile(cursos, profesores, aulas, grupos, clases, config, path)
+
+    # Mismos datos: se lee del caché sin compilar
+    def fail(*args, **kwargs):
+        raise AssertionError("no debería recompilar")
+    monkeypatch.setattr(constraints, "compile_constraints", fail)
+    cached = load_or_compile(cursos, profesores, aulas, grupos, clases, config, path)
+    assert cached.to_dict() == model.to_dict()
+
+def test_load_or_compile_recompiles_when_data_changes(tmp_path):
+    cursos, profesores, aulas, grupos, clases, config = make_instance()
+    path = str(tmp_path / "constraints.json")
+    model = load_or_compile(cursos, profesores, aulas, grupos, clases, config, path)
+    aulas[0].tipo = "Laboratorio"
+    changed = load_or_compile(cursos, profesores, aulas, grupos, clases, config, path)
+    assert changed.fingerprint != model.fingerprint
+    assert changed.room_type[aulas[0].id] == "Laboratorio"
+
+def test_constraint_cache_path_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("CONSTRAINT_CACHE", "off")
+    assert constraint_cache_path({}) is None
+    assert constraint_cache_path({"constraint_cache": "x/model.json"}) == "x/model.json"
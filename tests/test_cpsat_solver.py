@@ -0,0 +1,33 @@
+import pytest
+
+pytest.importorskip("ortools")
+
+from conftest import make_instance
+from src.cpsat_solver import CpSatSolver
+from src.presolve import InfeasibleInstanceError
+
+def _restricted_instance(profs):
+    # P0 solo puede dar clase el lunes 07:00-07:45: ninguna sesión de 2 o 3 bloques cabe
+    cursos, profesores, aulas, grupos, clases, config = make_instance()
+    profesores[0].disponibilidad = {"Lunes": ["07:00-07:45"]}
+    for c in cursos:
+        c.profesores_ids = list(profs)
+    config = dict(config, cpsat_time_limit=20, cpsat_workers=1)
+    return cursos, profesores, aulas, grupos, clases, config
+
+def test_legal_starts_exclude_breaks_and_unavailable_professors():
+    solver = CpSatSolver(*_restricted_instance(["P0", "P1"]))
+    for clase in solver.clases:
+        assert not solver.domains[clase.id].legal_placements("P0")
+
+    horario = solver.solve()
+    model = solver.model
+    for s in horario.sesiones:
+        assert s.profesor_id == "P1"
+        assert not model.hits_break(s.start_slot_idx, s.num_slots)
+        assert model.prof_available(s.profesor_id, s.dia_idx, s.start_slot_idx, s.num_slots)
+
+def test_infeasible_when_no_eligible_professor_has_a_legal_start():
+    solver = CpSatSolver(*_restricted_instance(["P0"]))
+    with pytest.raises(InfeasibleInstanceError):
+        solver.solve()
@@ -0,0 +1,127 @@
+import importlib
+import re
+import sys
+import types
+
+import pytest
+
+from src import data_loader
+from src.data_loader import RESULTS_HEADERS, ResultsConflictError, _align_rows, save_schedule_to_sheet
+
+WIDTH = len(RESULTS_HEADERS)
+
+def _row(curso, grupo, dia="Lunes", slot=0):
+    return [dia, f"{7 + slot}:00", f"{8 + slot}:00", curso, grupo, "A0", "P0", "Teoria", "0", str(slot), "1"]
+
+def _changed(old, new):
+    return [i for i, (a, b) in enumerate(zip(old, new)) if a != b] + list(range(len(old), len(new)))
+
+def test_identical_rows_keep_their_position():
+    old = [_row(f"C{i}", "G0", slot=i) for i in range(5)]
+    shuffled = [old[3], old[0], old[4], old[1], old[2]]
+    assert _align_rows(old, shuffled, WIDTH) == old
+
+def test_moving_two_sessions_changes_two_rows():
+    old = [_row(f"C{i}", "G0", slot=i) for i in range(6)]
+    new = list(old)
+    new[1] = _row("C1", "G0", dia="Martes", slot=1)
+    new[4] = _row("C4", "G0", dia="Jueves", slot=2)
+    aligned = _align_rows(old, list(reversed(new)), WIDTH)
+    assert _changed(old, aligned) == [1, 4]
+    assert aligned[1][0] == "Martes" and aligned[4][0] == "Jueves"
+
+def test_shrinking_leaves_blank_rows_and_growing_appends():
+    old = [_row(f"C{i}", "G0", slot=i) for i in range(4)]
+    aligned = _align_rows(old, old[:2], WIDTH)
+    assert aligned[:2] == old[:2] and aligned[2:] == [[""] * WIDTH] * 2
+
+    extra = _row("C9", "G1")
+    assert _align_rows(old, old + [extra], WIDTH) == old + [extra]
+
+class FakeWorksheet:
+    def __init__(self, rows):
+        self.rows = [list(r) for r in rows]
+        self.row_count = 1000
+        self.writes = 0
+
+    def get_all_values(self):
+        return [list(r) for r in self.rows]
+
+    def batch_update(self, data):
+        self.writes += 1
+        for item in data:
+            start = int(re.match(r"[A-Z]+(\d+):", item["range"]).group(1)) - 1
+            for k, values in enumerate(item["values"]):
+                while len(self.rows) <= start + k:
+                    self.rows.append([""] * WIDTH)
+                self.rows[start + k] = [str(v) for v in values]
+
+    def add_rows(self, n):
+        self.row_count += n
+
+    def freeze(self, rows):
+        pass
+
+class FakeSpreadsheet:
+    def __init__(self, ws, revisions):
+        self.ws = ws
+        self.revisions = iter(revisions)
+
+    def worksheet(self, title):
+        return self.ws
+
+    def get_lastUpdateTime(self):
+        return next(self.revisions)
+
+def _session(curso, slot=0):
+    return {"dia": "Lunes", "hora_inicio": f"{7 + slot}:00", "hora_fin": f"{8 + slot}:00", "curso": curso, "grupo": "G0",
+            "aula": "A0", "profesor": "P0", "tipo_aula": "Teoria", "meta_dia_idx": 0, "meta_slot_idx": slot, "meta_num_slots": 1}
+
+def _rowcol_to_a1(row, col):
+    letters = ""
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return f"{letters}{row}"
+
+@pytest.fixture
+def sheet(monkeypatch):
+    monkeypatch.setattr(data_loader, "_results_snapshots", {})
+    try:
+        importlib.import_module("gspread")
+    except ImportError:
+        # save_schedule_to_sheet solo usa WorksheetNotFound y rowcol_to_a1: alcanza un módulo mínimo
+        stub = types.ModuleType("gspread")
+        stub.WorksheetNotFound = type("WorksheetNotFound", (Exception,), {})
+        stub.utils = types.ModuleType("gspread.utils")
+        stub.utils.rowcol_to_a1 = _rowcol_to_a1
+        monkeypatch.setitem(sys.modules, "gspread", stub)
+        monkeypatch.setitem(sys.modules, "gspread.utils", stub.utils)
+
+    def use(ws, revisions):
+        sh = FakeSpreadsheet(ws, revisions)
+        monkeypatch.setattr(data_loader, "_open_sheet", lambda name, creds: sh)
+        return sh
+    return use
+
+def test_save_rediffs_when_sheet_changes_before_write(sheet):
+    ws = FakeWorksheet([RESULTS_HEADERS] + [_row(f"C{i}", "G0", slot=i) for i in range(3)])
+    # La revisión cambia entre el diff y el re-chequeo del primer intento
+    sheet(ws, ["r1", "r2", "r2", "r2", "r3"])
+    schedule = [_session(f"C{i}", slot=i) for i in range(3)]
+    schedule[2] = _session("C2", slot=5)
+
+    result = save_schedule_to_sheet(schedule, "test")
+    assert result["changed_rows"] == 1 and ws.writes == 1
+    assert ws.rows[3][9] == "5"
+
+def test_save_gives_up_without_writing_if_sheet_keeps_changing(sheet):
+    ws = FakeWorksheet([RESULTS_HEADERS] + [_row("C0", "G0")])
+    sheet(ws, [f"r{i}" for i in range(20)])
+
+    with pytest.raises(ResultsConflictError):
+        save_schedule_to_sheet([_session("C0", slot=3)], "test")
+    assert ws.writes == 0
+
+def test_rowcol_helper_matches_a1_notation():
+    assert [_rowcol_to_a1(1, 1), _rowcol_to_a1(12, 11), _rowcol_to_a1(3, 27)] == ["A1", "K12", "AA3"]
@@ -0,0 +1,34 @@
+from conftest import make_instance
+from src.decomposition import merge_partials
+from src.model import Sesion
+
+def _sesiones(clases):
+    return [Sesion(c.id, "P0", "A0", 0, 0, c.duracion_bloques) for c in clases]
+
+def test_merge_partials_keeps_class_order():
+    clases = make_instance()[4]
+    half = len(clases) // 2
+    merged = merge_partials(clases, {0: _sesiones(clases[half:]), 1: _sesiones(clases[:half])}, 2)
+    assert [s.clase_id for s in merged.sesiones] == [c.id for c in clases]
+
+def test_merge_partials_skips_clusters_stopped_before_first_generation():
+    clases = make_instance()[4]
+    half = len(clases) // 2
+    # Un cluster cancelado antes de su primera generación devuelve None en vez de sesiones
+    assert merge_partials(clases, {0: _sesiones(clases[:half]), 1: None}, 2) is None
+    assert merge_partials(clases, {0: _sesiones(clases[:half])}, 2) is None
+
+def test_time_budget_covers_all_cluster_batches_and_repair():
+    import time
+    from src.decomposition import DecomposedSolver
+
+    cursos, profesores, aulas, grupos, clases, config = make_instance(n_groups=4)
+    # Un solo proceso: 4 tandas de clusters más la reparación, todas con generaciones de sobra
+    solver = DecomposedSolver(cursos, profesores, aulas, grupos, clases, dict(
+        config, decomposition_max_clases=4, decomposition_workers=1, time_budget=1.0, population_size=20,
+        max_generations=10 ** 6, decomposition_repair_generations=10 ** 6))
+    start = time.perf_counter()
+    best = solver.solve()
+    assert len(solver.stats["clusters"]) > 1
+    assert best is not None
+    assert time.perf_counter() - start < 2.0
@@ -0,0 +1,37 @@
+import random
+
+import pytest
+
+from conftest import make_instance
+from src.genetic_algorithm import GeneticAlgorithm
+from src.model import Horario, Sesion
+
+@pytest.fixture
+def ga():
+    random.seed(3)
+    cursos, profesores, aulas, grupos, clases, config = make_instance(n_groups=3)
+    ga = GeneticAlgorithm(cursos, profesores, aulas, grupos, clases, config)
+    ga.initialize_population()
+    return ga
+
+def _clashing(clases):
+    # Todas las clases en el mismo profesor, aula y hora (incluido el break): muchas penalidades duras
+    return Horario(sesiones=[Sesion(c.id, "P0", "A0", 0, 5, c.duracion_bloques) for c in clases])
+
+def test_breakdown_total_matches_evaluate(ga):
+    evaluator = ga.evaluator
+    for ind in ga.population + [_clashing(ga.clases)]:
+        ind.penalties = None
+        fitness = evaluator.evaluate(ind)
+        # Sin contadores guardados el desglose recalcula la pasada
+        assert evaluator.breakdown(ind).total == fitness
+        # Con los contadores guardados por el GA, mismo total sin segunda pasada
+        ind.fitness, ind.penalties = evaluator.evaluate_terms(ind)
+        assert evaluator.breakdown(ind).total == fitness == ind.fitness
+        assert -sum(evaluator.objectives(ind)) == fitness
+
+def test_breakdown_reports_hard_violations(ga):
+    ind = _clashing(ga.clases)
+    breakdown = ga.evaluator.breakdown(ind)
+    assert breakdown.hard_violations > 0
+    assert breakdown.counts["break"] > 0 and breakdown.counts["prof"] > 0
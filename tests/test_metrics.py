@@ -0,0 +1,18 @@
+import pytest
+
+from src import metrics
+
+def test_base_metric_is_abstract():
+    with pytest.raises(TypeError):
+        metrics._Metric("horario_test_base", "Base sin muestras.")
+
+def test_counter_renders_help_type_and_samples(monkeypatch):
+    monkeypatch.setattr(metrics, "_registry", [])
+    counter = metrics.Counter("horario_test_total", "Contador de prueba.", ("op",))
+    counter.inc(op="read")
+    counter.inc(2, op="read")
+    assert counter.render() == [
+        "# HELP horario_test_total Contador de prueba.",
+        "# TYPE horario_test_total counter",
+        'horario_test_total{op="read"} 3',
+    ]
@@ -0,0 +1,26 @@
+import random
+
+from conftest import make_instance
+from src.genetic_algorithm import GeneticAlgorithm
+from src.pareto import ParetoGA
+
+def test_pareto_offspring_come_from_batched_breeding(monkeypatch):
+    random.seed(2)
+    cursos, profesores, aulas, grupos, clases, config = make_instance(n_groups=3)
+    ga = ParetoGA(cursos, profesores, aulas, grupos, clases, dict(config, max_generations=8, pareto_front_size=3))
+    ga.num_workers = 1
+    calls = []
+    breed = GeneticAlgorithm.breed
+
+    def counting(self, genomes, parents, shape):
+        calls.append(len(parents))
+        return breed(self, genomes, parents, shape)
+    monkeypatch.setattr(GeneticAlgorithm, "breed", counting)
+
+    best = ga.evolve()
+    assert calls and all(n == config["population_size"] for n in calls)
+    assert best is not None and 1 <= len(ga.pareto_front) <= 3
+    # Cada horario tiene sus propias sesiones: la reproducción no comparte objetos mutables
+    sesiones = [id(s) for ind in ga.population for s in ind.sesiones]
+    assert len(sesiones) == len(set(sesiones))
+    assert best.fitness == ga.evaluator.evaluate(best)
@@ -0,0 +1,28 @@
+from conftest import make_instance
+from src.constraints import compile_constraints
+from src.domains import build_domains
+from src.presolve import presolve
+
+def _presolve(cursos, profesores, aulas, grupos, clases, config):
+    model = compile_constraints(cursos, profesores, aulas, grupos, clases, config)
+    domains = build_domains(model, profesores, aulas, grupos, clases)
+    return presolve(model, domains, [c.id for c in cursos], profesores, aulas, grupos, clases)
+
+def test_course_without_eligible_professors_is_only_a_warning():
+    cursos, profesores, aulas, grupos, clases, config = make_instance()
+    cursos[0].profesores_ids = []
+
+    result = _presolve(cursos, profesores, aulas, grupos, clases, config)
+    assert result.feasible
+    assert any(cursos[0].id in w and "respaldo" in w for w in result.warnings)
+    # Se mantiene el profesor de respaldo de build_domains
+    assert result.domains["K0_0"].profs == [profesores[0].id]
+
+def test_over_demanded_course_is_still_infeasible():
+    cursos, profesores, aulas, grupos, clases, config = make_instance()
+    profesores[1].max_horas_semana = 1
+    cursos[0].profesores_ids = [profesores[1].id]
+
+    result = _presolve(cursos, profesores, aulas, grupos, clases, config)
+    assert not result.feasible
+    assert any(cursos[0].id in r for r in result.reasons)
@@ -0,0 +1,41 @@
+import queue
+import threading
+
+from conftest import make_instance
+from src.genetic_algorithm import GeneticAlgorithm
+from src.racing import RacingSolver, _race_worker
+
+def test_race_workers_reuse_parent_presolve(monkeypatch):
+    cursos, profesores, aulas, grupos, clases, config = make_instance()
+    solver = RacingSolver(cursos, profesores, aulas, grupos, clases, dict(config, race_runs=1, max_generations=3))
+    presolved = solver.ga.presolve()
+
+    def fail(self):
+        raise AssertionError("la corrida repitió el pre-solve")
+    monkeypatch.setattr(GeneticAlgorithm, "presolve", fail)
+
+    results = queue.Queue()
+    run_config = dict(solver.config, presolve=0)
+    _race_worker(0, 1, solver.data, run_config, solver.model, presolved, results, threading.Event())
+    messages = []
+    while not results.empty():
+        messages.append(results.get())
+    assert [m for m in messages if m[0] == "error"] == []
+    assert messages[-1][0] == "done" and messages[-1][2] is not None
+
+def test_race_worker_uses_stored_counters_for_feasibility(monkeypatch):
+    cursos, profesores, aulas, grupos, clases, config = make_instance()
+    solver = RacingSolver(cursos, profesores, aulas, grupos, clases, dict(config, race_runs=1, max_generations=6))
+
+    def fail(self, individual):
+        raise AssertionError("barrido de conflictos en el bucle de la corrida")
+    monkeypatch.setattr(GeneticAlgorithm, "find_conflicts", fail)
+
+    results = queue.Queue()
+    _race_worker(0, 1, solver.data, dict(solver.config, presolve=0), solver.model, None, results, threading.Event())
+    messages = []
+    while not results.empty():
+        messages.append(results.get())
+    assert [m for m in messages if m[0] == "error"] == []
+    _, _, best, feasible = messages[-1]
+    assert feasible == (not solver.find_conflicts(best))
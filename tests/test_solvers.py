@@ -0,0 +1,27 @@
+import time
+
+from conftest import make_instance
+from src.solvers import HybridSolver
+
+def _hybrid(monkeypatch, cpsat_seconds, **overrides):
+    cursos, profesores, aulas, grupos, clases, config = make_instance()
+    solver = HybridSolver(cursos, profesores, aulas, grupos, clases, dict(config, **overrides))
+
+    def slow_cpsat(should_cancel=None, seed_individuals=None):
+        time.sleep(cpsat_seconds)
+        return None
+    monkeypatch.setattr(solver.cpsat, "solve", slow_cpsat)
+    budgets = []
+    monkeypatch.setattr(solver.ga, "evolve", lambda **kwargs: budgets.append(kwargs["time_budget"]))
+    solver.solve()
+    return budgets[0]
+
+def test_hybrid_ga_gets_only_the_remaining_budget(monkeypatch):
+    remaining = _hybrid(monkeypatch, 0.3, time_budget=1.0)
+    assert 0 < remaining <= 0.7
+
+def test_hybrid_exhausted_budget_is_not_unlimited(monkeypatch):
+    assert 0 < _hybrid(monkeypatch, 0.2, time_budget=0.1) < 0.01
+
+def test_hybrid_without_budget_leaves_ga_unbounded(monkeypatch):
+    assert _hybrid(monkeypatch, 0.0) is None